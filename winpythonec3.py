@@ -14,11 +14,2677 @@ import subprocess
 import shutil
 import zipfile
 import glob
+import fnmatch
+import re
+import ast
+import json
+import queue
+import zlib
+import struct
+import marshal
+import mmap
+import hashlib
+import time
+import threading
+import asyncio
+import atexit
+import itertools
+import copy
+import shlex
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import argparse
 import datetime
 
 
+class _ThreadOutput:
+    """Strumień stdout kierujący print() z wątków roboczych do osobnych ujść"""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        sink = getattr(self._local, "sink", None)
+        if sink is not None:
+            sink(text)
+            return len(text)
+        with self._lock:
+            return self._stream.write(text)
+
+    def write_raw(self, text):
+        """Zapis bezpośrednio do konsoli, z pominięciem przekierowań"""
+        with self._lock:
+            self._stream.write(text)
+            self._stream.flush()
+
+    def flush(self):
+        self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+    def current_sink(self):
+        """Ujście bieżącego wątku (None - konsola)"""
+        return getattr(self._local, "sink", None)
+
+    @contextmanager
+    def redirect(self, sink):
+        """Przekierowuje wyjście bieżącego wątku do funkcji sink(text)"""
+        previous = getattr(self._local, "sink", None)
+        self._local.sink = sink
+        try:
+            yield
+        finally:
+            self._local.sink = previous
+
+
+def thread_output():
+    """Instaluje (raz) i zwraca router wyjścia dla wątków"""
+    if not isinstance(sys.stdout, _ThreadOutput):
+        sys.stdout = _ThreadOutput(sys.stdout)
+    return sys.stdout
+
+
+def _line_sink(callback):
+    """Zwraca sink składający tekst w pełne linie i przekazujący je do callback(line)"""
+    pending = []
+
+    def sink(text):
+        pending.append(text)
+        joined = "".join(pending)
+        lines = joined.split("\n")
+        pending[:] = [lines.pop()]
+        for line in lines:
+            callback(line)
+
+    return sink
+
+
+def _prefixed_sink(prefix, router):
+    """Zwraca sink wypisujący pełne linie z prefiksem zadania"""
+    return _line_sink(lambda line: router.write_raw(f"[{prefix}] {line}\n"))
+
+
+def _stage_sink(router, parent, lock):
+    """Sink etapu równoległego: pełne linie trafiają do ujścia wątku nadrzędnego"""
+    def emit(line):
+        if parent is None:
+            router.write_raw(line + "\n")
+        else:
+            with lock:
+                parent(line + "\n")
+    return _line_sink(emit)
+
+
+def run_stages(stages):
+    """Uruchamia niezależne etapy {nazwa: funkcja} równolegle; zwraca {nazwa: wynik}.
+    
+    Wyjście etapów trafia (liniami) tam, gdzie wyjście wywołującego wątku,
+    np. do prefiksowanego ujścia zadania wsadowego. Wyjątek etapu daje wynik None.
+    """
+    router = thread_output()
+    parent = router.current_sink()
+    lock = threading.Lock()
+    
+    def run(name, func):
+        with router.redirect(_stage_sink(router, parent, lock)):
+            try:
+                return func()
+            except Exception as e:
+                print(f"❌ Etap {name}: {type(e).__name__}: {e}")
+                return None
+    
+    if len(stages) == 1:
+        name, func = next(iter(stages.items()))
+        return {name: run(name, func)}
+    with ThreadPoolExecutor(max_workers=len(stages), thread_name_prefix="wpec-stage") as pool:
+        futures = {name: pool.submit(run, name, func) for name, func in stages.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+DEFAULT_SERVER_ADDRESS = "127.0.0.1:8765"
+
+
+def parse_address(address):
+    """Zamienia 'host:port' na (host, port)"""
+    host, _, port = (address or DEFAULT_SERVER_ADDRESS).rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+class CompileServer:
+    """Serwer kompilacji: kolejka zadań asyncio nad jednym, rozgrzanym WinPythonCompiler.
+    
+    Protokół: jedna linia JSON z żądaniem od klienta, w odpowiedzi strumień linii
+    JSON ze zdarzeniami ("queued", "status", "log", "result", "error").
+    """
+
+    def __init__(self, compiler, output_dir, concurrency=2, make_zip=True):
+        self.compiler = compiler
+        compiler.concurrent_builds = True
+        self.output_dir = output_dir
+        self.concurrency = max(1, concurrency)
+        self.make_zip = make_zip
+        self.jobs = {}
+        self._ids = itertools.count(1)
+        self._queue = None
+        self._loop = None
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        self._router = thread_output()
+
+    async def serve(self, host, port):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        server = await asyncio.start_server(self._handle_client, host, port)
+        print(f"🛰️  Serwer kompilacji nasłuchuje na {host}:{port} "
+              f"(równoległość: {self.concurrency}, Ctrl+C kończy)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for job in self.jobs.values():
+                job["cancel"].set()
+            for worker in workers:
+                worker.cancel()
+            self._executor.shutdown(wait=True)
+
+    def _emit(self, job, event):
+        """Zapisuje zdarzenie zadania i przekazuje je subskrybentom (wątek pętli)"""
+        event = dict(event, job=job["id"])
+        job["events"].append(event)
+        for subscriber in list(job["subscribers"]):
+            subscriber.put_nowait(event)
+
+    def _emit_threadsafe(self, job, event):
+        self._loop.call_soon_threadsafe(self._emit, job, event)
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                if job["cancel"].is_set():
+                    continue
+                job["status"] = "running"
+                self._emit(job, {"type": "status", "status": "running"})
+                result = await self._loop.run_in_executor(self._executor, self._run_job, job)
+                job["status"] = "cancelled" if job["cancel"].is_set() else (
+                    "success" if result["success"] else "failed")
+                self._emit(job, {"type": "result", "status": job["status"], "result": result})
+            except Exception as e:
+                job["status"] = "failed"
+                self._emit(job, {"type": "result", "status": "failed", "error": str(e)})
+            finally:
+                self._queue.task_done()
+
+    def _run_job(self, job):
+        """Kompilacja w wątku puli; wyjście print() trafia do klienta jako zdarzenia 'log'"""
+        prefix = f"#{job['id']} {os.path.basename(job['script'])}"
+        
+        def forward(line):
+            self._router.write_raw(f"[{prefix}] {line}\n")
+            self._emit_threadsafe(job, {"type": "log", "line": line})
+        
+        with self._router.redirect(_line_sink(forward)):
+            return self.compiler.build_script(job["script"], self.output_dir,
+                                              job["make_zip"], job["cancel"])
+
+    async def _send(self, writer, event):
+        writer.write((json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8"))
+        await writer.drain()
+
+    async def _handle_client(self, reader, writer):
+        try:
+            request = json.loads((await reader.readline()).decode("utf-8"))
+            if not isinstance(request, dict):
+                raise ValueError("Żądanie musi być obiektem JSON")
+            action = request.get("action")
+            if action == "build":
+                await self._handle_build(request, writer)
+            elif action == "cancel":
+                job_id = request.get("job")
+                if isinstance(job_id, str) and job_id.strip().isdigit():
+                    job_id = int(job_id)
+                if not isinstance(job_id, int) or isinstance(job_id, bool):
+                    await self._send(writer, {"type": "error",
+                                              "error": f"Nieprawidłowy identyfikator zadania: {job_id!r}"})
+                    return
+                job = self.jobs.get(job_id)
+                if not job:
+                    await self._send(writer, {"type": "error", "error": "Nieznane zadanie"})
+                else:
+                    job["cancel"].set()
+                    if job["status"] == "queued":
+                        job["status"] = "cancelled"
+                        self._emit(job, {"type": "result", "status": "cancelled"})
+                    await self._send(writer, {"type": "status", "job": job["id"],
+                                              "status": "cancelling"})
+            elif action == "status":
+                await self._send(writer, {"type": "jobs", "jobs": [
+                    {"job": job["id"], "script": job["script"], "status": job["status"]}
+                    for job in self.jobs.values()
+                ]})
+            else:
+                await self._send(writer, {"type": "error", "error": f"Nieznana akcja: {action}"})
+        except (ValueError, ConnectionError) as e:
+            try:
+                await self._send(writer, {"type": "error", "error": str(e)})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    async def _handle_build(self, request, writer):
+        script = request.get("script") or ""
+        if not os.path.isfile(script) or not script.lower().endswith(".py"):
+            await self._send(writer, {"type": "error", "error": f"Nieprawidłowy skrypt: {script}"})
+            return
+        
+        job = {
+            "id": next(self._ids),
+            "script": os.path.abspath(script),
+            "make_zip": bool(request.get("make_zip", self.make_zip)),
+            "status": "queued",
+            "cancel": threading.Event(),
+            "events": [],
+            "subscribers": [],
+        }
+        self.jobs[job["id"]] = job
+        events = asyncio.Queue()
+        job["subscribers"].append(events)
+        self._emit(job, {"type": "queued", "position": self._queue.qsize() + 1})
+        await self._queue.put(job)
+        
+        try:
+            while True:
+                event = await events.get()
+                await self._send(writer, event)
+                if event["type"] == "result":
+                    break
+        except ConnectionError:
+            pass  # klient się rozłączył - zadanie działa dalej
+        finally:
+            job["subscribers"].remove(events)
+
+
+async def _client_request(address, request, on_event):
+    host, port = parse_address(address)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write((json.dumps(request) + "\n").encode("utf-8"))
+        await writer.drain()
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            on_event(json.loads(line.decode("utf-8")))
+    finally:
+        writer.close()
+
+
+def submit_remote_builds(address, scripts, make_zip=True):
+    """Wysyła skrypty do serwera kompilacji i wypisuje strumień zdarzeń; True gdy wszystkie OK"""
+    results = {}
+    job_ids = {}
+    
+    def handler(script):
+        name = os.path.basename(script)
+        
+        def on_event(event):
+            job_ids[script] = event.get("job")
+            kind = event["type"]
+            if kind == "queued":
+                print(f"[{name}] 📥 Zadanie #{event['job']} w kolejce (pozycja {event['position']})")
+            elif kind == "status":
+                print(f"[{name}] ▶ {event['status']}")
+            elif kind == "log":
+                print(f"[{name}] {event['line']}")
+            elif kind == "result":
+                results[script] = event["status"]
+                print(f"[{name}] {'✅' if event['status'] == 'success' else '❌'} {event['status']}")
+            elif kind == "error":
+                results[script] = "error"
+                print(f"[{name}] ❌ {event['error']}")
+        
+        return on_event
+    
+    async def run_all():
+        await asyncio.gather(*[
+            _client_request(address, {"action": "build", "script": os.path.abspath(script),
+                                      "make_zip": make_zip}, handler(script))
+            for script in scripts
+        ])
+    
+    try:
+        asyncio.run(run_all())
+    except KeyboardInterrupt:
+        print("\n⏹️  Przerywam zadania na serwerze...")
+        for job_id in job_ids.values():
+            if job_id:
+                cancel_remote_job(address, job_id)
+        return False
+    except OSError as e:
+        print(f"❌ Brak połączenia z serwerem {address or DEFAULT_SERVER_ADDRESS}: {e}")
+        return False
+    return bool(results) and all(status == "success" for status in results.values())
+
+
+def cancel_remote_job(address, job_id):
+    """Anuluje zadanie na serwerze kompilacji"""
+    def on_event(event):
+        if event["type"] == "error":
+            print(f"❌ {event['error']}")
+        else:
+            print(f"⏹️  Zadanie #{event['job']}: {event['status']}")
+    
+    try:
+        asyncio.run(_client_request(address, {"action": "cancel", "job": job_id}, on_event))
+        return True
+    except OSError as e:
+        print(f"❌ Brak połączenia z serwerem: {e}")
+        return False
+
+
+CACHE_DIR_NAME = ".winpythonec_cache"
+
+
+def _resolve_local_module(base_dir, parts):
+    """Zamienia nazwę modułu (listę członów) na pliki .py w base_dir"""
+    files = []
+    path = base_dir
+    for i, part in enumerate(parts):
+        path = os.path.join(path, part)
+        init_file = os.path.join(path, "__init__.py")
+        if os.path.isdir(path):
+            if os.path.isfile(init_file):
+                files.append(init_file)
+            continue
+        if os.path.isfile(path + ".py"):
+            files.append(path + ".py")
+        break
+    return files
+
+
+def _scan_imports(source, filename="<string>"):
+    """Wyciąga z kodu instrukcje importu i dynamiczne importy z literałem"""
+    tree = ast.parse(source, filename)
+    imports = []
+    dynamic = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                imports.append([0, alias.name, []])
+        elif isinstance(node, ast.ImportFrom):
+            names = [alias.name for alias in node.names if alias.name != "*"]
+            imports.append([node.level, node.module or "", names])
+        elif isinstance(node, ast.Call) and node.args:
+            # importlib.import_module("x"), import_module("x", "pkg"), __import__("x")
+            func = node.func
+            func_name = func.attr if isinstance(func, ast.Attribute) else getattr(func, "id", None)
+            if func_name not in ("import_module", "__import__"):
+                continue
+            first = node.args[0]
+            if not (isinstance(first, ast.Constant) and isinstance(first.value, str)):
+                continue
+            package = None
+            if func_name == "import_module" and len(node.args) > 1:
+                second = node.args[1]
+                if isinstance(second, ast.Constant) and isinstance(second.value, str):
+                    package = second.value
+            dynamic.append([first.value, package])
+    return {"imports": imports, "dynamic": dynamic}
+
+
+class ImportGraph:
+    """Graf importów skryptu i jego lokalnych modułów (analiza AST, cache wg hasha pliku)"""
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self._memory = {}
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def scan(self, module_path):
+        """Instrukcje importu modułu; wynik zapamiętany wg SHA-256 treści pliku"""
+        try:
+            with open(module_path, "rb") as f:
+                source = f.read()
+        except OSError:
+            return {"imports": [], "dynamic": []}
+        file_hash = hashlib.sha256(source).hexdigest()
+        
+        with self._lock:
+            if file_hash in self._memory:
+                return self._memory[file_hash]
+        
+        cache_file = os.path.join(self.cache_dir, f"{file_hash}.json") if self.cache_dir else None
+        records = None
+        if cache_file and os.path.exists(cache_file):
+            try:
+                with open(cache_file, encoding="utf-8") as f:
+                    records = json.load(f)
+            except (OSError, ValueError):
+                records = None
+        if records is None:
+            try:
+                records = _scan_imports(source, module_path)
+            except (SyntaxError, ValueError):
+                records = {"imports": [], "dynamic": []}
+            if cache_file:
+                try:
+                    tmp_path = f"{cache_file}.{os.getpid()}.{threading.get_ident()}"
+                    with open(tmp_path, "w", encoding="utf-8") as f:
+                        json.dump(records, f)
+                    os.replace(tmp_path, cache_file)
+                except OSError:
+                    pass
+        
+        with self._lock:
+            self._memory[file_hash] = records
+        return records
+
+    def build(self, script_path):
+        """Przechodzi graf od skryptu; zwraca moduły lokalne, zewnętrzne i importy dynamiczne"""
+        script_path = os.path.abspath(script_path)
+        root = os.path.dirname(script_path)
+        seen = {script_path}
+        queue = [script_path]
+        external = set()
+        dynamic = set()
+        edges = {}
+        
+        while queue:
+            module_path = queue.pop(0)
+            module_dir = os.path.dirname(module_path)
+            records = self.scan(module_path)
+            targets = []
+            
+            requests = [(level, module, names) for level, module, names in records["imports"]]
+            for name, package in records["dynamic"]:
+                if name.startswith(".") and package:
+                    level = len(name) - len(name.lstrip("."))
+                    parts = package.split(".")[:len(package.split(".")) - level + 1]
+                    name = ".".join(parts + [name.lstrip(".")])
+                dynamic.add(name)
+                requests.append((0, name, []))
+            
+            for level, module, names in requests:
+                parts = module.split(".") if module else []
+                if level:
+                    base_dir = module_dir
+                    for _ in range(level - 1):
+                        base_dir = os.path.dirname(base_dir)
+                else:
+                    base_dir = root
+                
+                files = _resolve_local_module(base_dir, parts)
+                # "from pakiet import moduł" - moduł może być podmodułem
+                for name in names:
+                    files += _resolve_local_module(base_dir, parts + [name])
+                if not files and not level and parts:
+                    external.add(parts[0])
+                targets += files
+            
+            edges[module_path] = sorted({os.path.abspath(f) for f in targets})
+            for target in edges[module_path]:
+                if target not in seen:
+                    seen.add(target)
+                    queue.append(target)
+        
+        seen.discard(script_path)
+        return {
+            "script": script_path,
+            "local": sorted(seen),
+            "external": sorted(external),
+            "dynamic": sorted(dynamic),
+            "edges": edges,
+        }
+
+
+HEAVY_PACKAGES = (
+    "numpy", "scipy", "pandas", "matplotlib", "PyQt5", "PyQt6", "PySide2", "PySide6",
+    "qtpy", "IPython", "ipykernel", "jupyter_client", "jupyter_core", "notebook",
+    "nbformat", "nbconvert", "sympy", "sklearn", "skimage", "statsmodels", "bokeh",
+    "dask", "numba", "llvmlite", "torch", "tensorflow", "cv2", "PIL", "pyarrow",
+    "h5py", "tables", "sqlalchemy", "docutils", "sphinx", "pytest", "jedi", "parso",
+    "spyder", "zmq", "tornado", "babel", "pygments", "lxml", "openpyxl", "plotly",
+    "seaborn", "networkx", "astropy", "numexpr", "altair", "xarray", "pywt",
+)
+
+
+# Moduły biblioteki standardowej, które PyInstaller często dołącza bez potrzeby
+PRUNABLE_STDLIB = (
+    "tkinter", "unittest", "pydoc", "pydoc_data", "doctest", "lib2to3", "idlelib",
+    "distutils", "xmlrpc", "pdb", "sqlite3", "curses", "turtle", "turtledemo",
+    "ensurepip", "venv", "test", "msilib", "multiprocessing", "asyncio", "email",
+    "http", "xml", "ftplib", "imaplib", "smtplib", "mailbox",
+)
+
+# Uruchamiany interpreterem WinPython: wykonuje skrypt i zapisuje wszystkie załadowane moduły
+IMPORT_TRACER = r"""
+import sys, json, atexit, runpy
+output, script = sys.argv[1], sys.argv[2]
+seen = set()
+
+class _Tracer:
+    def find_spec(self, name, path=None, target=None):
+        seen.add(name)
+        return None
+
+def _dump():
+    seen.update(name for name, module in list(sys.modules.items()) if module is not None)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(sorted(seen), f)
+
+sys.meta_path.insert(0, _Tracer())
+atexit.register(_dump)
+sys.argv = sys.argv[2:]
+sys.path[0] = __import__("os").path.dirname(script)
+runpy.run_path(script, run_name="__main__")
+"""
+
+
+# Uruchamiany interpreterem WinPython zamiast "python -m PyInstaller": bajtkod modułów
+# brany z cache (klucz: SHA-256 źródła i poziom optymalizacji), brakujący dopisywany do cache
+PYINSTALLER_RUNNER = r'''
+import sys, os, hashlib, marshal, types, atexit
+cache_dir, level = sys.argv[1], int(sys.argv[2])
+sys.argv = ["pyinstaller"] + sys.argv[3:]
+stats = [0, 0]
+# Wersje, w których get_code_object(modname, filename, ...) ma sprawdzony kształt
+SUPPORTED_MAJORS = (5, 6)
+
+
+def retarget(code, filename):
+    consts = tuple(retarget(c, filename) if isinstance(c, types.CodeType) else c for c in code.co_consts)
+    return code.replace(co_filename=filename, co_consts=consts)
+
+
+def install():
+    """Podmienia get_code_object; zwraca powód, gdy podmiana nie jest bezpieczna"""
+    import inspect
+    import PyInstaller
+    from PyInstaller.building import utils
+    version = str(getattr(PyInstaller, "__version__", "?"))
+    major = version.split(".")[0]
+    if not major.isdigit() or int(major) not in SUPPORTED_MAJORS:
+        return f"PyInstaller {version} nie jest obsługiwany (znane: {', '.join(f'{m}.x' for m in SUPPORTED_MAJORS)})"
+    original = getattr(utils, "get_code_object", None)
+    if not callable(original):
+        return "brak PyInstaller.building.utils.get_code_object"
+    params = list(inspect.signature(original).parameters)[:2]
+    if params != ["modname", "filename"]:
+        return f"nieoczekiwana sygnatura get_code_object({', '.join(params)})"
+
+    def get_code_object(modname, filename, *args, **kwargs):
+        optimize = args[0] if args else kwargs.get("optimize", -1)
+        if optimize < 0:
+            optimize = sys.flags.optimize
+        if not filename or not filename.endswith(".py"):
+            return original(modname, filename, *args, **kwargs)
+        try:
+            with open(filename, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            return original(modname, filename, *args, **kwargs)
+        path = os.path.join(cache_dir, f"{digest}.opt{optimize}")
+        try:
+            with open(path, "rb") as f:
+                code = marshal.load(f)
+            stats[0] += 1
+            return retarget(code, filename)
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+        code = original(modname, filename, *args, **kwargs)
+        stats[1] += 1
+        try:
+            tmp_path = f"{path}.{os.getpid()}"
+            with open(tmp_path, "wb") as f:
+                marshal.dump(code, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+        return code
+
+    for name in ("PyInstaller.building.utils", "PyInstaller.building.api", "PyInstaller.archive.writers"):
+        try:
+            module = __import__(name, fromlist=["get_code_object"])
+        except ImportError:
+            continue
+        if getattr(module, "get_code_object", None) is original:
+            module.get_code_object = get_code_object
+    return None
+
+
+try:
+    disabled = install()
+except Exception as e:
+    disabled = f"{type(e).__name__}: {e}"
+if disabled:
+    atexit.register(lambda: print(f"WPEC bytecode cache: disabled ({disabled})", flush=True))
+else:
+    atexit.register(lambda: print(f"WPEC bytecode cache: {stats[0]} from cache, {stats[1]} compiled", flush=True))
+from PyInstaller.__main__ import run
+run()
+'''
+
+# Równoległa kompilacja modułów do cache bajtkodu (interpreterem WinPython - zgodny magic)
+BYTECODE_PRECOMPILER = r'''
+import sys, os, json, marshal
+from concurrent.futures import ProcessPoolExecutor
+
+
+def compile_one(job):
+    path, target, optimize = job
+    try:
+        with open(path, "rb") as f:
+            code = compile(f.read(), path, "exec", optimize=optimize)
+        tmp_path = f"{target}.{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            marshal.dump(code, f)
+        os.replace(tmp_path, target)
+    except (OSError, SyntaxError, ValueError):
+        return 0
+    return 1
+
+
+if __name__ == "__main__":
+    with open(sys.argv[1], encoding="utf-8") as f:
+        jobs = json.load(f)
+    with ProcessPoolExecutor(max_workers=int(sys.argv[2])) as pool:
+        print(sum(pool.map(compile_one, jobs, chunksize=32)))
+'''
+BYTECODE_CACHE_RE = re.compile(r"^WPEC bytecode cache: (\d+) from cache, (\d+) compiled")
+BYTECODE_CACHE_DISABLED_RE = re.compile(r"^WPEC bytecode cache: disabled \((.*)\)$")
+
+
+def _normalize_dist_name(name):
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def _parse_requirement_name(requirement):
+    """Nazwa dystrybucji z wymagania; None dla zależności opcjonalnych (extra)"""
+    if ";" in requirement and "extra" in requirement.split(";", 1)[1]:
+        return None
+    match = re.match(r"\s*([A-Za-z0-9][A-Za-z0-9._-]*)", requirement)
+    return _normalize_dist_name(match.group(1)) if match else None
+
+
+def read_distribution(meta_dir):
+    """Czyta metadane jednej dystrybucji z katalogu *.dist-info / *.egg-info"""
+    is_egg = meta_dir.endswith(".egg-info")
+    meta_file = os.path.join(meta_dir, "PKG-INFO" if is_egg else "METADATA")
+    info = {"name": None, "version": None, "requires": [], "top_level": [],
+            "meta_dir": meta_dir}
+    try:
+        with open(meta_file, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if not line.strip():
+                    break
+                key, _, value = line.partition(":")
+                value = value.strip()
+                if key == "Name":
+                    info["name"] = value
+                elif key == "Version":
+                    info["version"] = value
+                elif key == "Requires-Dist":
+                    info["requires"].append(value)
+    except OSError:
+        return None
+    if not info["name"]:
+        return None
+    
+    if is_egg:
+        requires_file = os.path.join(meta_dir, "requires.txt")
+        if os.path.exists(requires_file):
+            with open(requires_file, encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    line = line.strip()
+                    if line.startswith("["):
+                        break  # dalej tylko sekcje extra
+                    if line:
+                        info["requires"].append(line)
+    
+    top_level_file = os.path.join(meta_dir, "top_level.txt")
+    record_file = os.path.join(meta_dir, "RECORD" if not is_egg else "installed-files.txt")
+    top_level = set()
+    if os.path.exists(top_level_file):
+        with open(top_level_file, encoding="utf-8", errors="replace") as f:
+            top_level = {line.strip().split("/")[0] for line in f if line.strip()}
+    elif os.path.exists(record_file):
+        with open(record_file, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                path = line.split(",")[0].strip().replace("\\", "/")
+                first = path.split("/")[0]
+                if not first or first.startswith("..") or first.endswith((".dist-info", ".egg-info")):
+                    continue
+                if first in ("__pycache__", "bin", "Scripts") or first.endswith(".pth"):
+                    continue
+                name = first.split(".")[0]
+                if name.isidentifier():
+                    top_level.add(name)
+    info["top_level"] = sorted(top_level)
+    return info
+
+
+def read_distributions(site_packages):
+    """Słownik {znormalizowana nazwa: metadane} wszystkich dystrybucji w site-packages"""
+    distributions = {}
+    try:
+        names = os.listdir(site_packages)
+    except OSError:
+        return distributions
+    for name in names:
+        if name.endswith((".dist-info", ".egg-info")):
+            info = read_distribution(os.path.join(site_packages, name))
+            if info:
+                distributions[_normalize_dist_name(info["name"])] = info
+    return distributions
+
+
+class PackageInventory:
+    """Spis dystrybucji w site-packages czytany z metadanych w procesie (bez pip).
+
+    Wynik zapamiętany wg mtime katalogu - instalacja, aktualizacja lub usunięcie
+    pakietu zmienia listę katalogów *.dist-info i unieważnia spis.
+    """
+
+    _cache = {}
+    _lock = threading.Lock()
+
+    def __init__(self, site_packages):
+        self.site_packages = site_packages
+
+    @property
+    def distributions(self):
+        """Słownik {znormalizowana nazwa: metadane}, odświeżany po zmianie katalogu"""
+        try:
+            mtime = os.stat(self.site_packages).st_mtime_ns
+        except OSError:
+            return {}
+        key = os.path.normcase(os.path.abspath(self.site_packages))
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and cached[0] == mtime:
+                return cached[1]
+        distributions = read_distributions(self.site_packages)
+        with self._lock:
+            self._cache[key] = (mtime, distributions)
+        return distributions
+
+    def version(self, name):
+        info = self.distributions.get(_normalize_dist_name(name))
+        return info["version"] if info else None
+
+    def satisfies(self, requirement):
+        """True gdy wymaganie (np. 'numpy>=1.24') spełnia zainstalowana wersja"""
+        if any(c in requirement for c in "/\\@") or requirement.strip().startswith("-"):
+            return False  # URL, ścieżka lub opcja pip - decyduje pip
+        name, specifiers = split_requirement(requirement)
+        installed = self.version(name) if name else None
+        if installed is None:
+            return False
+        return not specifiers or version_matches(installed, specifiers)
+
+    def missing(self, requirements):
+        """Wymagania, których nie spełniają zainstalowane pakiety"""
+        return [requirement for requirement in requirements if not self.satisfies(requirement)]
+
+    def find(self, pattern=None):
+        """Lista (nazwa, wersja) posortowana wg nazwy; pattern - fragment nazwy lub wzorzec glob"""
+        pattern = pattern.lower() if pattern else None
+        result = []
+        for key, info in self.distributions.items():
+            if pattern:
+                names = (key, info["name"].lower())
+                if any(c in pattern for c in "*?["):
+                    if not any(fnmatch.fnmatchcase(name, pattern) for name in names):
+                        continue
+                elif not any(pattern in name for name in names):
+                    continue
+            result.append((info["name"], info["version"]))
+        result.sort(key=lambda item: item[0].lower())
+        return result
+
+
+def dependency_closure(distributions, top_level_names):
+    """Nazwy modułów najwyższego poziomu osiągalne przez zależności (Requires-Dist)"""
+    module_to_dist = {}
+    for key, info in distributions.items():
+        for module in info["top_level"]:
+            module_to_dist.setdefault(module, key)
+    
+    pending = [module_to_dist[name] for name in top_level_names if name in module_to_dist]
+    reached = set()
+    while pending:
+        key = pending.pop()
+        if key in reached or key not in distributions:
+            continue
+        reached.add(key)
+        for requirement in distributions[key]["requires"]:
+            dependency = _parse_requirement_name(requirement)
+            if dependency and dependency not in reached:
+                pending.append(dependency)
+    
+    modules = set(top_level_names)
+    for key in reached:
+        modules.update(distributions[key]["top_level"])
+    return modules
+
+
+NATIVE_EXTENSIONS = (".pyd", ".so", ".dll", ".dylib")
+
+
+def site_module_files(site_packages, name):
+    """Pliki modułu najwyższego poziomu w site-packages (pakiet, moduł .py lub rozszerzenie).
+    
+    Pomija __pycache__ i *.pyc; None gdy modułu tam nie ma (biblioteka standardowa).
+    """
+    package_dir = os.path.join(site_packages, name)
+    if os.path.isdir(package_dir):
+        files = []
+        for dirpath, dirnames, filenames in os.walk(package_dir):
+            dirnames[:] = sorted(d for d in dirnames if d != "__pycache__")
+            files += [os.path.join(dirpath, f) for f in sorted(filenames) if not f.endswith(".pyc")]
+        return files
+    module_file = os.path.join(site_packages, f"{name}.py")
+    if os.path.isfile(module_file):
+        return [module_file]
+    extensions = [path for ext in NATIVE_EXTENSIONS
+                  for path in glob.glob(os.path.join(site_packages, glob.escape(name) + "*" + ext))
+                  if os.path.basename(path).split(".")[0] == name]
+    return sorted(extensions) or None
+
+
+def _version_key(version):
+    """Krotka liczb z wersji (bez sufiksów rc/dev/post) do porównań"""
+    parts = []
+    for part in version.strip().split("."):
+        match = re.match(r"\d+", part)
+        if not match:
+            break
+        parts.append(int(match.group()))
+    return tuple(parts)
+
+
+PRERELEASE_RE = re.compile(r"\d[._-]?(a|b|c|rc|alpha|beta|pre|preview|dev)\d*", re.I)
+
+
+def version_matches(version, specifiers):
+    """Sprawdza wersję ze specyfikatorami PEP 440 (packaging, gdy jest zainstalowany).
+    
+    Bez packaging - minimalna obsługa ==, !=, >=, <=, >, <, ~= oraz '.*'. Wersje
+    przedpremierowe (rc, b, dev...) pasują tylko wtedy, gdy specyfikator sam je wymienia.
+    """
+    prereleases = bool(PRERELEASE_RE.search(specifiers))
+    try:
+        from packaging.specifiers import SpecifierSet, InvalidSpecifier
+        from packaging.version import InvalidVersion
+    except ImportError:
+        pass
+    else:
+        try:
+            # Jawnie - domyślne zachowanie różni się między wersjami packaging
+            return SpecifierSet(specifiers).contains(version, prereleases=prereleases)
+        except (InvalidSpecifier, InvalidVersion):
+            return False
+    
+    if PRERELEASE_RE.search(version) and not prereleases:
+        return False
+    current = _version_key(version)
+    for spec in filter(None, (s.strip() for s in specifiers.split(","))):
+        match = re.match(r"(~=|===|==|!=|>=|<=|>|<)\s*(\S+)$", spec)
+        if not match:
+            return False
+        op, target = match.groups()
+        if target.endswith(".*"):
+            prefix = _version_key(target[:-2])
+            equal = current[:len(prefix)] == prefix
+            if (op == "==" and not equal) or (op == "!=" and equal):
+                return False
+            continue
+        wanted = _version_key(target)
+        width = max(len(current), len(wanted))
+        left = current + (0,) * (width - len(current))
+        right = wanted + (0,) * (width - len(wanted))
+        if op == "~=":
+            ok = left >= right and current[:len(wanted) - 1] == wanted[:-1]
+        else:
+            ok = {"==": left == right, "===": version.strip() == target,
+                  "!=": left != right, ">=": left >= right, "<=": left <= right,
+                  ">": left > right, "<": left < right}[op]
+        if not ok:
+            return False
+    return True
+
+
+def split_requirement(requirement):
+    """(nazwa, specyfikatory) z wymagania, bez extras i znaczników środowiska"""
+    requirement = requirement.split(";", 1)[0]
+    match = re.match(r"\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(\[[^\]]*\])?\s*\(?([^)]*)\)?", requirement)
+    if not match:
+        return None, ""
+    return _normalize_dist_name(match.group(1)), match.group(3).strip()
+
+
+PEP723_RE = re.compile(r"(?m)^# /// (?P<type>[a-zA-Z0-9-]+)$\s(?P<content>(^#(| .*)$\s)+)^# ///$")
+
+
+def read_script_requirements(script_path):
+    """Wymagania zadeklarowane w skrypcie (blok metadanych PEP 723 '# /// script')"""
+    try:
+        with open(script_path, encoding="utf-8", errors="replace") as f:
+            source = f.read()
+    except OSError:
+        return {"requires_python": None, "dependencies": []}
+    
+    for match in PEP723_RE.finditer(source):
+        if match.group("type") != "script":
+            continue
+        content = "".join(line[2:] if line.startswith("# ") else line[1:]
+                          for line in match.group("content").splitlines(keepends=True))
+        try:
+            import tomllib
+            data = tomllib.loads(content)
+        except ImportError:
+            # Python < 3.11 - tylko dwa klucze, które są potrzebne
+            data = {}
+            python_match = re.search(r'^requires-python\s*=\s*["\']([^"\']*)["\']', content, re.M)
+            if python_match:
+                data["requires-python"] = python_match.group(1)
+            deps_match = re.search(r"^dependencies\s*=\s*\[(.*?)\]", content, re.M | re.S)
+            if deps_match:
+                data["dependencies"] = re.findall(r'["\']([^"\']+)["\']', deps_match.group(1))
+        except ValueError as e:
+            print(f"⚠️  Błędny blok metadanych skryptu: {e}")
+            data = {}
+        return {"requires_python": data.get("requires-python"),
+                "dependencies": list(data.get("dependencies", []))}
+    return {"requires_python": None, "dependencies": []}
+
+
+def find_python_executables(root):
+    """Interpretery WinPython w katalogu dystrybucji lub w katalogu z wieloma dystrybucjami"""
+    patterns = [
+        os.path.join(root, "python-*", "python.exe"),
+        os.path.join(root, "*", "python-*", "python.exe"),
+    ]
+    found = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            path = os.path.abspath(path)
+            if path not in found:
+                found.append(path)
+    return found
+
+
+# Uruchamiany każdym interpreterem: wersja, architektura i zainstalowane pakiety
+INTERPRETER_PROBE = r"""
+import json, platform, struct, sys
+packages = {}
+try:
+    from importlib import metadata
+    for dist in metadata.distributions():
+        name = dist.metadata["Name"]
+        if name:
+            packages[name] = dist.version
+except Exception:
+    pass
+try:
+    import importlib.util
+    has_pyinstaller = importlib.util.find_spec("PyInstaller") is not None
+except Exception:
+    has_pyinstaller = False
+print(json.dumps({"version": platform.python_version(), "bits": struct.calcsize("P") * 8,
+                  "has_pyinstaller": has_pyinstaller,
+                  "machine": platform.machine(), "implementation": platform.python_implementation(),
+                  "packages": packages}))
+"""
+
+
+class InterpreterIndex:
+    """Indeks interpreterów WinPython pod wspólnym katalogiem, sondowanych równolegle"""
+    
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.path = os.path.join(self.root, CACHE_DIR_NAME, "interpreters.json")
+        self.entries = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _stat_key(python_exe):
+        site_packages = os.path.join(os.path.dirname(python_exe), "Lib", "site-packages")
+        key = []
+        for path in (python_exe, site_packages):
+            try:
+                st = os.stat(path)
+                key.append([st.st_mtime_ns, st.st_size])
+            except OSError:
+                key.append(None)
+        return key
+    
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.entries = json.load(f).get("interpreters", {})
+        except (OSError, ValueError, AttributeError):
+            self.entries = {}
+    
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"root": self.root, "interpreters": self.entries}, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️  Nie udało się zapisać indeksu interpreterów: {e}")
+    
+    def probe(self, python_exe):
+        """Jedno sondowanie interpretera w osobnym procesie"""
+        python_dir = os.path.dirname(python_exe)
+        site_packages = os.path.join(python_dir, "Lib", "site-packages")
+        env = dict(os.environ, PYTHONPATH=site_packages, PYTHONIOENCODING="utf-8")
+        entry = {"python_exe": python_exe, "distribution": os.path.dirname(python_dir),
+                 "key": self._stat_key(python_exe), "ok": False}
+        try:
+            result = subprocess.run([python_exe, "-c", INTERPRETER_PROBE], capture_output=True,
+                                    text=True, encoding="utf-8", errors="replace",
+                                    env=env, timeout=60, check=False)
+            if result.returncode == 0:
+                data = json.loads(result.stdout.strip().splitlines()[-1])
+                packages = {_normalize_dist_name(name): version
+                            for name, version in data.pop("packages").items()}
+                has_pyinstaller = data.pop("has_pyinstaller", False)
+                entry.update(data, ok=True, packages=packages,
+                             pyinstaller=packages.get("pyinstaller") or ("?" if has_pyinstaller else None))
+            else:
+                entry["error"] = result.stderr.strip()[-300:]
+        except (OSError, subprocess.SubprocessError, ValueError, IndexError) as e:
+            entry["error"] = str(e)
+        return entry
+    
+    def refresh(self, force=False, jobs=None):
+        """Sonduje nowe lub zmienione interpretery; pozostałe brane są z indeksu"""
+        self.load()
+        found = find_python_executables(self.root)
+        stale = [exe for exe in found if force or exe not in self.entries
+                 or self.entries[exe].get("key") != self._stat_key(exe)]
+        
+        if stale:
+            print(f"🔍 Sonduję {len(stale)} z {len(found)} interpreterów...")
+            with ThreadPoolExecutor(max_workers=jobs or min(8, len(stale))) as pool:
+                for entry in pool.map(self.probe, stale):
+                    with self._lock:
+                        self.entries[entry["python_exe"]] = entry
+        
+        removed = set(self.entries) - set(found)
+        for exe in removed:
+            del self.entries[exe]
+        if stale or removed:
+            self.save()
+        return [self.entries[exe] for exe in found]
+    
+    @staticmethod
+    def unmet_requirements(entry, requirements):
+        """Lista niespełnionych wymagań skryptu dla danego interpretera"""
+        unmet = []
+        requires_python = requirements.get("requires_python")
+        if requires_python and not version_matches(entry["version"], requires_python):
+            unmet.append(f"python{requires_python}")
+        for requirement in requirements.get("dependencies", []):
+            name, specifiers = split_requirement(requirement)
+            if not name:
+                continue
+            installed = entry["packages"].get(name)
+            if installed is None or (specifiers and not version_matches(installed, specifiers)):
+                unmet.append(requirement)
+        return unmet
+    
+    def best_for(self, requirements, entries):
+        """Najlepszy interpreter: wymagania, PyInstaller, 64 bity, najnowsza wersja"""
+        candidates = [entry for entry in entries if entry.get("ok")]
+        if not candidates:
+            return None, []
+        
+        requires_python = requirements.get("requires_python")
+        
+        def rank(entry):
+            unmet = self.unmet_requirements(entry, requirements)
+            python_ok = not requires_python or version_matches(entry["version"], requires_python)
+            return (python_ok, -len(unmet), entry.get("pyinstaller") is not None,
+                    entry.get("bits") == 64, _version_key(entry["version"]))
+        
+        best = max(candidates, key=rank)
+        return best, self.unmet_requirements(best, requirements)
+
+
+class BuildCache:
+    """Cache zbudowanych EXE/ZIP adresowany hashem wejść kompilacji (LRU)"""
+
+    def __init__(self, cache_dir, max_size_mb=2048):
+        self.cache_dir = cache_dir
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def _read_meta(self, entry_dir):
+        try:
+            with open(os.path.join(entry_dir, "meta.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, entry_dir, meta):
+        tmp_path = os.path.join(entry_dir, f"meta.json.{os.getpid()}.{threading.get_ident()}")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, os.path.join(entry_dir, "meta.json"))
+
+    def entries(self):
+        """Zwraca listę wpisów cache (meta + klucz), najstarsze użycie pierwsze"""
+        result = []
+        if not os.path.isdir(self.cache_dir):
+            return result
+        for key in os.listdir(self.cache_dir):
+            entry_dir = self._entry_dir(key)
+            meta = self._read_meta(entry_dir) if os.path.isdir(entry_dir) else None
+            if meta:
+                meta["key"] = key
+                result.append(meta)
+        result.sort(key=lambda m: m.get("last_used", 0))
+        return result
+
+    def fetch(self, key, output_dir, make_zip=True):
+        """Kopiuje EXE (i ZIP) z cache do output_dir; zwraca (exe, zip) albo None"""
+        entry_dir = self._entry_dir(key)
+        with self._lock:
+            meta = self._read_meta(entry_dir)
+            if not meta:
+                return None
+            cached_exe = os.path.join(entry_dir, meta["exe"])
+            if not os.path.exists(cached_exe):
+                return None
+            meta["last_used"] = time.time()
+            meta["hits"] = meta.get("hits", 0) + 1
+            self._write_meta(entry_dir, meta)
+        
+        exe_path = os.path.join(output_dir, meta["exe"])
+        shutil.copy2(cached_exe, exe_path)
+        zip_path = None
+        if make_zip and meta.get("zip"):
+            cached_zip = os.path.join(entry_dir, meta["zip"])
+            if os.path.exists(cached_zip):
+                zip_path = os.path.join(output_dir, meta["zip"])
+                shutil.copy2(cached_zip, zip_path)
+        return exe_path, zip_path
+
+    def store(self, key, script_path, exe_path, zip_path=None):
+        """Zapisuje wynik kompilacji w cache i przycina cache do limitu"""
+        entry_dir = self._entry_dir(key)
+        tmp_dir = f"{entry_dir}.tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            os.makedirs(tmp_dir, exist_ok=True)
+            shutil.copy2(exe_path, os.path.join(tmp_dir, os.path.basename(exe_path)))
+            size = os.path.getsize(exe_path)
+            if zip_path and os.path.exists(zip_path):
+                shutil.copy2(zip_path, os.path.join(tmp_dir, os.path.basename(zip_path)))
+                size += os.path.getsize(zip_path)
+            now = time.time()
+            self._write_meta(tmp_dir, {
+                "script": os.path.abspath(script_path),
+                "exe": os.path.basename(exe_path),
+                "zip": os.path.basename(zip_path) if zip_path else None,
+                "size": size,
+                "created": now,
+                "last_used": now,
+                "hits": 0,
+            })
+            with self._lock:
+                if os.path.exists(entry_dir):
+                    shutil.rmtree(entry_dir, ignore_errors=True)
+                os.replace(tmp_dir, entry_dir)
+        finally:
+            if os.path.exists(tmp_dir):
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        self.prune()
+
+    def total_size(self):
+        return sum(meta.get("size", 0) for meta in self.entries())
+
+    def prune(self, max_size=None):
+        """Usuwa najdawniej używane wpisy, aż cache zmieści się w limicie"""
+        limit = self.max_size if max_size is None else max_size
+        removed = []
+        with self._lock:
+            entries = self.entries()
+            total = sum(meta.get("size", 0) for meta in entries)
+            for meta in entries:
+                if total <= limit:
+                    break
+                shutil.rmtree(self._entry_dir(meta["key"]), ignore_errors=True)
+                total -= meta.get("size", 0)
+                removed.append(meta)
+        return removed
+
+
+PYINSTALLER_LOG_RE = re.compile(r"^\s*\d+\s+(?P<level>[A-Z]+):\s?(?P<message>.*)$")
+HOOK_NAME_RE = re.compile(r"(hook-[\w.\-]+\.py)")
+
+
+class BuildPhaseTracker:
+    """Dzieli wyjście PyInstaller na fazy (Analysis, hooki, PYZ, PKG, EXE) i mierzy ich czas"""
+
+    MAIN_PHASES = (
+        ("Analysis", ("checking Analysis", "Building Analysis", "Analyzing ")),
+        ("PYZ", ("checking PYZ", "Building PYZ")),
+        ("PKG", ("checking PKG", "Building PKG")),
+        ("EXE", ("checking EXE", "Building EXE")),
+        ("COLLECT", ("checking COLLECT", "Building COLLECT")),
+    )
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self._last = self.start
+        self.main_phase = "Startup"
+        self.phase = "Startup"
+        self.phases = {"Startup": 0.0}
+        self.hooks = {}
+        self._hook = None
+        self.last_message = ""
+        self.warnings = 0
+
+    def _account(self, now):
+        elapsed = now - self._last
+        self.phases[self.phase] = self.phases.get(self.phase, 0.0) + elapsed
+        if self._hook:
+            self.hooks[self._hook] = self.hooks.get(self._hook, 0.0) + elapsed
+        self._last = now
+
+    def feed(self, line, now=None):
+        """Przetwarza linię wyjścia; zwraca nazwę nowej fazy głównej przy jej zmianie"""
+        now = time.perf_counter() if now is None else now
+        self._account(now)
+        
+        match = PYINSTALLER_LOG_RE.match(line)
+        message = match.group("message") if match else line.strip()
+        if match and match.group("level") == "WARNING":
+            self.warnings += 1
+        if message:
+            self.last_message = message
+        
+        previous_main = self.main_phase
+        for phase, markers in self.MAIN_PHASES:
+            if message.startswith(markers):
+                self.main_phase = phase
+                break
+        
+        # Hooki wykonywane są w trakcie analizy - osobna podfaza
+        hook_match = HOOK_NAME_RE.search(message)
+        is_hook = self.main_phase == "Analysis" and "hook" in message.lower()
+        self._hook = hook_match.group(1) if is_hook and hook_match else None
+        self.phase = "Hooks" if is_hook else self.main_phase
+        
+        if self.main_phase != previous_main:
+            return self.main_phase
+        return None
+
+    def finish(self, now=None):
+        self._account(time.perf_counter() if now is None else now)
+        self._hook = None
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def report(self):
+        """Słownik z czasami faz i hooków (najwolniejsze pierwsze)"""
+        return {
+            "total": round(self._last - self.start, 3),
+            "phases": {name: round(seconds, 3) for name, seconds in self.phases.items()},
+            "hooks": [
+                {"hook": name, "seconds": round(seconds, 3)}
+                for name, seconds in sorted(self.hooks.items(), key=lambda item: -item[1])
+            ],
+            "warnings": self.warnings,
+        }
+
+
+ZIP_COMPRESSION_METHODS = {
+    "stored": zipfile.ZIP_STORED,
+    "deflate": zipfile.ZIP_DEFLATED,
+    "lzma": zipfile.ZIP_LZMA,
+    "bzip2": zipfile.ZIP_BZIP2,
+}
+ZIP_CHUNK_SIZE = 1024 * 1024
+ZIP_EPOCH = 315532800  # 1980-01-01 - najwcześniejsza data w formacie ZIP
+
+
+def source_date_epoch():
+    """Znacznik czasu kompilacji powtarzalnej: SOURCE_DATE_EPOCH albo początek epoki ZIP"""
+    try:
+        return max(int(os.environ["SOURCE_DATE_EPOCH"]), ZIP_EPOCH)
+    except (KeyError, ValueError):
+        return ZIP_EPOCH
+
+
+def _zip_info(path, arcname, date_time=None):
+    """ZipInfo pliku; z date_time - stała data i uprawnienia niezależne od systemu plików"""
+    zinfo = zipfile.ZipInfo.from_file(path, arcname)
+    if date_time is not None:
+        zinfo.date_time = date_time
+        zinfo.create_system = 0
+        zinfo.external_attr = 0o100644 << 16
+    return zinfo
+
+
+def file_sha256(path):
+    """SHA-256 pliku liczony porcjami"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(ZIP_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_sha256_sums(sums, manifest_path):
+    """Zapisuje gotowe sumy {nazwa: hash} w formacie sha256sum; zwraca sums"""
+    tmp_path = f"{manifest_path}.{os.getpid()}.{threading.get_ident()}"
+    with open(tmp_path, "w", encoding="utf-8", newline="\n") as f:
+        for name in sorted(sums):
+            f.write(f"{sums[name]} *{name}\n")
+    os.replace(tmp_path, manifest_path)
+    return sums
+
+
+def sample_compressibility(path, samples=8, sample_size=256 * 1024):
+    """Szacuje stopień kompresji pliku na podstawie próbek (1.0 = brak zysku)"""
+    size = os.path.getsize(path)
+    if size == 0:
+        return 1.0
+    raw = compressed = 0
+    with open(path, "rb") as f:
+        step = max(size // samples, sample_size)
+        for offset in range(0, size, step):
+            f.seek(offset)
+            data = f.read(sample_size)
+            raw += len(data)
+            compressed += len(zlib.compress(data, 1))
+    return compressed / raw if raw else 1.0
+
+
+def _deflate_chunk(data, level, zdict, last):
+    """Kompresuje fragment jako surowy strumień deflate (styl pigz)"""
+    if zdict:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+def write_parallel_deflate(zipf, path, arcname, level=6, threads=None, chunk_size=ZIP_CHUNK_SIZE,
+                           date_time=None):
+    """Dopisuje plik do ZIP jako deflate, kompresując fragmenty w wielu wątkach.
+    
+    Każdy fragment to osobny strumień deflate zakończony Z_SYNC_FLUSH (ostatni
+    Z_FINISH), ze słownikiem z końca poprzedniego fragmentu - ich złączenie
+    jest poprawnym strumieniem deflate. Plik czytany jest porcjami, w pamięci
+    jest najwyżej 2 * threads fragmentów. Granice fragmentów nie zależą od
+    liczby wątków, więc wynik jest zawsze taki sam.
+    """
+    threads = threads or os.cpu_count() or 1
+    file_size = os.path.getsize(path)
+    zinfo = _zip_info(path, arcname, date_time)
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    zinfo.file_size = file_size
+    zinfo.compress_size = 0
+    zinfo.CRC = 0
+    zip64 = file_size * 1.05 > zipfile.ZIP64_LIMIT
+    
+    # zipfile nie przyjmuje gotowych danych deflate - nagłówek zapisujemy sami,
+    # tak jak robi to ZipFile.open(..., "w") dla plików z możliwością seek
+    fp = zipf.fp
+    fp.seek(zipf.start_dir)
+    zinfo.header_offset = fp.tell()
+    fp.write(zinfo.FileHeader(zip64))
+    
+    crc = 0
+    compress_size = 0
+    with open(path, "rb") as f, ThreadPoolExecutor(max_workers=threads) as pool:
+        pending = []
+        previous_tail = b""
+        remaining = file_size
+        while True:
+            data = f.read(min(chunk_size, remaining))
+            if remaining and not data:
+                raise RuntimeError(f"Plik zmienił się podczas pakowania: {path}")
+            remaining -= len(data)
+            crc = zlib.crc32(data, crc)
+            pending.append(pool.submit(_deflate_chunk, data, level, previous_tail, remaining == 0))
+            previous_tail = data[-32768:]
+            
+            # Zapis w kolejności fragmentów, okno ograniczone do 2 * threads
+            while pending and (len(pending) >= threads * 2 or remaining == 0):
+                compressed = pending.pop(0).result()
+                fp.write(compressed)
+                compress_size += len(compressed)
+            if remaining == 0:
+                break
+    
+    if not zip64 and compress_size > zipfile.ZIP64_LIMIT:
+        raise RuntimeError("Plik wymaga ZIP64 - przekroczono limit rozmiaru")
+    zinfo.CRC = crc
+    zinfo.compress_size = compress_size
+    end = fp.tell()
+    fp.seek(zinfo.header_offset)
+    fp.write(zinfo.FileHeader(zip64))
+    fp.seek(end)
+    zipf.filelist.append(zinfo)
+    zipf.NameToInfo[zinfo.filename] = zinfo
+    zipf.start_dir = end
+    zipf._didModify = True
+    return zinfo
+
+
+PYI_COOKIE_MAGIC = b"MEI\014\013\012\013\016"
+PYI_COOKIE_FORMAT = "!8sIIii64s"
+PYI_TOC_ENTRY_FORMAT = "!IIIIBc"
+
+
+def read_carchive(exe_path):
+    """Czyta spis treści archiwum CArchive dołączonego przez PyInstaller do EXE.
+    
+    Zwraca (początek_archiwum, lista_wpisów) albo None, gdy to nie jest EXE PyInstaller.
+    """
+    cookie_size = struct.calcsize(PYI_COOKIE_FORMAT)
+    entry_size = struct.calcsize(PYI_TOC_ENTRY_FORMAT)
+    file_size = os.path.getsize(exe_path)
+    with open(exe_path, "rb") as f:
+        # Ciasteczko jest na końcu pliku (lub przed dopisanym podpisem)
+        tail_size = min(file_size, 4 * 1024 * 1024)
+        f.seek(file_size - tail_size)
+        tail = f.read(tail_size)
+        position = tail.rfind(PYI_COOKIE_MAGIC)
+        if position < 0 or position + cookie_size > len(tail):
+            return None
+        cookie_offset = file_size - tail_size + position
+        _, archive_length, toc_offset, toc_length, _, _ = struct.unpack(
+            PYI_COOKIE_FORMAT, tail[position:position + cookie_size])
+        start = cookie_offset + cookie_size - archive_length
+        
+        f.seek(start + toc_offset)
+        toc = f.read(toc_length)
+    
+    entries = []
+    offset = 0
+    while offset + entry_size <= len(toc):
+        entry_length, data_offset, length, ulength, compressed, typecode = struct.unpack(
+            PYI_TOC_ENTRY_FORMAT, toc[offset:offset + entry_size])
+        if entry_length <= 0:
+            break
+        name = toc[offset + entry_size:offset + entry_length].rstrip(b"\0").decode("utf-8", "replace")
+        entries.append({
+            "name": name,
+            "typecode": typecode.decode("ascii", "replace"),
+            "offset": data_offset,
+            "length": length,
+            "ulength": ulength,
+            "compressed": bool(compressed),
+        })
+        offset += entry_length
+    return start, entries
+
+
+def read_pyz_toc(exe_path, pyz_offset):
+    """Czyta spis modułów archiwum PYZ: lista (nazwa_modułu, rozmiar_skompresowany)"""
+    with open(exe_path, "rb") as f:
+        f.seek(pyz_offset)
+        if f.read(4) != b"PYZ\0":
+            return []
+        f.read(4)  # magic pyc
+        toc_offset = struct.unpack("!i", f.read(4))[0]
+        f.seek(pyz_offset + toc_offset)
+        toc = marshal.load(f)
+    if isinstance(toc, dict):
+        toc = toc.items()
+    return [(name, info[2]) for name, info in toc]
+
+
+def exe_size_breakdown(exe_path):
+    """Rozkład rozmiaru EXE: pakiety, moduły rozszerzeń/DLL i pliki danych"""
+    archive = read_carchive(exe_path)
+    if archive is None:
+        return None
+    start, entries = archive
+    
+    packages = {}
+    binaries = []
+    data_files = []
+    
+    def add_package(name, size):
+        packages[name] = packages.get(name, 0) + size
+    
+    def package_of(path):
+        parts = re.split(r"[\\/]", path)
+        return parts[0] if len(parts) > 1 else None
+    
+    for entry in entries:
+        typecode, name, size = entry["typecode"], entry["name"], entry["length"]
+        if typecode in ("z", "Z"):
+            for module, module_size in read_pyz_toc(exe_path, start + entry["offset"]):
+                add_package(module.split(".")[0], module_size)
+        elif typecode == "b":
+            binaries.append({"name": name, "size": size})
+            add_package(package_of(name) or "(runtime)", size)
+        elif typecode == "x":
+            data_files.append({"name": name, "size": size})
+            if name == "base_library.zip":
+                add_package("(stdlib)", size)
+            else:
+                add_package(package_of(name) or "(dane)", size)
+        else:
+            add_package("(bootloader/skrypty)", size)
+    
+    return {
+        "exe": exe_path,
+        "exe_size": os.path.getsize(exe_path),
+        "packages": sorted(({"name": k, "size": v} for k, v in packages.items()),
+                           key=lambda item: -item["size"]),
+        "binaries": sorted(binaries, key=lambda item: -item["size"]),
+        "data_files": sorted(data_files, key=lambda item: -item["size"]),
+    }
+
+
+DELTA_MAGIC = b"WPECDLT1"
+DELTA_HEADER_FORMAT = "!8sIQ32sQ32s"
+DELTA_BLOCK_SIZE = 4096
+ADLER_MOD = 65521
+
+
+DELTA_ROLL_STRIDE = 16          # najdłuższy przeskok (w blokach) po nieudanych przeszukaniach okna
+DELTA_MAX_SIZE = 1024 * 1024 * 1024
+DELTA_TIME_LIMIT = 120.0
+
+
+class DeltaLimitExceeded(Exception):
+    """Łatka pominięta: pliki za duże albo liczenie trwa za długo"""
+
+
+def _delta_ops(old, new, block_size, deadline=None):
+    """Operacje łatki: ("copy", offset, długość) ze starego pliku lub ("add", dane).
+
+    Stary plik dzielony jest na bloki indeksowane sumą Adler-32. Nowy plik
+    sprawdzany jest najpierw całymi blokami (porównania w C), a trafienie
+    rozszerzane blok po bloku. Krok po bajcie z sumą kroczącą obejmuje tylko
+    jedno okno o rozmiarze bloku - znajduje przesunięcie danych, a gdy go nie ma,
+    skan przeskakuje 1, 2, 4... bloki (najwyżej DELTA_ROLL_STRIDE). Koszt
+    w zmienionych obszarach jest więc ograniczony, kosztem nieco większej łatki.
+    """
+    index = {}
+    for offset in range(0, len(old) - block_size + 1, block_size):
+        index.setdefault(zlib.adler32(old[offset:offset + block_size]), []).append(offset)
+
+    ops = []
+
+    def emit_copy(offset, length):
+        if ops and ops[-1][0] == "copy" and ops[-1][1] + ops[-1][2] == offset:
+            ops[-1] = ("copy", ops[-1][1], ops[-1][2] + length)
+        else:
+            ops.append(("copy", offset, length))
+
+    def lookup(weak, pos):
+        candidates = index.get(weak)
+        if candidates:
+            window = new[pos:pos + block_size]
+            for offset in candidates:
+                if old[offset:offset + block_size] == window:
+                    return offset
+        return None
+
+    def roll_search(pos, end):
+        """Szuka bloku starego pliku w oknie [pos, end) nowego pliku; (pozycja, offset) albo None"""
+        weak = zlib.adler32(new[pos:pos + block_size])
+        while True:
+            match = lookup(weak, pos)
+            if match is not None:
+                return pos, match
+            if pos + 1 >= end:
+                return None
+            # Przesunięcie okna o bajt: Adler-32 bez ponownego liczenia całego bloku
+            out_byte, in_byte = new[pos], new[pos + block_size]
+            a = ((weak & 0xFFFF) - out_byte + in_byte) % ADLER_MOD
+            b = ((weak >> 16) - block_size * out_byte + a - 1) % ADLER_MOD
+            weak = (b << 16) | a
+            pos += 1
+
+    size = len(new)
+    pos = literal_start = 0
+    skip = 1
+    while pos + block_size <= size:
+        if deadline is not None and time.monotonic() > deadline:
+            raise DeltaLimitExceeded("przekroczony czas liczenia łatki")
+        found = roll_search(pos, min(pos + block_size + 1, size - block_size + 1))
+        if found is None:
+            pos += block_size * skip
+            skip = min(skip * 2, DELTA_ROLL_STRIDE)
+            continue
+        skip = 1
+        pos, match = found
+        if literal_start < pos:
+            ops.append(("add", new[literal_start:pos]))
+        length = block_size
+        while pos + length + block_size <= size and match + length + block_size <= len(old) \
+                and new[pos + length:pos + length + block_size] == old[match + length:match + length + block_size]:
+            length += block_size
+        emit_copy(match, length)
+        pos += length
+        literal_start = pos
+
+    if literal_start < size:
+        ops.append(("add", new[literal_start:]))
+    return ops
+
+
+@contextmanager
+def _mapped(path):
+    """Plik tylko do odczytu jako mmap (bez wczytywania całości do pamięci)"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapped
+        finally:
+            mapped.close()
+
+
+def create_delta(old_path, new_path, delta_path, block_size=DELTA_BLOCK_SIZE,
+                 max_size=DELTA_MAX_SIZE, time_limit=DELTA_TIME_LIMIT):
+    """Tworzy binarną łatkę old -> new; zwraca statystyki (bajty skopiowane i nowe).
+    
+    DeltaLimitExceeded, gdy któryś plik przekracza max_size albo liczenie trwa
+    dłużej niż time_limit sekund - łatka jest wtedy pomijana.
+    """
+    for path in (old_path, new_path):
+        if max_size and os.path.getsize(path) > max_size:
+            raise DeltaLimitExceeded(f"{os.path.basename(path)} większy niż {max_size / (1024*1024):.0f} MB")
+    deadline = time.monotonic() + time_limit if time_limit else None
+    with _mapped(old_path) as old, _mapped(new_path) as new:
+        ops = _delta_ops(old, new, block_size, deadline)
+        
+        header = struct.pack(DELTA_HEADER_FORMAT, DELTA_MAGIC, block_size,
+                             len(old), hashlib.sha256(old).digest(),
+                             len(new), hashlib.sha256(new).digest())
+        compressor = zlib.compressobj(9)
+        tmp_path = f"{delta_path}.{os.getpid()}.{threading.get_ident()}"
+        copied = added = 0
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            for op in ops:
+                if op[0] == "copy":
+                    f.write(compressor.compress(b"C" + struct.pack("!QQ", op[1], op[2])))
+                    copied += op[2]
+                else:
+                    f.write(compressor.compress(b"A" + struct.pack("!Q", len(op[1])) + op[1]))
+                    added += len(op[1])
+            f.write(compressor.flush())
+        new_size = len(new)
+    os.replace(tmp_path, delta_path)
+    return {"copied": copied, "added": added, "ops": len(ops),
+            "delta_size": os.path.getsize(delta_path), "new_size": new_size}
+
+
+def apply_delta(old_path, delta_path, output_path):
+    """Odtwarza nowy plik z poprzedniego i łatki; ValueError przy niezgodności SHA-256"""
+    header_size = struct.calcsize(DELTA_HEADER_FORMAT)
+    with open(delta_path, "rb") as f:
+        header = f.read(header_size)
+        body = f.read()
+    if len(header) != header_size or not header.startswith(DELTA_MAGIC):
+        raise ValueError(f"To nie jest łatka WinPythonEC: {delta_path}")
+    _, _, old_size, old_sha, new_size, new_sha = struct.unpack(DELTA_HEADER_FORMAT, header)
+
+    stream = zlib.decompress(body)
+    digest = hashlib.sha256()
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    position = written = 0
+    try:
+        # Plik bazowy zmapowany (bez wczytywania); zamknięty przed os.replace - wynik
+        # może nadpisać plik bazowy
+        with _mapped(old_path) as old, open(tmp_path, "wb") as out:
+            if len(old) != old_size or hashlib.sha256(old).digest() != old_sha:
+                raise ValueError(f"Łatka nie pasuje do pliku bazowego: {old_path}")
+            while position < len(stream):
+                kind = stream[position:position + 1]
+                if kind == b"C":
+                    offset, length = struct.unpack_from("!QQ", stream, position + 1)
+                    data = old[offset:offset + length]
+                    position += 17
+                elif kind == b"A":
+                    length, = struct.unpack_from("!Q", stream, position + 1)
+                    data = stream[position + 9:position + 9 + length]
+                    position += 9 + length
+                else:
+                    raise ValueError(f"Uszkodzona łatka: {delta_path}")
+                out.write(data)
+                digest.update(data)
+                written += len(data)
+        if written != new_size or digest.digest() != new_sha:
+            raise ValueError("Wynik łatki ma niezgodną sumę SHA-256")
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return new_sha.hex()
+
+
+SHARED_RUNTIME_DIR = "runtime"
+SHARED_RUNTIME_MANIFEST = "runtime_manifest.json"
+
+
+def _tree_files(root):
+    """Pliki drzewa katalogów (ścieżki bezwzględne, bez dowiązań symbolicznych)"""
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            if not os.path.islink(path):
+                files.append(path)
+    return files
+
+
+def _link_or_copy(source, target):
+    """Zastępuje target twardym dowiązaniem do source; kopiuje, gdy dowiązanie jest niemożliwe.
+    
+    Zwraca True dla dowiązania, False dla kopii.
+    """
+    tmp_path = f"{target}.{os.getpid()}.link"
+    try:
+        os.link(source, tmp_path)
+        linked = True
+    except OSError:
+        shutil.copy2(source, tmp_path)
+        linked = False
+    os.replace(tmp_path, target)
+    return linked
+
+
+def deduplicate_tree(root, app_dirs, store_name=SHARED_RUNTIME_DIR, threads=None):
+    """Deduplikuje identyczne pliki aplikacji onedir do wspólnego katalogu root/store_name.
+    
+    Hashowane są tylko pliki o powtarzającym się rozmiarze. Każda treść występująca
+    więcej niż raz trafia do magazynu jeden raz, a pliki aplikacji stają się twardymi
+    dowiązaniami do niej (kopią, gdy system plików nie obsługuje dowiązań).
+    Zwraca statystyki i mapę {ścieżka względna w root: nazwa pliku w magazynie}.
+    """
+    store = os.path.join(root, store_name)
+    os.makedirs(store, exist_ok=True)
+    by_size = {}
+    total_size = 0
+    for app_dir in app_dirs:
+        for path in _tree_files(app_dir):
+            size = os.path.getsize(path)
+            total_size += size
+            by_size.setdefault(size, []).append(path)
+    candidates = [path for size, paths in by_size.items() if len(paths) > 1 and size > 0
+                  for path in paths]
+    
+    with ThreadPoolExecutor(max_workers=threads or min(8, os.cpu_count() or 1)) as pool:
+        hashes = dict(zip(candidates, pool.map(file_sha256, candidates)))
+    groups = {}
+    for path, digest in hashes.items():
+        groups.setdefault(digest, []).append(path)
+    
+    shared = {}
+    stats = {"files": sum(len(paths) for paths in by_size.values()), "total_size": total_size,
+             "shared_files": 0, "shared_size": 0, "saved_size": 0, "linked": 0, "copied": 0}
+    for digest, paths in sorted(groups.items()):
+        if len(paths) < 2:
+            continue
+        stored_name = f"{digest[:16]}_{os.path.basename(paths[0])}"
+        stored = os.path.join(store, stored_name)
+        if not os.path.exists(stored):
+            _link_or_copy(paths[0], stored)
+        copies = 0
+        for path in paths:
+            if not os.path.samefile(path, stored):
+                if _link_or_copy(stored, path):
+                    stats["linked"] += 1
+                else:
+                    copies += 1
+            shared[os.path.relpath(path, root).replace(os.sep, "/")] = stored_name
+        size = os.path.getsize(stored)
+        stats["copied"] += copies
+        stats["shared_files"] += 1
+        stats["shared_size"] += size
+        stats["saved_size"] += size * max(len(paths) - 1 - copies, 0)
+    
+    # Treści z poprzednich kompilacji, których nie używa już żadna aplikacja
+    stats["pruned"] = 0
+    used = set(shared.values())
+    for name in os.listdir(store):
+        if name not in used:
+            os.remove(os.path.join(store, name))
+            stats["pruned"] += 1
+    stats["map"] = shared
+    return stats
+
+
+PERSISTENT_MAGIC = "WPECPX1"
+PERSISTENT_TRAILER_FORMAT = "<8sQQ"         # znacznik, początek i długość archiwum aplikacji
+PERSISTENT_MANIFEST = ".wpec_manifest"      # w archiwum: "sha256 rozmiar nazwa" każdego pliku
+
+# Launcher trybu --persistent-extract: EXE PyInstaller z archiwum ZIP aplikacji onedir wstawionym
+# przed jego własnym CArchive (ciasteczko bootloadera zostaje na końcu pliku - szukanie jest krótkie).
+# Rozpakowuje aplikację raz do katalogu wersji (hash treści) i uruchamia ją przy kolejnych startach.
+PERSISTENT_LAUNCHER = r'''
+import hashlib, os, sys, shutil, struct, subprocess, tempfile, time, zipfile
+
+MAGIC = "WPECPX1"
+TRAILER_FORMAT = "<8sQQ"
+COOKIE_MAGIC = b"MEI\014\013\012\013\016"
+COOKIE_FORMAT = "!8sIIii64s"
+MANIFEST = ".wpec_manifest"
+FILE_LIST = ".wpec_files"
+
+
+class Window:
+    """Fragment pliku widziany jako osobny plik - archiwum ZIP w środku EXE"""
+
+    def __init__(self, f, start, length):
+        self._f, self._start, self._length, self._pos = f, start, length, 0
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=0):
+        base = {0: 0, 1: self._pos, 2: self._length}[whence]
+        self._pos = max(0, min(self._length, base + offset))
+        return self._pos
+
+    def read(self, n=-1):
+        if n is None or n < 0 or n > self._length - self._pos:
+            n = self._length - self._pos
+        self._f.seek(self._start + self._pos)
+        data = self._f.read(n)
+        self._pos += len(data)
+        return data
+
+    def close(self):
+        pass
+
+
+def payload_location(path):
+    """(początek, długość) archiwum aplikacji - zapisane tuż przed CArchive launchera"""
+    cookie_size = struct.calcsize(COOKIE_FORMAT)
+    trailer_size = struct.calcsize(TRAILER_FORMAT)
+    with open(path, "rb") as f:
+        f.seek(0, 2)
+        size = f.tell()
+        tail_size = min(size, 65536)
+        f.seek(size - tail_size)
+        tail = f.read()
+        position = tail.rfind(COOKIE_MAGIC)
+        if position < 0 or position + cookie_size > len(tail):
+            return None
+        archive_length = struct.unpack(COOKIE_FORMAT, tail[position:position + cookie_size])[1]
+        archive_start = size - tail_size + position + cookie_size - archive_length
+        if archive_start < trailer_size:
+            return None
+        f.seek(archive_start - trailer_size)
+        magic, start, length = struct.unpack(TRAILER_FORMAT, f.read(trailer_size))
+    if magic.rstrip(b"\0") != MAGIC.encode("ascii"):
+        return None
+    return start, length
+
+
+def read_comment(window):
+    """Komentarz archiwum ZIP z jego końca - bez czytania katalogu centralnego"""
+    length = window.seek(0, 2)
+    window.seek(max(0, length - 65557))
+    tail = window.read()
+    position = tail.rfind(b"PK\005\006")
+    if position < 0:
+        return None
+    comment_length = struct.unpack("<H", tail[position + 20:position + 22])[0]
+    return tail[position + 22:position + 22 + comment_length].decode("utf-8", "replace")
+
+
+def is_complete(target):
+    """Szybka kontrola przy starcie: każdy plik ma rozmiar i czas modyfikacji z rozpakowania"""
+    try:
+        with open(os.path.join(target, FILE_LIST), encoding="utf-8") as f:
+            for line in f:
+                size, mtime, name = line.rstrip("\n").split(" ", 2)
+                st = os.stat(os.path.join(target, name))
+                if st.st_size != int(size) or st.st_mtime_ns != int(mtime):
+                    return False
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def extract(window, target):
+    """Rozpakowanie do katalogu tymczasowego, kontrola SHA-256 z manifestu i atomowa zamiana"""
+    staging = f"{target}.tmp{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    with zipfile.ZipFile(window) as archive:
+        manifest = archive.read(MANIFEST).decode("utf-8").splitlines()
+        archive.extractall(staging, [name for name in archive.namelist() if name != MANIFEST])
+    lines = []
+    for entry in manifest:
+        digest, size, name = entry.split(" ", 2)
+        path = os.path.join(staging, name)
+        if os.path.getsize(path) != int(size) or file_sha256(path) != digest:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise OSError(f"Uszkodzony plik po rozpakowaniu: {name}")
+        lines.append(f"{size} {os.stat(path).st_mtime_ns} {name}\n")
+    with open(os.path.join(staging, FILE_LIST), "w", encoding="utf-8") as f:
+        f.writelines(lines)
+    shutil.rmtree(target, ignore_errors=True)
+    try:
+        os.rename(staging, target)
+    except OSError:
+        # Równoległe uruchomienie zdążyło rozpakować tę samą wersję
+        shutil.rmtree(staging, ignore_errors=True)
+        if not is_complete(target):
+            raise
+
+
+def clean_stale(app_dir, current):
+    """Usuwa inne wersje; katalog używany przez działającą aplikację nie da się przemianować"""
+    for name in os.listdir(app_dir):
+        path = os.path.join(app_dir, name)
+        if name == current:
+            continue
+        try:
+            if ".tmp" in name and time.time() - os.path.getmtime(path) < 3600:
+                continue
+            stale = f"{path}.old{os.getpid()}"
+            os.rename(path, stale)
+        except OSError:
+            continue
+        shutil.rmtree(stale, ignore_errors=True)
+
+
+def main():
+    location = payload_location(sys.executable)
+    if location is None:
+        sys.stderr.write("Uszkodzony plik aplikacji (brak archiwum)\n")
+        return 1
+    with open(sys.executable, "rb") as f:
+        window = Window(f, *location)
+        parts = (read_comment(window) or "").split("|")
+        if len(parts) != 3 or parts[0] != MAGIC:
+            sys.stderr.write("Uszkodzony plik aplikacji (brak archiwum)\n")
+            return 1
+        _, app, version = parts
+        base = os.environ.get("WPEC_CACHE_DIR") or os.environ.get("LOCALAPPDATA") or tempfile.gettempdir()
+        app_dir = os.path.join(base, "WinPythonEC", app)
+        target = os.path.join(app_dir, version)
+        if not is_complete(target):
+            os.makedirs(app_dir, exist_ok=True)
+            extract(window, target)
+            clean_stale(app_dir, version)
+    
+    # Aplikacja to osobny program PyInstaller - bez zmiennych środowiskowych tego procesu
+    env = {k: v for k, v in os.environ.items() if not k.startswith("_PYI_") and k != "_MEIPASS2"}
+    env["PYINSTALLER_RESET_ENVIRONMENT"] = "1"
+    process = subprocess.Popen([os.path.join(target, app + ".exe")] + sys.argv[1:], env=env)
+    while True:
+        try:
+            return process.wait()
+        except KeyboardInterrupt:
+            continue  # Ctrl+C dostaje też aplikacja - czekamy na jej zakończenie
+
+
+sys.exit(main())
+'''
+
+def _copy_range(src, dst, start, length, chunk_size=ZIP_CHUNK_SIZE):
+    """Kopiuje length bajtów (None - do końca) z pliku src od pozycji start"""
+    src.seek(start)
+    while length is None or length > 0:
+        chunk = src.read(chunk_size if length is None else min(chunk_size, length))
+        if not chunk:
+            break
+        dst.write(chunk)
+        if length is not None:
+            length -= len(chunk)
+
+
+# Flagi PyInstaller przenoszone na launcher (wygląd i uprawnienia EXE); z wartością lub bez
+LAUNCHER_VALUE_FLAGS = ("--icon", "-i", "--version-file", "--manifest")
+LAUNCHER_SWITCH_FLAGS = ("--windowed", "--noconsole", "-w", "--uac-admin")
+# Moduły niepotrzebne launcherowi - mniej plików rozpakowywanych przy każdym starcie
+LAUNCHER_EXCLUDES = ("lzma", "_lzma", "bz2", "_bz2", "_hashlib", "ssl", "_ssl", "_socket",
+                     "_decimal", "pyexpat", "unicodedata")
+
+
+def launcher_flags(extra_args):
+    """Flagi z extra_args, które dotyczą też launchera (ikona, tryb okienkowy, manifest)"""
+    flags = []
+    args = list(extra_args or [])
+    for i, arg in enumerate(args):
+        name = arg.split("=", 1)[0]
+        if name in LAUNCHER_SWITCH_FLAGS:
+            flags.append(arg)
+        elif name in LAUNCHER_VALUE_FLAGS:
+            flags.append(arg)
+            if "=" not in arg and i + 1 < len(args):
+                flags.append(args[i + 1])
+    return flags
+
+
+IMPORT_TIME_RE = re.compile(r"^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S.*)$")
+
+
+def _percentile(values, percent):
+    """Percentyl z interpolacją liniową (values nie muszą być posortowane)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * percent / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _dir_size(path):
+    """Łączny rozmiar plików w katalogu (rekurencyjnie)"""
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, filename))
+            except OSError:
+                pass
+    return total
+
+
+_target_locks = {}
+_target_locks_guard = threading.Lock()
+
+
+@contextmanager
+def target_lock(*key, waiting_message=None):
+    """Blokada procesu dla celu kompilacji (np. katalog wyjściowy + nazwa EXE).
+    
+    Zadania o tym samym celu dzielą katalog roboczy, spec i pliki wynikowe -
+    wykonują się po kolei; różne cele nadal kompilują się równolegle.
+    """
+    key = tuple(os.path.normcase(str(part)) for part in key)
+    with _target_locks_guard:
+        lock = _target_locks.setdefault(key, threading.Lock())
+    if not lock.acquire(blocking=False):
+        if waiting_message:
+            print(waiting_message)
+        lock.acquire()
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+class WorkDirStore:
+    """Trwałe katalogi robocze PyInstaller (po jednym na skrypt) z limitem miejsca"""
+
+    MARKER = ".last_used"
+
+    def __init__(self, base_dir, budget_mb=4096):
+        self.base_dir = base_dir
+        self.budget = int(budget_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._active = set()
+        os.makedirs(base_dir, exist_ok=True)
+
+    def workdir_for(self, script_path):
+        """Stały katalog roboczy dla skryptu (klucz: pełna ścieżka skryptu)"""
+        script_path = os.path.abspath(script_path)
+        name = os.path.splitext(os.path.basename(script_path))[0]
+        identity = hashlib.sha1(os.path.normcase(script_path).encode("utf-8")).hexdigest()[:12]
+        return os.path.join(self.base_dir, f"{name}-{identity}")
+
+    @contextmanager
+    def acquire(self, script_path):
+        """Rezerwuje katalog roboczy skryptu na czas kompilacji; zwraca (workpath, specpath)"""
+        workdir = self.workdir_for(script_path)
+        # Jeden PyInstaller naraz w katalogu roboczym - kolejne zadanie czeka
+        with target_lock("workdir", workdir,
+                         waiting_message=f"⏳ Katalog roboczy zajęty: {os.path.basename(workdir)} - czekam"):
+            os.makedirs(workdir, exist_ok=True)
+            with self._lock:
+                self._active.add(workdir)
+            try:
+                with open(os.path.join(workdir, self.MARKER), "w", encoding="utf-8") as f:
+                    f.write(os.path.abspath(script_path))
+                yield os.path.join(workdir, "build"), os.path.join(workdir, "spec")
+            finally:
+                with self._lock:
+                    self._active.discard(workdir)
+        self.evict()
+
+    def entries(self):
+        """Zwraca listę (ostatnie_użycie, rozmiar, katalog), najstarsze pierwsze"""
+        result = []
+        for name in os.listdir(self.base_dir):
+            workdir = os.path.join(self.base_dir, name)
+            if not os.path.isdir(workdir) or name.startswith(TRASH_DIR_PREFIX):
+                continue
+            marker = os.path.join(workdir, self.MARKER)
+            last_used = os.path.getmtime(marker if os.path.exists(marker) else workdir)
+            result.append((last_used, _dir_size(workdir), workdir))
+        result.sort()
+        return result
+
+    def evict(self):
+        """Usuwa najdawniej używane katalogi robocze ponad limit miejsca"""
+        removed = []
+        with self._lock:
+            entries = self.entries()
+            total = sum(size for _, size, _ in entries)
+            for _, size, workdir in entries:
+                if total <= self.budget:
+                    break
+                if workdir in self._active:
+                    continue
+                background_deleter().remove(workdir)
+                total -= size
+                removed.append(workdir)
+        for workdir in removed:
+            print(f"🧹 Usunięto stary katalog roboczy: {os.path.basename(workdir)}")
+        return removed
+
+
+# Szacunkowa pamięć analizy PyInstaller: baza + dodatek za każdy ciężki pakiet
+BUILD_BASE_MEMORY_MB = 700
+HEAVY_PACKAGE_MEMORY_MB = 600
+
+
+TRASH_DIR_PREFIX = ".wpec_trash_"
+
+
+class BackgroundDeleter:
+    """Usuwanie katalogów w tle.
+    
+    Katalog od razu zmienia nazwę (jego miejsce jest wolne dla następnej kompilacji),
+    a shutil.rmtree wykonuje wątek w tle. Przed wyjściem z programu (atexit)
+    czekamy na koniec usuwania; pozostałości po przerwanym programie usuwa sweep().
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="wpec-deleter", daemon=True)
+                self._thread.start()
+                atexit.register(self.wait)
+
+    def _run(self):
+        while True:
+            path = self._queue.get()
+            try:
+                shutil.rmtree(path, ignore_errors=True)
+            finally:
+                self._queue.task_done()
+
+    def remove(self, path):
+        """Przenosi katalog z drogi i kolejkuje usunięcie; zwraca ścieżkę usuwaną w tle.
+        
+        Gdy zmiana nazwy się nie uda (np. plik otwarty przez antywirusa), katalog jest
+        usuwany od razu w bieżącym wątku - w tle mógłby skasować pliki następnej
+        kompilacji, która utworzy tę samą ścieżkę. Wtedy zwraca None.
+        """
+        if not os.path.isdir(path):
+            return None
+        path = os.path.abspath(path)
+        trash = os.path.join(os.path.dirname(path),
+                             f"{TRASH_DIR_PREFIX}{os.path.basename(path)}_{os.getpid()}_{next(self._counter)}")
+        try:
+            os.rename(path, trash)
+        except OSError:
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        self._ensure_worker()
+        self._queue.put(trash)
+        return trash
+
+    def sweep(self, parent):
+        """Kolejkuje pozostałości po przerwanych usunięciach w katalogu parent"""
+        try:
+            names = os.listdir(parent)
+        except OSError:
+            return 0
+        leftovers = [os.path.join(parent, name) for name in names
+                     if name.startswith(TRASH_DIR_PREFIX) and os.path.isdir(os.path.join(parent, name))]
+        if leftovers:
+            self._ensure_worker()
+            for path in leftovers:
+                self._queue.put(path)
+        return len(leftovers)
+
+    @property
+    def pending(self):
+        return self._queue.unfinished_tasks
+
+    def wait(self, timeout=None):
+        """Czeka na usunięcie zakolejkowanych katalogów; False po przekroczeniu timeout"""
+        if self.pending:
+            print(f"🧹 Kończę usuwanie plików tymczasowych w tle ({self.pending})...")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.pending:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+
+_background_deleter = BackgroundDeleter()
+
+
+def background_deleter():
+    """Wspólny dla procesu BackgroundDeleter"""
+    return _background_deleter
+
+
+def available_memory_mb():
+    """Wolna pamięć fizyczna w MB albo None, gdy nie da się jej odczytać"""
+    if os.name == "nt":
+        try:
+            import ctypes
+            
+            class MEMORYSTATUSEX(ctypes.Structure):
+                _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                            ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                            ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                            ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                            ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+            
+            status = MEMORYSTATUSEX()
+            status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+            if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+                return status.ullAvailPhys // (1024 * 1024)
+        except (ImportError, AttributeError, OSError):
+            pass
+        return None
+    try:
+        with open("/proc/meminfo", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _proc_tree_samples(root_pid):
+    """Próbki procesu i potomnych z /proc: {pid: (rss, cpu_s, odczyt, zapis)}"""
+    parents = {}
+    stats = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", encoding="ascii", errors="replace") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        parents[int(name)] = int(fields[1])
+        stats[int(name)] = fields
+
+    tree = {root_pid}
+    changed = True
+    while changed:
+        changed = False
+        for pid, ppid in parents.items():
+            if ppid in tree and pid not in tree:
+                tree.add(pid)
+                changed = True
+
+    ticks = os.sysconf("SC_CLK_TCK")
+    page = os.sysconf("SC_PAGE_SIZE")
+    samples = {}
+    for pid in tree:
+        fields = stats.get(pid)
+        if not fields:
+            continue
+        io = {}
+        try:
+            with open(f"/proc/{pid}/io", encoding="ascii") as f:
+                io = dict(line.split(":") for line in f.read().splitlines())
+        except (OSError, ValueError):
+            pass
+        samples[pid] = (int(fields[21]) * page, (int(fields[11]) + int(fields[12])) / ticks,
+                        int(io.get("read_bytes", 0)), int(io.get("write_bytes", 0)))
+    return samples
+
+
+def _win32_process_sample(handle):
+    """Próbka procesu Windows przez WinAPI (bez potomnych): (rss, cpu_s, odczyt, zapis, szczyt_rss)"""
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+    class IO_COUNTERS(ctypes.Structure):
+        _fields_ = [(name, ctypes.c_ulonglong) for name in (
+            "ReadOperationCount", "WriteOperationCount", "OtherOperationCount",
+            "ReadTransferCount", "WriteTransferCount", "OtherTransferCount")]
+
+    kernel32 = ctypes.windll.kernel32
+    memory = PROCESS_MEMORY_COUNTERS()
+    memory.cb = ctypes.sizeof(memory)
+    kernel32.K32GetProcessMemoryInfo(wintypes.HANDLE(handle), ctypes.byref(memory), memory.cb)
+    times = [wintypes.FILETIME() for _ in range(4)]
+    kernel32.GetProcessTimes(wintypes.HANDLE(handle), *[ctypes.byref(t) for t in times])
+    kernel_time, user_time = [(t.dwHighDateTime << 32 | t.dwLowDateTime) / 1e7 for t in times[2:]]
+    io = IO_COUNTERS()
+    kernel32.GetProcessIoCounters(wintypes.HANDLE(handle), ctypes.byref(io))
+    return (memory.WorkingSetSize, kernel_time + user_time, io.ReadTransferCount,
+            io.WriteTransferCount, memory.PeakWorkingSetSize)
+
+
+class ProcessMonitor:
+    """Próbkuje proces kompilacji i jego potomne w tle: czas, CPU, szczytowy RSS, I/O.
+
+    Źródło próbek: psutil (gdy zainstalowany), /proc w Linuksie albo WinAPI dla
+    samego procesu głównego w Windows. Przekroczenie limitu pamięci lub czasu
+    ustawia exceeded i zdarzenie stop, na które reaguje run_streaming.
+    """
+
+    def __init__(self, memory_limit_mb=None, time_limit=None, interval=0.5):
+        self.memory_limit = int(memory_limit_mb * 1024 * 1024) if memory_limit_mb else None
+        self.time_limit = time_limit
+        self.interval = interval
+        self.exceeded = None
+        self.stop_event = threading.Event()
+        self._done = threading.Event()
+        self._process = None
+        self._thread = None
+        self._start = None
+        self._end = None
+        self._totals = {}
+        self._peak_rss = 0
+        self._samples = 0
+        try:
+            import psutil
+            self._psutil = psutil
+            self.sampler = "psutil"
+        except ImportError:
+            self._psutil = None
+            self.sampler = "win32" if os.name == "nt" else (
+                "proc" if os.path.isdir("/proc") else None)
+
+    def _sample(self):
+        """{pid: (rss, cpu_s, odczyt, zapis)} dla drzewa procesów"""
+        pid = self._process.pid
+        if self._psutil:
+            psutil = self._psutil
+            samples = {}
+            try:
+                root = psutil.Process(pid)
+                processes = [root] + root.children(recursive=True)
+            except psutil.Error:
+                return samples
+            for process in processes:
+                try:
+                    with process.oneshot():
+                        cpu = process.cpu_times()
+                        try:
+                            io = process.io_counters()
+                            read, write = io.read_bytes, io.write_bytes
+                        except (psutil.Error, AttributeError):
+                            read = write = 0
+                        samples[process.pid] = (process.memory_info().rss, cpu.user + cpu.system,
+                                                read, write)
+                except psutil.Error:
+                    continue
+            return samples
+        if self.sampler == "proc":
+            return _proc_tree_samples(pid)
+        if self.sampler == "win32":
+            rss, cpu, read, write, peak = _win32_process_sample(self._process._handle)
+            self._peak_rss = max(self._peak_rss, peak)
+            return {pid: (rss, cpu, read, write)}
+        return {}
+
+    def _run(self):
+        while not self._done.is_set():
+            try:
+                samples = self._sample()
+            except (OSError, ValueError, AttributeError):
+                samples = {}
+            if samples:
+                self._samples += 1
+                # Zakończone procesy potomne zostają w sumie z ostatnią próbką
+                self._totals.update(samples)
+                rss = sum(sample[0] for sample in samples.values())
+                self._peak_rss = max(self._peak_rss, rss)
+                if self.memory_limit and rss > self.memory_limit and not self.exceeded:
+                    self.exceeded = "memory"
+                    self.stop_event.set()
+            if self.time_limit and time.perf_counter() - self._start > self.time_limit \
+                    and not self.exceeded:
+                self.exceeded = "time"
+                self.stop_event.set()
+            self._done.wait(self.interval)
+
+    def start(self, process):
+        self._process = process
+        self._start = time.perf_counter()
+        if self.sampler or self.time_limit:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._end = time.perf_counter()
+        self._done.set()
+        if self._thread:
+            self._thread.join()
+        if self.sampler == "win32":
+            # Uchwyt zakończonego procesu nadal podaje łączne CPU, I/O i szczyt pamięci
+            try:
+                rss, cpu, read, write, peak = _win32_process_sample(self._process._handle)
+                self._totals[self._process.pid] = (rss, cpu, read, write)
+                self._peak_rss = max(self._peak_rss, peak)
+            except (OSError, ValueError, AttributeError):
+                pass
+
+    def report(self):
+        """Pomiary: czas, CPU, szczytowy RSS i bajty I/O całego drzewa procesów"""
+        return {
+            "wall_s": round((self._end or time.perf_counter()) - self._start, 3),
+            "cpu_s": round(sum(sample[1] for sample in self._totals.values()), 3),
+            "peak_rss_mb": round(self._peak_rss / (1024 * 1024), 1),
+            "io_read_mb": round(sum(sample[2] for sample in self._totals.values()) / (1024 * 1024), 1),
+            "io_write_mb": round(sum(sample[3] for sample in self._totals.values()) / (1024 * 1024), 1),
+            "processes": len(self._totals),
+            "samples": self._samples,
+            "sampler": self.sampler,
+            "exceeded": self.exceeded,
+        }
+
+
+class ResourceScheduler:
+    """Dopuszcza zadania według wolnych rdzeni i pamięci (rezerwacje szacunkowe).
+
+    Budżet pamięci to wolna pamięć w chwili utworzenia (minus zapas); gdy nic
+    nie działa, zadanie startuje zawsze - nawet większe niż budżet.
+    """
+
+    def __init__(self, max_jobs=None, memory_budget_mb=None, headroom=0.9):
+        self.max_jobs = max(1, max_jobs or os.cpu_count() or 1)
+        if memory_budget_mb is None:
+            free = available_memory_mb()
+            memory_budget_mb = int(free * headroom) if free else None
+        self.memory_budget = memory_budget_mb
+        self.running = 0
+        self.reserved = 0
+        self.peak_running = 0
+        self._condition = threading.Condition()
+
+    def _fits(self, memory_mb):
+        if self.running == 0:
+            return True
+        if self.running >= self.max_jobs:
+            return False
+        return self.memory_budget is None or self.reserved + memory_mb <= self.memory_budget
+
+    def acquire(self, memory_mb=0):
+        """Czeka, aż zwolni się rdzeń i pamięć dla zadania, i rezerwuje je"""
+        with self._condition:
+            self._condition.wait_for(lambda: self._fits(memory_mb))
+            self.running += 1
+            self.reserved += memory_mb
+            self.peak_running = max(self.peak_running, self.running)
+
+    def release(self, memory_mb=0):
+        with self._condition:
+            self.running -= 1
+            self.reserved -= memory_mb
+            self._condition.notify_all()
+
+
+BUILD_ERROR_PATTERNS = (
+    ("missing-module", re.compile(r"No module named '?([\w.]+)'?", re.I),
+     "💡 Brakuje modułów - sprawdź czy wszystkie biblioteki są zainstalowane"),
+    ("permission", re.compile(r"permission|access is denied", re.I),
+     "💡 Problem z uprawnieniami - uruchom jako administrator"),
+    ("recursion", re.compile(r"recursion", re.I),
+     "💡 Problem z rekursją - prawdopodobnie samo-kompilacja"),
+    ("syntax-error", re.compile(r"SyntaxError"),
+     "💡 Błąd składni w skrypcie lub jego module lokalnym"),
+    ("disk-full", re.compile(r"No space left on device|not enough space on the disk", re.I),
+     "💡 Brak miejsca na dysku - zwolnij miejsce lub przytnij cache (--cache-prune)"),
+)
+
+
+def build_error(code, message, hint=None, **extra):
+    """Opis błędu kompilacji: stały kod do porównań, komunikat i podpowiedź"""
+    return dict(extra, code=code, message=message, hint=hint)
+
+
+def classify_build_errors(output):
+    """Błędy rozpoznane w wyjściu PyInstaller (po jednym na rodzaj)"""
+    errors = []
+    for code, pattern, hint in BUILD_ERROR_PATTERNS:
+        matches = [(line, pattern.search(line)) for line in output]
+        matches = [(line, match) for line, match in matches if match]
+        if not matches:
+            continue
+        extra = {}
+        if code == "missing-module":
+            extra["modules"] = sorted({match.group(1) for _, match in matches})
+        errors.append(build_error(code, matches[-1][0].strip()[:300], hint, **extra))
+    return errors
+
+
+class BuildError(RuntimeError):
+    """Błąd API: środowisko WinPython nie nadaje się do kompilacji"""
+
+    def __init__(self, message, log=None):
+        super().__init__(message)
+        self.log = log or []
+
+
+class BuildOptions:
+    """Opcje jednej kompilacji w API (WinPythonCompiler.build); nieznana nazwa to TypeError"""
+
+    DEFAULTS = {
+        "output_dir": None,        # domyślnie <WinPython>/compiled_apps
+        "make_zip": True,
+        "extra_args": None,        # dodatkowe flagi PyInstaller
+        "cache": True,
+        "incremental": False,
+        "analyze_imports": False,
+        "trace_args": None,        # lista argumentów obciążenia włącza --trace-imports
+        "trace_timeout": 300.0,
+        "keep_modules": None,
+        "size_report": False,
+        "size_budget_mb": None,
+        "zip_compression": "auto",
+        "zip_level": None,
+        "zip_threads": None,
+        "reproducible": False,
+        "delta_from": None,
+        "memory_limit_mb": None,
+        "time_limit": None,
+        "verbose": False,
+        "backend": "pyinstaller",  # albo "zipapp" - .pyz dla czystego Pythona
+        "persistent_extract": False,
+        "optimize": 0,             # 1 - bez assert, 2 - także bez docstringów
+        "smoke_test": False,       # test uruchomienia EXE równolegle z pakowaniem
+    }
+
+    def __init__(self, **options):
+        unknown = set(options) - set(self.DEFAULTS)
+        if unknown:
+            raise TypeError(f"Nieznane opcje kompilacji: {', '.join(sorted(unknown))}")
+        for name, default in self.DEFAULTS.items():
+            setattr(self, name, options.get(name, default))
+
+    def __repr__(self):
+        changed = {name: getattr(self, name) for name, default in self.DEFAULTS.items()
+                   if getattr(self, name) != default}
+        return f"BuildOptions({', '.join(f'{k}={v!r}' for k, v in changed.items())})"
+
+
+class BuildResult:
+    """Wynik kompilacji z API: status, artefakty, czasy, rozmiar, zasoby, log i błędy"""
+
+    FIELDS = ("script", "success", "cached", "exe", "zip", "delta", "sha256", "size", "time",
+              "timing", "resources", "returncode", "build_log", "bytecode", "smoke", "errors")
+
+    def __init__(self, data, log):
+        for name in self.FIELDS:
+            setattr(self, name, data.get(name))
+        self.success = bool(self.success)
+        self.cached = bool(self.cached)
+        self.size = self.size or 0
+        self.errors = self.errors or []
+        self.log = log
+
+    @property
+    def error_codes(self):
+        return [error["code"] for error in self.errors]
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS + ("log",)}
+
+    def __repr__(self):
+        return (f"BuildResult(script={self.script!r}, success={self.success}, exe={self.exe!r}, "
+                f"time={self.time or 0:.1f}, errors={self.error_codes})")
+
+
 class WinPythonCompiler:
     def __init__(self):
         self.winpython_root = None
@@ -26,336 +2692,2053 @@ class WinPythonCompiler:
         self.scripts_path = None
         self.site_packages = None
         self.python_path_env = None
+        self.python_version = None
+        self.pyinstaller_version = None
+        self.build_cache = None
+        self.work_dirs = None
+        self.verbose_build = False
+        self.zip_compression = "auto"
+        self.zip_level = None
+        self.zip_threads = None
+        self.analyze_before_build = False
+        self._import_graph = None
+        self.size_report = False
+        self.size_budget_mb = None
+        self.trace_workload = None
+        self.trace_timeout = 300.0
+        self.keep_modules = []
+        self.source_date_epoch = None
+        self.delta_base = None
+        self.build_memory_limit_mb = None
+        self.build_time_limit = None
+        self.extra_pyinstaller_args = []
+        self.bundle_mode = "onefile"
+        self.backend = "pyinstaller"
+        self.persistent_extract = False
+        self.optimize_level = 0
+        self.smoke_test = False
+        self.concurrent_builds = False
+        self._compile_slots = None
+        self._launcher_lock = threading.Lock()
+        self._shared_lock = threading.Lock()
+        
+    def show_menu(self):
+        """Wyświetla menu programu"""
+        print("=" * 70)
+        print("🐍 WinPython EXE Compiler v3.0 - WinPython Edition 🐍")
+        print("=" * 70)
+        print("SPECJALNIE DOSTOSOWANY DO WINPYTHON!")
+        print()
+        print("DZIAŁANIE:")
+        print("• Automatycznie konfiguruje środowisko WinPython")
+        print("• Instaluje PyInstaller w odpowiednim miejscu")
+        print("• Kompiluje skrypty do samodzielnych plików EXE")
+        print("• Wykorzystuje wszystkie biblioteki WinPython")
+        print()
+        print("WYMAGANIA:")
+        print("• WinPython (pobierz z: https://winpython.github.io/)")
+        print("• Podaj ścieżkę do głównego folderu WinPython")
+        print("=" * 70)
+        print()
+
+    def setup_winpython_environment(self, winpython_path, refresh=False, python_exe=None):
+        """Konfiguruje środowisko WinPython (python_exe - interpreter wybrany z indeksu)"""
+        print(f"🔧 Konfiguruję środowisko WinPython...")
+        
+        if not os.path.exists(winpython_path):
+            return False, "Podana ścieżka nie istnieje"
+        
+        self.winpython_root = winpython_path
+        
+        # Szybki start - wyniki poprzedniego sondowania, jeśli środowisko się nie zmieniło
+        if not refresh and self.load_env_fingerprint() and \
+                (python_exe is None or os.path.abspath(self.python_exe) == os.path.abspath(python_exe)):
+            print(f"✅ Python: {self.python_exe}")
+            print(f"✅ Site-packages: {self.site_packages}")
+            os.makedirs(self.scripts_path, exist_ok=True)
+            self.setup_python_environment()
+            print(f"✅ {self.python_version} (odcisk środowiska)")
+            return True, f"WinPython skonfigurowany - {self.python_version}"
+        
+        self.python_exe = None
+        self.python_version = None
+        self.pyinstaller_version = None
+        
+        # Znajdź python.exe
+        python_patterns = [
+            os.path.join(winpython_path, "python-*.*.*.amd64", "python.exe"),
+            os.path.join(winpython_path, "python-*", "python.exe"),
+        ]
+        
+        if python_exe:
+            self.python_exe = python_exe
+        else:
+            for pattern in python_patterns:
+                matches = glob.glob(pattern)
+                if matches:
+                    self.python_exe = matches[0]
+                    break
+        
+        if not self.python_exe:
+            return False, "Nie znaleziono python.exe w WinPython"
+        
+        print(f"✅ Python: {self.python_exe}")
+        
+        # Znajdź Scripts
+        python_dir = os.path.dirname(self.python_exe)
+        self.scripts_path = os.path.join(python_dir, "Scripts")
+        
+        if not os.path.exists(self.scripts_path):
+            os.makedirs(self.scripts_path, exist_ok=True)
+        
+        print(f"✅ Scripts: {self.scripts_path}")
+        
+        # Znajdź site-packages
+        self.site_packages = os.path.join(python_dir, "Lib", "site-packages")
+        if not os.path.exists(self.site_packages):
+            return False, f"Nie znaleziono site-packages: {self.site_packages}"
+        
+        print(f"✅ Site-packages: {self.site_packages}")
         
-    def show_menu(self):
-        """Wyświetla menu programu"""
-        print("=" * 70)
-        print("🐍 WinPython EXE Compiler v3.0 - WinPython Edition 🐍")
-        print("=" * 70)
-        print("SPECJALNIE DOSTOSOWANY DO WINPYTHON!")
-        print()
-        print("DZIAŁANIE:")
-        print("• Automatycznie konfiguruje środowisko WinPython")
-        print("• Instaluje PyInstaller w odpowiednim miejscu")
-        print("• Kompiluje skrypty do samodzielnych plików EXE")
-        print("• Wykorzystuje wszystkie biblioteki WinPython")
-        print()
-        print("WYMAGANIA:")
-        print("• WinPython (pobierz z: https://winpython.github.io/)")
-        print("• Podaj ścieżkę do głównego folderu WinPython")
-        print("=" * 70)
+        # Przygotuj zmienne środowiskowe
+        self.setup_python_environment()
+        
+        # Test Python
+        try:
+            result = subprocess.run([self.python_exe, "--version"], 
+                                  capture_output=True, text=True, 
+                                  env=self.python_path_env, check=False)
+            if result.returncode == 0:
+                version = result.stdout.strip()
+                self.python_version = version
+                self.save_env_fingerprint()
+                print(f"✅ {version}")
+                return True, f"WinPython skonfigurowany - {version}"
+            else:
+                return False, "Python nie odpowiada"
+        except Exception as e:
+            return False, f"Błąd testowania Python: {e}"
+
+    def select_interpreter(self, root, script_path=None, refresh=False, show=False):
+        """Wybiera interpreter z indeksu dystrybucji pod katalogiem root.
+        
+        Zwraca (katalog dystrybucji, python.exe) lub None.
+        """
+        index = InterpreterIndex(root)
+        entries = index.refresh(force=refresh)
+        if not entries:
+            print(f"❌ Nie znaleziono interpreterów WinPython w: {root}")
+            return None
+        
+        requirements = read_script_requirements(script_path) if script_path else {}
+        best, unmet = index.best_for(requirements, entries)
+        
+        if show or len(entries) > 1:
+            print(f"🐍 Interpretery ({len(entries)}):")
+            for entry in entries:
+                marker = "➜" if entry is best else " "
+                if not entry.get("ok"):
+                    print(f"   {marker} ❌ {entry['python_exe']}: {entry.get('error', 'brak odpowiedzi')}")
+                    continue
+                pyinstaller = f"PyInstaller {entry['pyinstaller']}" if entry.get("pyinstaller") else "bez PyInstaller"
+                print(f"   {marker} Python {entry['version']} ({entry.get('bits')}-bit), {pyinstaller}, "
+                      f"{len(entry['packages'])} pakietów - {entry['distribution']}")
+        if best is None:
+            print("❌ Żaden interpreter nie odpowiada")
+            return None
+        
+        if requirements.get("requires_python") or requirements.get("dependencies"):
+            declared = [f"python{requirements['requires_python']}"] if requirements.get("requires_python") else []
+            print(f"📋 Wymagania skryptu: {', '.join(declared + requirements['dependencies'])}")
+        if unmet:
+            print(f"⚠️  Niespełnione przez wybrany interpreter: {', '.join(unmet)}")
+        return best["distribution"], best["python_exe"]
+
+    def _env_fingerprint_path(self):
+        return self.cache_dir("environment.json")
+
+    def _env_stat_key(self):
+        """Klucz odcisku: mtime i rozmiar interpretera oraz site-packages"""
+        key = {}
+        for label, path in (("python_exe", self.python_exe),
+                            ("site_packages", self.site_packages)):
+            st = os.stat(path)
+            key[label] = [st.st_mtime_ns, st.st_size]
+        return key
+
+    def load_env_fingerprint(self):
+        """Wczytuje zapisane wyniki sondowania; True gdy odcisk nadal pasuje"""
+        try:
+            with open(self._env_fingerprint_path(), encoding="utf-8") as f:
+                data = json.load(f)
+            self.python_exe = data["python_exe"]
+            self.scripts_path = data["scripts_path"]
+            self.site_packages = data["site_packages"]
+            if data["key"] != self._env_stat_key() or not data.get("python_version"):
+                return False
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        
+        self.python_version = data["python_version"]
+        self.pyinstaller_version = data.get("pyinstaller_version")
+        return True
+
+    def save_env_fingerprint(self):
+        """Zapisuje wyniki sondowania środowiska na dysku"""
+        try:
+            path = self._env_fingerprint_path()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            data = {
+                "python_exe": self.python_exe,
+                "scripts_path": self.scripts_path,
+                "site_packages": self.site_packages,
+                "python_version": self.python_version,
+                "pyinstaller_version": self.pyinstaller_version,
+                "key": self._env_stat_key(),
+            }
+            tmp_path = f"{path}.{os.getpid()}"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️  Nie udało się zapisać odcisku środowiska: {e}")
+
+    def setup_python_environment(self):
+        """Przygotowuje zmienne środowiskowe dla WinPython"""
+        # Skopiuj obecne środowisko
+        self.python_path_env = os.environ.copy()
+        
+        # Dodaj ścieżki WinPython na początek PATH
+        python_dir = os.path.dirname(self.python_exe)
+        new_paths = [
+            python_dir,  # Folder z python.exe
+            self.scripts_path,  # Folder Scripts
+            self.site_packages,  # Site-packages
+        ]
+        
+        current_path = self.python_path_env.get('PATH', '')
+        new_path = os.pathsep.join(new_paths + [current_path])
+        self.python_path_env['PATH'] = new_path
+        
+        # Ustaw PYTHONPATH
+        self.python_path_env['PYTHONPATH'] = self.site_packages
+        
+        print(f"🔧 Skonfigurowano zmienne środowiskowe")
+
+    def install_pyinstaller_properly(self):
+        """Instaluje PyInstaller w WinPython"""
+        print("📦 Instaluję PyInstaller w WinPython...")
+        
+        try:
+            # Użyj pip z odpowiednimi zmiennymi środowiskowymi
+            cmd = [self.python_exe, "-m", "pip", "install", "pyinstaller", "--upgrade"]
+            
+            print(f"Wykonuję: {' '.join(cmd)}")
+            result = subprocess.run(cmd, 
+                                  capture_output=True, 
+                                  text=True, 
+                                  env=self.python_path_env,
+                                  check=False)
+            
+            if result.returncode == 0:
+                print("✅ PyInstaller zainstalowany")
+                
+                # Sprawdź instalację
+                return self.verify_pyinstaller(refresh=True)
+            else:
+                print(f"❌ Błąd instalacji PyInstaller:")
+                print(f"STDERR: {result.stderr}")
+                return False
+                
+        except Exception as e:
+            print(f"❌ Wyjątek podczas instalacji: {e}")
+            return False
+
+    def verify_pyinstaller(self, refresh=False):
+        """Sprawdza czy PyInstaller działa"""
+        print("🔍 Sprawdzam PyInstaller...")
+        
+        if self.pyinstaller_version and not refresh:
+            print(f"✅ PyInstaller {self.pyinstaller_version} gotowy (odcisk środowiska)")
+            return True
+        self.pyinstaller_version = None
+        
+        try:
+            # Test importu
+            cmd = [self.python_exe, "-c", "import PyInstaller; print('PyInstaller OK')"]
+            result = subprocess.run(cmd, 
+                                  capture_output=True, 
+                                  text=True, 
+                                  env=self.python_path_env,
+                                  check=False)
+            
+            if result.returncode == 0:
+                print("✅ PyInstaller można zaimportować")
+                
+                # Test komendy
+                cmd2 = [self.python_exe, "-m", "PyInstaller", "--version"]
+                result2 = subprocess.run(cmd2, 
+                                       capture_output=True, 
+                                       text=True, 
+                                       env=self.python_path_env,
+                                       check=False)
+                
+                if result2.returncode == 0:
+                    version = result2.stdout.strip()
+                    self.pyinstaller_version = version
+                    self.save_env_fingerprint()
+                    print(f"✅ PyInstaller {version} gotowy")
+                    return True
+                else:
+                    print(f"⚠️  PyInstaller import OK, ale komenda nie działa: {result2.stderr}")
+                    return False
+            else:
+                print(f"❌ Nie można zaimportować PyInstaller: {result.stderr}")
+                return False
+                
+        except Exception as e:
+            print(f"❌ Błąd sprawdzania PyInstaller: {e}")
+            return False
+
+    def package_inventory(self):
+        """Spis pakietów WinPython czytany z metadanych site-packages"""
+        return PackageInventory(self.site_packages)
+
+    def list_packages(self, name_filter=None, limit=10):
+        """Pokazuje zainstalowane pakiety (opcjonalnie tylko pasujące do filtra)"""
+        packages = self.package_inventory().find(name_filter)
+        if name_filter:
+            print(f"📦 Pakiety pasujące do '{name_filter}' ({len(packages)}):")
+        else:
+            print(f"📦 Dostępne pakiety ({len(packages)}):")
+        shown = packages if limit is None else packages[:limit]
+        width = max([len(name) for name, _ in shown] + [10])
+        for name, version in shown:
+            print(f"   {name:<{width}}  {version}")
+        if len(packages) > len(shown):
+            print(f"   ... i {len(packages) - len(shown)} więcej")
         print()
 
-    def setup_winpython_environment(self, winpython_path):
-        """Konfiguruje środowisko WinPython"""
-        print(f"🔧 Konfiguruję środowisko WinPython...")
+    def install_libraries(self, libraries, wheelhouse=None, offline=False):
+        """Instaluje dodatkowe biblioteki (jedno wywołanie resolvera pip)"""
+        if not libraries:
+            return True
+        
+        # Wszystko już zainstalowane w wymaganych wersjach - pip niepotrzebny
+        missing = self.package_inventory().missing(libraries)
+        if not missing:
+            print(f"✅ Biblioteki już zainstalowane: {', '.join(libraries)}")
+            return True
+        
+        print(f"📦 Instaluję biblioteki: {', '.join(libraries)}")
+        
+        if wheelhouse:
+            return self.install_from_wheelhouse(libraries, wheelhouse, offline)
+        
+        cmd = [self.python_exe, "-m", "pip", "install"] + list(libraries)
+        return self._run_pip_install(cmd, libraries)
+
+    def _run_pip_install(self, cmd, libraries):
+        """Uruchamia pojedyncze 'pip install' dla całej listy bibliotek"""
+        try:
+            print(f"Wykonuję: {' '.join(cmd)}")
+            result = subprocess.run(cmd, 
+                                  capture_output=True, 
+                                  text=True, 
+                                  env=self.python_path_env,
+                                  check=False)
+            
+            if result.returncode == 0:
+                for lib in libraries:
+                    print(f"✅ {lib} - zainstalowana")
+                return True
+            else:
+                print(f"❌ Błąd instalacji bibliotek: {result.stderr}")
+                return False
+        except Exception as e:
+            print(f"❌ Błąd instalacji {', '.join(libraries)}: {e}")
+            return False
+
+    @staticmethod
+    def _requested_signature(libraries):
+        """Odcisk listy żądanych bibliotek (niezależny od kolejności)"""
+        normalized = sorted(lib.strip().lower().replace("_", "-") for lib in libraries)
+        return hashlib.sha256("\n".join(normalized).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _pin_from_filename(filename):
+        """Zamienia nazwę pliku wheel/sdist na przypięte wymaganie 'nazwa==wersja'"""
+        if filename.endswith(".whl"):
+            name, version = filename[:-4].split("-")[:2]
+        else:
+            stem = filename
+            for ext in (".tar.gz", ".tar.bz2", ".zip", ".tgz"):
+                if stem.endswith(ext):
+                    stem = stem[:-len(ext)]
+                    break
+            if "-" not in stem:
+                return None
+            name, version = stem.rsplit("-", 1)
+        return f"{name.replace('_', '-').lower()}=={version}"
+
+    def interpreter_tag(self):
+        """Znacznik interpretera dla wheel, np. cp311-win_amd64 (zapamiętany dla python_exe)"""
+        cached = getattr(self, "_interpreter_tag", None)
+        if cached and cached[0] == self.python_exe:
+            return cached[1]
+        code = ("import sys, sysconfig; print('cp%d%d-%s' % (sys.version_info[0], sys.version_info[1], "
+                "sysconfig.get_platform().replace('-', '_').replace('.', '_')))")
+        try:
+            result = subprocess.run([self.python_exe, "-c", code], capture_output=True, text=True,
+                                    env=self.python_path_env, check=False)
+            tag = result.stdout.strip() if result.returncode == 0 else ""
+        except OSError:
+            tag = ""
+        tag = tag or re.sub(r"[^\w.]+", "_", self.python_version or "unknown")
+        self._interpreter_tag = (self.python_exe, tag)
+        return tag
+
+    def install_from_wheelhouse(self, libraries, wheelhouse, offline=False):
+        """Instaluje biblioteki offline z lokalnego wheelhouse według pliku lock.
+        
+        Każdy interpreter ma własny podkatalog (np. cp311-win_amd64) - koła i lock
+        dla jednej wersji Pythona nie pasują do innej (--matrix).
+        """
+        wheelhouse = os.path.join(wheelhouse, self.interpreter_tag())
+        lock_path = os.path.join(wheelhouse, "requirements.lock")
+        signature = self._requested_signature(list(libraries) + [self.interpreter_tag()])
+        header = f"# wpec-requested: {signature}"
+        
+        lock_valid = False
+        if os.path.exists(lock_path):
+            with open(lock_path, encoding="utf-8") as f:
+                lock_valid = f.readline().strip() == header
+        
+        if not lock_valid:
+            if offline:
+                print(f"❌ Brak aktualnego pliku lock w {wheelhouse} (tryb offline)")
+                return False
+            if not self.lock_wheelhouse(libraries, wheelhouse, header):
+                return False
+        else:
+            print(f"🔒 Używam pliku lock: {lock_path}")
+        
+        cmd = [self.python_exe, "-m", "pip", "install",
+               "--no-index", "--find-links", wheelhouse, "-r", lock_path]
+        return self._run_pip_install(cmd, libraries)
+
+    def lock_wheelhouse(self, libraries, wheelhouse, header):
+        """Rozwiązuje zależności raz, pobiera pakiety do wheelhouse i zapisuje lock"""
+        os.makedirs(wheelhouse, exist_ok=True)
+        cmd = [self.python_exe, "-m", "pip", "download", "--dest", wheelhouse] + list(libraries)
+        print(f"📥 Pobieram pakiety do wheelhouse: {wheelhouse}")
+        print(f"Wykonuję: {' '.join(cmd)}")
+        
+        try:
+            result = subprocess.run(cmd, 
+                                  capture_output=True, 
+                                  text=True, 
+                                  env=self.python_path_env,
+                                  check=False)
+        except Exception as e:
+            print(f"❌ Błąd pobierania pakietów: {e}")
+            return False
+        
+        if result.returncode != 0:
+            print(f"❌ Błąd pobierania pakietów: {result.stderr}")
+            return False
+        
+        # pip wypisuje każdy plik należący do rozwiązania - tylko te trafiają do lock
+        pins = set()
+        for line in result.stdout.splitlines():
+            line = line.strip()
+            for prefix in ("Saved ", "File was already downloaded "):
+                if line.startswith(prefix):
+                    pin = self._pin_from_filename(os.path.basename(line[len(prefix):].strip()))
+                    if pin:
+                        pins.add(pin)
+        
+        if not pins:
+            print("❌ Nie udało się ustalić listy pobranych pakietów")
+            return False
+        
+        lock_path = os.path.join(wheelhouse, "requirements.lock")
+        with open(lock_path, "w", encoding="utf-8") as f:
+            f.write(header + "\n")
+            f.write(f"# requested: {' '.join(libraries)}\n")
+            for pin in sorted(pins):
+                f.write(pin + "\n")
+        print(f"🔒 Zapisano plik lock ({len(pins)} pakietów): {lock_path}")
+        return True
+
+    def exe_name_for(self, script_path):
+        """Nazwa EXE (bez rozszerzenia) dla skryptu"""
+        script_name = os.path.splitext(os.path.basename(script_path))[0]
+        return f"{script_name}_compiled"
+
+    def build_flags(self, script_path, extra_args=None):
+        """Flagi PyInstaller wpływające na wynik (bez ścieżek roboczych)"""
+        return [f"--{self.pyinstaller_mode()}", "--name", self.exe_name_for(script_path)] + list(extra_args or [])
+
+    def pyinstaller_mode(self):
+        """Tryb PyInstaller: onedir także dla --persistent-extract (folder pakowany potem do EXE)"""
+        return "onedir" if self.bundle_mode == "onedir" or self.persistent_extract else "onefile"
+
+    def bundle_exe_path(self, output_dir, exe_name):
+        """Ścieżka EXE po kompilacji: plik w output_dir albo w folderze aplikacji (onedir)"""
+        if self.pyinstaller_mode() == "onedir":
+            return os.path.join(output_dir, exe_name, f"{exe_name}.exe")
+        return os.path.join(output_dir, f"{exe_name}.exe")
+
+    def compile_script(self, script_path, output_dir, workpath=None, specpath=None,
+                       extra_args=None, clean=True, cancel_event=None, details=None):
+        """Kompiluje skrypt do EXE.
+        
+        details (słownik) dostaje: zasoby, czasy faz, kod wyjścia, log PyInstaller
+        i sklasyfikowane błędy - to z niego korzysta build_script i API.
+        """
+        details = {} if details is None else details
+        details["errors"] = []
+        print("🔨 Kompilacja do EXE...")
+        
+        exe_name = self.exe_name_for(script_path)
+        
+        # Sprawdź czy to nie samo-kompilacja
+        try:
+            if os.path.abspath(__file__) == os.path.abspath(script_path):
+                print("⚠️  Wykryto samo-kompilację - dodaję '_compiled' do nazwy")
+        except:
+            pass
+        
+        # Komenda PyInstaller
+        cmd = self.pyinstaller_command() + [
+            f"--{self.pyinstaller_mode()}",
+            "--distpath", output_dir,
+            "--workpath", workpath or os.path.join(output_dir, "build"),
+            "--specpath", specpath or os.path.join(output_dir, "spec"),
+            "--clean" if clean else "--noconfirm",
+            "--name", exe_name,
+        ]
+        if clean and self.pyinstaller_mode() == "onedir":
+            # Folder aplikacji z poprzedniej kompilacji - bez pytania o usunięcie
+            cmd.append("--noconfirm")
+        cmd += list(extra_args or []) + [
+            script_path
+        ]
+        
+        try:
+            print(f"Wykonuję: {' '.join(cmd)}")
+            print("⏳ Kompilacja w toku...")
+            
+            tracker = BuildPhaseTracker()
+            output = []
+            last_progress = [time.perf_counter()]
+            
+            def on_line(line):
+                now = time.perf_counter()
+                if line is not None:
+                    output.append(line)
+                    if self.verbose_build:
+                        print(f"   {line}")
+                    new_phase = tracker.feed(line, now)
+                    if new_phase:
+                        print(f"   ▶ {new_phase} ({tracker.elapsed:.1f}s)")
+                        last_progress[0] = now
+                        return
+                if now - last_progress[0] >= 15:
+                    print(f"   ⏳ {tracker.phase} {tracker.elapsed:.0f}s: {tracker.last_message[:90]}")
+                    last_progress[0] = now
+            
+            # Uruchom z odpowiednim środowiskiem - wyjście czytane na bieżąco
+            monitor = ProcessMonitor(self.build_memory_limit_mb, self.build_time_limit)
+            returncode = self.run_streaming(cmd, on_line, cancel_event, self.build_env(), monitor)
+            tracker.finish()
+            for line in output[-20:]:
+                match = BYTECODE_CACHE_RE.match(line)
+                if match:
+                    details["pyinstaller_cache"] = (int(match.group(1)), int(match.group(2)))
+                match = BYTECODE_CACHE_DISABLED_RE.match(line)
+                if match:
+                    details["pyinstaller_cache_disabled"] = match.group(1)
+                    print(f"⚠️  Cache bajtkodu w PyInstaller wyłączony: {match.group(1)} - moduły kompilowane zwykłą drogą")
+            usage = monitor.report()
+            details.update(resources=usage, timing=tracker.report(), returncode=returncode,
+                           build_log=self.report_path(output_dir, exe_name, "build.log"))
+            if cancel_event is not None and cancel_event.is_set():
+                details["errors"].append(build_error("cancelled", "Kompilacja przerwana"))
+                print("⏹️  Kompilacja przerwana")
+                return None
+            print(f"📈 Zasoby: CPU {usage['cpu_s']:.1f}s / {usage['wall_s']:.1f}s, "
+                  f"szczyt RAM {usage['peak_rss_mb']:.0f} MB, I/O odczyt {usage['io_read_mb']:.0f} MB, "
+                  f"zapis {usage['io_write_mb']:.0f} MB, procesów: {usage['processes']}")
+            self.write_timing_report(tracker, output_dir, exe_name, script_path, returncode, output, usage)
+            
+            if monitor.exceeded == "memory":
+                message = f"Przekroczono limit pamięci ({self.build_memory_limit_mb:.0f} MB)"
+                details["errors"].append(build_error("memory-limit", message))
+                print(f"❌ {message} - kompilacja przerwana")
+                return None
+            if monitor.exceeded == "time":
+                message = f"Przekroczono limit czasu ({self.build_time_limit:.0f}s)"
+                details["errors"].append(build_error("time-limit", message))
+                print(f"❌ {message} - kompilacja przerwana")
+                print(f"   Ostatnia faza: {tracker.phase}: {tracker.last_message[:90]}")
+                return None
+            
+            if returncode == 0:
+                exe_path = self.bundle_exe_path(output_dir, exe_name)
+                if os.path.exists(exe_path) and self.persistent_extract and self.bundle_mode == "onefile":
+                    exe_path = self.pack_persistent(os.path.dirname(exe_path), output_dir, exe_name,
+                                                    extra_args, details)
+                    if exe_path is None:
+                        return None
+                if os.path.exists(exe_path):
+                    size_mb = os.path.getsize(exe_path) / (1024*1024)
+                    print(f"✅ Kompilacja zakończona!")
+                    print(f"📁 EXE: {exe_path}")
+                    print(f"📏 Rozmiar: {size_mb:.1f} MB")
+                    return exe_path
+                else:
+                    details["errors"].append(build_error("no-exe", "Kompilacja OK, ale nie ma pliku EXE"))
+                    print("❌ Kompilacja OK, ale nie ma pliku EXE")
+                    return None
+            else:
+                print("❌ Błąd kompilacji:")
+                for line in output[-40:]:
+                    print(f"   {line}")
+                print(f"📄 Pełny log: {self.report_path(output_dir, exe_name, 'build.log')}")
+                
+                # Analiza błędów
+                errors = classify_build_errors(output)
+                for error in errors:
+                    if error["hint"]:
+                        print(error["hint"])
+                details["errors"] += errors or [build_error(
+                    "pyinstaller-failed", f"PyInstaller zakończył się kodem {returncode}")]
+                
+                return None
+                
+        except Exception as e:
+            details["errors"].append(build_error("exception", str(e)))
+            print(f"❌ Wyjątek podczas kompilacji: {e}")
+            return None
+
+    def persistent_launcher(self, extra_args=None):
+        """EXE launchera --persistent-extract; kompilowany raz i trzymany w cache narzędzia"""
+        flags = launcher_flags(extra_args) + ["--noupx"]
+        for name in LAUNCHER_EXCLUDES:
+            flags += ["--exclude-module", name]
+        digest = hashlib.sha256()
+        for part in (PERSISTENT_LAUNCHER, self.python_version or "", self.pyinstaller_version or "", *flags):
+            digest.update(part.encode("utf-8") + b"\0")
+            if os.path.isfile(part):
+                digest.update(file_sha256(part).encode("ascii"))  # treść ikony/manifestu
+        launcher_dir = self.cache_dir("launchers", digest.hexdigest()[:16])
+        source = os.path.join(launcher_dir, "wpec_launcher.py")
+        exe_path = os.path.join(launcher_dir, f"{self.exe_name_for(source)}.exe")
         
-        if not os.path.exists(winpython_path):
-            return False, "Podana ścieżka nie istnieje"
+        with self._launcher_lock:
+            if os.path.exists(exe_path):
+                return exe_path
+            print("🧩 Kompiluję launcher rozpakowujący (jednorazowo)...")
+            os.makedirs(launcher_dir, exist_ok=True)
+            with open(source, "w", encoding="utf-8") as f:
+                f.write(PERSISTENT_LAUNCHER)
+            worker = copy.copy(self)
+            worker.persistent_extract = False
+            worker.bundle_mode = "onefile"
+            # Bez --clean: launcher_dir jest osobny dla odcisku, a --clean czyściłby wspólny
+            # bincache PyInstaller używany przez równoległe zadania
+            built = worker.compile_script(source, launcher_dir, extra_args=flags, clean=False)
+            for folder in ("build", "spec"):
+                background_deleter().remove(os.path.join(launcher_dir, folder))
+            return built
+
+    def pack_persistent(self, app_dir, output_dir, exe_name, extra_args=None, details=None):
+        """Składa EXE --persistent-extract: launcher + ZIP folderu onedir z wersją (hash treści).
         
-        self.winpython_root = winpython_path
+        Układ pliku: [launcher bez CArchive][ZIP aplikacji][trailer][CArchive launchera],
+        więc bootloader znajduje swoje ciasteczko od razu na końcu pliku. Po starcie
+        launcher rozpakowuje aplikację raz do %LOCALAPPDATA%\\WinPythonEC\\<nazwa>\\<wersja>
+        (SHA-256 każdego pliku sprawdzane z manifestu), a przy kolejnych startach porównuje
+        tylko rozmiary i czasy modyfikacji; starsze wersje usuwa po rozpakowaniu nowej.
+        Narzut ciepłego startu to sam launcher: rozpakowanie jego małego runtime
+        i drugi proces.
+        """
+        details = {} if details is None else details
+        details.setdefault("errors", [])
+        launcher = self.persistent_launcher(extra_args)
+        if launcher is None:
+            details["errors"].append(build_error("launcher-failed", "Nie udało się skompilować launchera"))
+            return None
         
-        # Znajdź python.exe
-        python_patterns = [
-            os.path.join(winpython_path, "python-*.*.*.amd64", "python.exe"),
-            os.path.join(winpython_path, "python-*", "python.exe"),
-        ]
+        print("📦 Pakuję aplikację do EXE z trwałym rozpakowaniem...")
+        start = time.perf_counter()
+        files = _tree_files(app_dir)
+        entries = [(path, os.path.relpath(path, app_dir).replace(os.sep, "/")) for path in files]
+        with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as pool:
+            hashes = list(pool.map(file_sha256, files))
+        digest = hashlib.sha256()
+        for (_, arcname), file_hash in zip(entries, hashes):
+            digest.update(f"{arcname}\0{file_hash}\n".encode("utf-8"))
+        version = digest.hexdigest()[:16]
+        manifest = "".join(f"{file_hash} {os.path.getsize(path)} {arcname}\n"
+                           for (path, arcname), file_hash in zip(entries, hashes))
         
-        for pattern in python_patterns:
-            matches = glob.glob(pattern)
-            if matches:
-                self.python_exe = matches[0]
-                break
+        carchive = read_carchive(launcher)
+        if carchive is None:
+            details["errors"].append(build_error("launcher-failed", "Launcher nie ma archiwum PyInstaller"))
+            print("❌ Launcher nie ma archiwum PyInstaller")
+            return None
+        archive_start = carchive[0]
         
-        if not self.python_exe:
-            return False, "Nie znaleziono python.exe w WinPython"
+        exe_path = os.path.join(output_dir, f"{exe_name}.exe")
+        tmp_path = f"{exe_path}.{os.getpid()}.{threading.get_ident()}"
+        zip_tmp = f"{tmp_path}.zip"
+        try:
+            with zipfile.ZipFile(zip_tmp, "w", zipfile.ZIP_DEFLATED) as zipf:
+                self.add_files_to_zip(zipf, entries)
+                zipf.writestr(PERSISTENT_MANIFEST, manifest)
+                zipf.comment = f"{PERSISTENT_MAGIC}|{exe_name}|{version}".encode("utf-8")
+            with open(tmp_path, "wb") as f, open(launcher, "rb") as src:
+                _copy_range(src, f, 0, archive_start)
+                payload_start = f.tell()
+                with open(zip_tmp, "rb") as payload:
+                    shutil.copyfileobj(payload, f, ZIP_CHUNK_SIZE)
+                f.write(struct.pack(PERSISTENT_TRAILER_FORMAT, PERSISTENT_MAGIC.encode("ascii"),
+                                    payload_start, f.tell() - payload_start))
+                _copy_range(src, f, archive_start, None)
+            os.replace(tmp_path, exe_path)
+        except OSError as e:
+            details["errors"].append(build_error("exception", str(e)))
+            print(f"❌ Błąd pakowania: {e}")
+            return None
+        finally:
+            for path in (tmp_path, zip_tmp):
+                if os.path.exists(path):
+                    os.remove(path)
         
-        print(f"✅ Python: {self.python_exe}")
+        background_deleter().remove(app_dir)
+        print(f"✅ Wersja {version}: {len(entries)} plików, {time.perf_counter() - start:.1f}s "
+              f"(rozpakowanie przy pierwszym starcie, potem z cache)")
+        return exe_path
+
+    def pyinstaller_supports_optimize(self):
+        """PyInstaller 6+ ma --optimize; starsze wersje dziedziczą poziom po interpreterze (-O/-OO)"""
+        match = re.match(r"(\d+)", self.pyinstaller_version or "")
+        return bool(match) and int(match.group(1)) >= 6
+
+    def bytecode_cache_dir(self):
+        """Cache bajtkodu dla wersji interpretera WinPython (magic .pyc zależy od wersji)"""
+        path = self.cache_dir("bytecode", re.sub(r"[^\w.]+", "_", self.python_version or "unknown"))
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def helper_script(self, name, source, area="bytecode"):
+        """Zapisuje skrypt pomocniczy w cache narzędzia (tylko gdy treść się zmieniła)"""
+        path = self.cache_dir(area, name)
+        try:
+            with open(path, encoding="utf-8") as f:
+                if f.read() == source:
+                    return path
+        except OSError:
+            pass
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(source)
+        os.replace(tmp_path, path)
+        return path
+
+    def pyinstaller_command(self):
+        """Początek komendy PyInstaller; z --optimize przez runner z cache bajtkodu"""
+        if not self.optimize_level:
+            return [self.python_exe, "-m", "PyInstaller"]
+        runner = self.helper_script("wpec_pyinstaller_runner.py", PYINSTALLER_RUNNER)
+        interpreter_flags = [] if self.pyinstaller_supports_optimize() else ["-" + "O" * self.optimize_level]
+        return [self.python_exe] + interpreter_flags + [runner, self.bytecode_cache_dir(), str(self.optimize_level)]
+
+    def precompile_bytecode(self, script_path):
+        """Równoległa kompilacja modułów skryptu i jego pakietów z site-packages do cache bajtkodu.
         
-        # Znajdź Scripts
-        python_dir = os.path.dirname(self.python_exe)
-        self.scripts_path = os.path.join(python_dir, "Scripts")
+        Klucz cache to SHA-256 źródła i poziom optymalizacji; poziom 0 liczony jest
+        raz, żeby raport pokazał, ile bajtkodu ubyło. Zwraca statystyki dla raportu.
+        """
+        start = time.perf_counter()
+        graph = self.import_graph().build(script_path)
+        modules = dependency_closure(self.package_inventory().distributions, graph["external"])
+        sources = [os.path.abspath(script_path)] + graph["local"]
+        for name in sorted(modules):
+            sources += [path for path in site_module_files(self.site_packages, name) or []
+                        if path.endswith(".py")]
         
-        if not os.path.exists(self.scripts_path):
-            os.makedirs(self.scripts_path, exist_ok=True)
+        cache = self.bytecode_cache_dir()
+        with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as pool:
+            hashes = list(pool.map(file_sha256, sources))
+        digests = sorted(set(hashes))
+        paths = dict(zip(hashes, sources))
+        levels = sorted({0, self.optimize_level})
+        jobs = [[paths[digest], os.path.join(cache, f"{digest}.opt{level}"), level]
+                for digest in digests for level in levels
+                if not os.path.exists(os.path.join(cache, f"{digest}.opt{level}"))]
         
-        print(f"✅ Scripts: {self.scripts_path}")
+        compiled = 0
+        workers = max(1, min(os.cpu_count() or 1, len(jobs)))
+        if jobs:
+            jobs_file = os.path.join(cache, f"jobs.{os.getpid()}.{threading.get_ident()}.json")
+            try:
+                with open(jobs_file, "w", encoding="utf-8") as f:
+                    json.dump(jobs, f)
+                helper = self.helper_script("wpec_precompile.py", BYTECODE_PRECOMPILER)
+                result = subprocess.run([self.python_exe, helper, jobs_file, str(workers)],
+                                        capture_output=True, text=True, env=self.python_path_env)
+                compiled = int(result.stdout.strip() or 0) if result.returncode == 0 else 0
+                if result.returncode != 0:
+                    print(f"⚠️  Prekompilacja nieudana: {(result.stderr or '').strip()[-200:]}")
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Prekompilacja nieudana: {e}")
+            finally:
+                if os.path.exists(jobs_file):
+                    os.remove(jobs_file)
         
-        # Znajdź site-packages
-        self.site_packages = os.path.join(python_dir, "Lib", "site-packages")
-        if not os.path.exists(self.site_packages):
-            return False, f"Nie znaleziono site-packages: {self.site_packages}"
+        def total(level):
+            size = 0
+            for digest in digests:
+                try:
+                    size += os.path.getsize(os.path.join(cache, f"{digest}.opt{level}"))
+                except OSError:
+                    pass
+            return size
         
-        print(f"✅ Site-packages: {self.site_packages}")
+        stats = {
+            "optimize": self.optimize_level,
+            "modules": len(digests),
+            "compiled": compiled,
+            "cached": len(digests) * len(levels) - len(jobs),
+            "workers": workers,
+            "bytecode_plain": total(0),
+            "bytecode_optimized": total(self.optimize_level),
+            "time": round(time.perf_counter() - start, 3),
+        }
+        print(f"⚡ Prekompilacja -O{'O' if self.optimize_level > 1 else ''}: {stats['modules']} modułów, "
+              f"skompilowano {compiled} ({workers} proc.), z cache {stats['cached']}, {stats['time']:.1f}s")
+        return stats
+
+    def write_bytecode_report(self, stats, exe_path, output_dir):
+        """Raport optymalizacji bajtkodu: ile ubyło bajtkodu modułów i rozmiar EXE"""
+        exe_name = os.path.splitext(os.path.basename(exe_path))[0]
+        plain, optimized = stats["bytecode_plain"], stats["bytecode_optimized"]
+        saved = plain - optimized
+        report = dict(stats, exe=exe_path, exe_size=os.path.getsize(exe_path), saved=saved)
+        lines = [
+            f"Optymalizacja bajtkodu: {exe_name} (poziom {stats['optimize']})",
+            f"Modułów: {stats['modules']} (skompilowano {stats['compiled']}, z cache {stats['cached']})",
+            f"Bajtkod bez optymalizacji: {plain / (1024*1024):>8.2f} MB",
+            f"Bajtkod po optymalizacji:  {optimized / (1024*1024):>8.2f} MB",
+            f"Mniej o:                   {saved / (1024*1024):>8.2f} MB ({saved / max(plain, 1):.1%})",
+            f"EXE:                       {report['exe_size'] / (1024*1024):>8.2f} MB",
+        ]
+        if stats.get("pyinstaller_cache"):
+            hits, misses = stats["pyinstaller_cache"]
+            lines.append(f"PyInstaller: {hits} modułów z cache bajtkodu, {misses} skompilowanych")
+        elif stats.get("pyinstaller_cache_disabled"):
+            lines.append(f"PyInstaller: cache bajtkodu nieużyty ({stats['pyinstaller_cache_disabled']})")
+        else:
+            lines.append("PyInstaller: brak informacji o użyciu cache bajtkodu")
+        report["pyinstaller_cache_used"] = bool(stats.get("pyinstaller_cache"))
+        try:
+            os.makedirs(os.path.join(output_dir, "reports"), exist_ok=True)
+            with open(self.report_path(output_dir, exe_name, "bytecode.json"), "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            with open(self.report_path(output_dir, exe_name, "bytecode.txt"), "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError as e:
+            print(f"⚠️  Nie udało się zapisać raportu bajtkodu: {e}")
+        print(f"📉 Bajtkod: {plain / (1024*1024):.1f} MB → {optimized / (1024*1024):.1f} MB "
+              f"(-{saved / max(plain, 1):.0%}), raport: {self.report_path(output_dir, exe_name, 'bytecode.txt')}")
+        return report
+
+    def build_env(self):
+        """Dodatkowe zmienne środowiskowe PyInstaller (stały seed hashy w trybie powtarzalnym)"""
+        if self.source_date_epoch is None:
+            return None
+        return {"PYTHONHASHSEED": "0", "SOURCE_DATE_EPOCH": str(self.source_date_epoch)}
+
+    def run_streaming(self, cmd, on_line, cancel_event=None, extra_env=None, monitor=None):
+        """Uruchamia proces i przekazuje jego wyjście linia po linii do on_line.
         
-        # Przygotuj zmienne środowiskowe
-        self.setup_python_environment()
+        on_line(None) wywoływane jest cyklicznie, gdy proces nic nie wypisuje.
+        Ustawienie cancel_event kończy proces wraz z procesami potomnymi;
+        to samo robi monitor (ProcessMonitor) po przekroczeniu limitu.
+        """
+        env = dict(self.python_path_env or os.environ)
+        env["PYTHONIOENCODING"] = "utf-8"
+        env.update(extra_env or {})
+        process = subprocess.Popen(cmd,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT,
+                                   text=True,
+                                   encoding="utf-8",
+                                   errors="replace",
+                                   env=env)
+        lines = queue.Queue()
         
-        # Test Python
+        def reader():
+            for line in process.stdout:
+                lines.put(line)
+            lines.put(None)
+        
+        threading.Thread(target=reader, daemon=True).start()
+        if monitor is not None:
+            monitor.start(process)
+        killed = False
         try:
-            result = subprocess.run([self.python_exe, "--version"], 
-                                  capture_output=True, text=True, 
-                                  env=self.python_path_env, check=False)
-            if result.returncode == 0:
-                version = result.stdout.strip()
-                print(f"✅ {version}")
-                return True, f"WinPython skonfigurowany - {version}"
-            else:
-                return False, "Python nie odpowiada"
-        except Exception as e:
-            return False, f"Błąd testowania Python: {e}"
+            while True:
+                stop = (cancel_event is not None and cancel_event.is_set()) or \
+                    (monitor is not None and monitor.stop_event.is_set())
+                if stop and not killed:
+                    self.terminate_process_tree(process)
+                    killed = True
+                try:
+                    line = lines.get(timeout=0.5)
+                except queue.Empty:
+                    on_line(None)
+                    continue
+                if line is None:
+                    break
+                on_line(line.rstrip("\r\n"))
+            return process.wait()
+        finally:
+            if monitor is not None:
+                monitor.stop()
 
-    def setup_python_environment(self):
-        """Przygotowuje zmienne środowiskowe dla WinPython"""
-        # Skopiuj obecne środowisko
-        self.python_path_env = os.environ.copy()
+    def terminate_process_tree(self, process):
+        """Kończy proces i jego procesy potomne"""
+        if process.poll() is not None:
+            return
+        if os.name == "nt":
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)],
+                           capture_output=True, check=False)
+        else:
+            process.kill()
+
+    def report_path(self, output_dir, exe_name, suffix):
+        """Ścieżka pliku raportu w output_dir/reports"""
+        return os.path.join(output_dir, "reports", f"{exe_name}_{suffix}")
+
+    def write_timing_report(self, tracker, output_dir, exe_name, script_path, returncode, output,
+                            resources=None):
+        """Zapisuje raport czasów faz i zasobów (TXT i JSON) oraz pełny log kompilacji"""
+        report = tracker.report()
+        report.update({
+            "exe_name": exe_name,
+            "script": os.path.abspath(script_path),
+            "returncode": returncode,
+            "finished": datetime.datetime.now().isoformat(timespec="seconds"),
+            "resources": resources,
+        })
         
-        # Dodaj ścieżki WinPython na początek PATH
-        python_dir = os.path.dirname(self.python_exe)
-        new_paths = [
-            python_dir,  # Folder z python.exe
-            self.scripts_path,  # Folder Scripts
-            self.site_packages,  # Site-packages
+        lines = [
+            f"Raport czasu kompilacji: {exe_name}",
+            f"Skrypt: {report['script']}",
+            f"Łącznie: {report['total']:.1f} s (kod wyjścia {returncode}, ostrzeżeń: {report['warnings']})",
+            "",
+            "Fazy:",
         ]
+        total = report["total"] or 1.0
+        for name, seconds in report["phases"].items():
+            lines.append(f"  {name:<10} {seconds:>8.2f} s  {seconds / total * 100:>5.1f}%")
+        if report["hooks"]:
+            lines += ["", "Najwolniejsze hooki:"]
+            for hook in report["hooks"][:20]:
+                lines.append(f"  {hook['hook']:<40} {hook['seconds']:>8.2f} s")
+        if resources:
+            lines += ["", f"Zasoby ({resources['sampler'] or 'bez próbkowania'}, próbek: {resources['samples']}):",
+                      f"  CPU:          {resources['cpu_s']:>8.1f} s",
+                      f"  Szczyt RAM:   {resources['peak_rss_mb']:>8.0f} MB",
+                      f"  Odczyt:       {resources['io_read_mb']:>8.0f} MB",
+                      f"  Zapis:        {resources['io_write_mb']:>8.0f} MB",
+                      f"  Procesów:     {resources['processes']:>8}"]
+            if resources["exceeded"]:
+                lines.append(f"  Przekroczony limit: {resources['exceeded']}")
         
-        current_path = self.python_path_env.get('PATH', '')
-        new_path = os.pathsep.join(new_paths + [current_path])
-        self.python_path_env['PATH'] = new_path
+        try:
+            os.makedirs(os.path.join(output_dir, "reports"), exist_ok=True)
+            with open(self.report_path(output_dir, exe_name, "timing.json"), "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            with open(self.report_path(output_dir, exe_name, "timing.txt"), "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            with open(self.report_path(output_dir, exe_name, "build.log"), "w", encoding="utf-8") as f:
+                f.write("\n".join(output) + "\n")
+        except OSError as e:
+            print(f"⚠️  Nie udało się zapisać raportu czasu: {e}")
+            return
         
-        # Ustaw PYTHONPATH
-        self.python_path_env['PYTHONPATH'] = self.site_packages
+        phases = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in report["phases"].items())
+        print(f"⏱️  Fazy: {phases}")
+        print(f"📄 Raport czasu: {self.report_path(output_dir, exe_name, 'timing.txt')}")
+
+    def zipapp_sources(self, script_path):
+        """Pliki aplikacji zipapp [(ścieżka, nazwa w archiwum)] i lista skompilowanych rozszerzeń"""
+        script_path = os.path.abspath(script_path)
+        root = os.path.dirname(script_path)
+        graph = self.import_graph().build(script_path)
+        entries = [(script_path, "__main__.py")]
+        for path in graph["local"]:
+            entries.append((path, os.path.relpath(path, root).replace(os.sep, "/")))
         
-        print(f"🔧 Skonfigurowano zmienne środowiskowe")
+        native = []
+        modules = dependency_closure(self.package_inventory().distributions, graph["external"])
+        for name in sorted(modules):
+            files = site_module_files(self.site_packages, name)
+            if files is None:
+                # Biblioteka standardowa albo rozszerzenie leżące obok skryptu
+                local = site_module_files(root, name) or []
+                native += [os.path.relpath(p, root) for p in local if p.endswith(NATIVE_EXTENSIONS)]
+                continue
+            for path in files:
+                arcname = os.path.relpath(path, self.site_packages).replace(os.sep, "/")
+                if path.endswith(NATIVE_EXTENSIONS):
+                    native.append(arcname)
+                entries.append((path, arcname))
+        
+        unique = {}
+        for path, arcname in entries:
+            unique.setdefault(arcname, path)
+        return [(path, arcname) for arcname, path in unique.items()], native
 
-    def install_pyinstaller_properly(self):
-        """Instaluje PyInstaller w WinPython"""
-        print("📦 Instaluję PyInstaller w WinPython...")
+    def build_zipapp(self, script_path, output_dir, details=None):
+        """Backend zipapp: skrypt, moduły lokalne i czyste pakiety Python w jednym .pyz.
+        
+        Bez analizy PyInstaller - kompilacja trwa sekundy. Obok .pyz powstaje launcher
+        .cmd uruchamiający aplikację interpreterem WinPython. Skompilowane rozszerzenia
+        (.pyd/.dll) nie działają z archiwum ZIP - wtedy kompilacja jest odrzucana.
+        """
+        details = {} if details is None else details
+        details["errors"] = []
+        print("🐍 Backend zipapp (bez PyInstaller)...")
+        exe_name = self.exe_name_for(script_path)
+        start = time.perf_counter()
+        entries, native = self.zipapp_sources(script_path)
+        scan_time = time.perf_counter() - start
+        if native:
+            listed = ", ".join(native[:5]) + (f" i {len(native) - 5} innych" if len(native) > 5 else "")
+            message = f"Backend zipapp nie obsługuje skompilowanych rozszerzeń: {listed}"
+            hint = "💡 Ten skrypt kompiluj przez PyInstaller (bez --zipapp)"
+            details["errors"].append(build_error("native-extensions", message, hint, files=native))
+            print(f"❌ {message}")
+            print(hint)
+            return None
         
+        pyz_path = os.path.join(output_dir, f"{exe_name}.pyz")
+        tmp_path = f"{pyz_path}.{os.getpid()}.{threading.get_ident()}"
         try:
-            # Użyj pip z odpowiednimi zmiennymi środowiskowymi
-            cmd = [self.python_exe, "-m", "pip", "install", "pyinstaller", "--upgrade"]
-            
-            print(f"Wykonuję: {' '.join(cmd)}")
-            result = subprocess.run(cmd, 
-                                  capture_output=True, 
-                                  text=True, 
-                                  env=self.python_path_env,
-                                  check=False)
+            with open(tmp_path, "wb") as f:
+                f.write(b"#!/usr/bin/env python3\n")
+                with zipfile.ZipFile(f, "w", zipfile.ZIP_DEFLATED) as zipf:
+                    self.add_files_to_zip(zipf, entries)
+            os.replace(tmp_path, pyz_path)
+            launcher = self.write_zipapp_launcher(pyz_path)
+        except OSError as e:
+            details["errors"].append(build_error("exception", str(e)))
+            print(f"❌ Błąd tworzenia zipapp: {e}")
+            return None
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        
+        total = time.perf_counter() - start
+        details.update(returncode=0, timing={
+            "total": round(total, 3),
+            "phases": {"Analysis": round(scan_time, 3), "Archive": round(total - scan_time, 3)},
+            "hooks": [],
+            "warnings": 0,
+        })
+        print(f"✅ Zipapp gotowy: {len(entries)} plików, {os.path.getsize(pyz_path) / (1024*1024):.1f} MB, "
+              f"{total:.1f}s")
+        print(f"📁 PYZ: {pyz_path}")
+        print(f"🚀 Launcher: {launcher}")
+        return pyz_path
+
+    def write_zipapp_launcher(self, pyz_path):
+        """Launcher .cmd: interpreter WinPython względem folderu launchera, a gdy go brak - python z PATH"""
+        folder = os.path.dirname(os.path.abspath(pyz_path))
+        try:
+            python = "%~dp0" + os.path.relpath(self.python_exe, folder)
+        except ValueError:
+            python = os.path.abspath(self.python_exe)  # inny dysk
+        python = python.replace("/", "\\")
+        launcher = os.path.splitext(pyz_path)[0] + ".cmd"
+        lines = [
+            "@echo off",
+            f'set "PYTHON={python}"',
+            'if not exist "%PYTHON%" set "PYTHON=python"',
+            f'"%PYTHON%" "%~dp0{os.path.basename(pyz_path)}" %*',
+            "exit /b %ERRORLEVEL%",
+        ]
+        with open(launcher, "w", encoding="utf-8", newline="\r\n") as f:
+            f.write("\n".join(lines) + "\n")
+        return launcher
+
+    def create_package(self, exe_path, output_dir, launcher=None):
+        """Tworzy pakiet ZIP (z launcherem - aplikacja zipapp uruchamiana interpreterem WinPython)"""
+        if not exe_path or not os.path.exists(exe_path):
+            return None
             
-            if result.returncode == 0:
-                print("✅ PyInstaller zainstalowany")
-                
-                # Sprawdź instalację
-                return self.verify_pyinstaller()
-            else:
-                print(f"❌ Błąd instalacji PyInstaller:")
-                print(f"STDERR: {result.stderr}")
-                return False
+        exe_name = os.path.splitext(os.path.basename(exe_path))[0]
+        zip_path = os.path.join(output_dir, f"{exe_name}_package.zip")
+        date_time = self.zip_date_time()
+        if date_time:
+            built = datetime.datetime(*date_time)
+        else:
+            built = datetime.datetime.now()
+        
+        try:
+            print("📦 Tworzę pakiet ZIP...")
+            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                self.add_to_zip(zipf, exe_path, os.path.basename(exe_path))
+                if launcher:
+                    self.add_to_zip(zipf, launcher, os.path.basename(launcher))
+                    requirements = ("Interpreter WinPython - launcher szuka go względem swojego folderu,\n"
+                                    "a gdy go nie znajdzie, używa python z PATH")
+                else:
+                    requirements = "Brak - aplikacja jest samodzielna"
                 
+                readme = f"""
+{exe_name} - Aplikacja Python
+
+Skompilowano: {built.strftime('%Y-%m-%d %H:%M:%S')}
+Kompilator: WinPython EXE Compiler v3.0
+Rozmiar: {os.path.getsize(exe_path) / (1024*1024):.1f} MB
+
+URUCHOMIENIE:
+Uruchom plik {os.path.basename(launcher or exe_path)}
+
+WYMAGANIA:
+{requirements}
+"""
+                if date_time:
+                    readme_info = zipfile.ZipInfo("README.txt", date_time)
+                    readme_info.compress_type = zipfile.ZIP_DEFLATED
+                    readme_info.external_attr = 0o100644 << 16
+                    zipf.writestr(readme_info, readme)
+                else:
+                    zipf.writestr("README.txt", readme)
+            
+            print(f"✅ Pakiet: {zip_path}")
+            return zip_path
+            
         except Exception as e:
-            print(f"❌ Wyjątek podczas instalacji: {e}")
-            return False
+            print(f"❌ Błąd tworzenia pakietu: {e}")
+            return None
 
-    def verify_pyinstaller(self):
-        """Sprawdza czy PyInstaller działa"""
-        print("🔍 Sprawdzam PyInstaller...")
+    def choose_compression(self, path):
+        """Ustala metodę i poziom kompresji pliku; 'auto' sprawdza próbki pliku"""
+        method = self.zip_compression or "auto"
+        level = self.zip_level
+        if method == "auto":
+            ratio = sample_compressibility(path)
+            if ratio > 0.95:
+                print(f"🔍 Plik słabo się kompresuje ({ratio:.0%}) - zapis bez kompresji")
+                return "stored", None
+            method = "deflate"
+        if method == "deflate" and level is None:
+            level = 6
+        return method, level
+
+    def zip_date_time(self):
+        """Stała data wpisów ZIP w trybie powtarzalnym (UTC), inaczej None"""
+        if self.source_date_epoch is None:
+            return None
+        return time.gmtime(self.source_date_epoch)[:6]
+
+    def add_to_zip(self, zipf, path, arcname):
+        """Dodaje plik do archiwum wybraną metodą kompresji (strumieniowo)"""
+        method, level = self.choose_compression(path)
+        date_time = self.zip_date_time()
+        start = time.perf_counter()
+        if method == "deflate":
+            threads = self.zip_threads or os.cpu_count() or 1
+            write_parallel_deflate(zipf, path, arcname, level, threads, date_time=date_time)
+            label = f"deflate-{level}, wątków: {threads}"
+        elif date_time:
+            zinfo = _zip_info(path, arcname, date_time)
+            zinfo.compress_type = ZIP_COMPRESSION_METHODS[method]
+            zinfo._compresslevel = level
+            with open(path, "rb") as src, zipf.open(zinfo, "w") as dst:
+                shutil.copyfileobj(src, dst, ZIP_CHUNK_SIZE)
+            label = method if level is None else f"{method}-{level}"
+        else:
+            zipf.write(path, arcname, compress_type=ZIP_COMPRESSION_METHODS[method],
+                       compresslevel=level)
+            label = method if level is None else f"{method}-{level}"
+        
+        zinfo = zipf.getinfo(arcname)
+        ratio = zinfo.compress_size / zinfo.file_size if zinfo.file_size else 1.0
+        print(f"   {arcname}: {label}, {ratio:.0%} rozmiaru, {time.perf_counter() - start:.1f}s")
+        return zinfo
+
+    def add_files_to_zip(self, zipf, entries):
+        """Dodaje wiele plików [(ścieżka, nazwa)] metodą deflate, bez komunikatów dla każdego pliku"""
+        date_time = self.zip_date_time()
+        level = self.zip_level if self.zip_level is not None else 6
+        for path, arcname in entries:
+            zinfo = _zip_info(path, arcname, date_time)
+            zinfo.compress_type = zipfile.ZIP_DEFLATED
+            zinfo._compresslevel = level
+            with open(path, "rb") as src, zipf.open(zinfo, "w") as dst:
+                shutil.copyfileobj(src, dst, ZIP_CHUNK_SIZE)
+
+    def collect_scripts(self, items, manifest=None):
+        """Zbiera listę skryptów z ścieżek, wzorców glob i pliku manifestu"""
+        entries = []
+        for item in items or []:
+            entries.append((item, os.getcwd()))
+        
+        if manifest:
+            if not os.path.exists(manifest):
+                print(f"❌ Manifest nie istnieje: {manifest}")
+                return None
+            base_dir = os.path.dirname(os.path.abspath(manifest))
+            with open(manifest, encoding="utf-8") as f:
+                for line in f:
+                    line = line.split("#", 1)[0].strip()
+                    if line:
+                        entries.append((line, base_dir))
+        
+        scripts = []
+        seen = set()
+        for entry, base_dir in entries:
+            pattern = entry if os.path.isabs(entry) else os.path.join(base_dir, entry)
+            if any(c in entry for c in "*?["):
+                matches = sorted(glob.glob(pattern, recursive=True))
+                if not matches:
+                    print(f"⚠️  Wzorzec nic nie dopasował: {entry}")
+            else:
+                matches = [pattern]
+            
+            for match in matches:
+                path = os.path.abspath(match)
+                if path in seen:
+                    continue
+                seen.add(path)
+                if not os.path.exists(path):
+                    print(f"❌ Skrypt nie istnieje: {match}")
+                    return None
+                if not path.lower().endswith('.py'):
+                    print(f"❌ Musi być plik .py: {match}")
+                    return None
+                scripts.append(path)
         
+        # Nazwy EXE muszą być unikalne - wszystkie trafiają do jednego folderu
+        names = {}
+        for path in scripts:
+            name = os.path.splitext(os.path.basename(path))[0].lower()
+            if name in names:
+                print(f"❌ Powtórzona nazwa skryptu: {names[name]} i {path}")
+                return None
+            names[name] = path
+        
+        return scripts
+
+    def cache_dir(self, *parts):
+        """Ścieżka w katalogu cache narzędzia (wewnątrz WinPython)"""
+        return os.path.join(self.winpython_root, CACHE_DIR_NAME, *parts)
+
+    def installed_packages_signature(self):
+        """Lista metadanych pakietów z site-packages (nazwa i wersja w nazwie katalogu)"""
         try:
-            # Test importu
-            cmd = [self.python_exe, "-c", "import PyInstaller; print('PyInstaller OK')"]
-            result = subprocess.run(cmd, 
-                                  capture_output=True, 
-                                  text=True, 
-                                  env=self.python_path_env,
-                                  check=False)
+            return sorted(name for name in os.listdir(self.site_packages)
+                          if name.endswith((".dist-info", ".egg-info", ".egg-link", ".pth")))
+        except OSError:
+            return []
+
+    def build_cache_key(self, script_path, flags):
+        """Hash wszystkich wejść kompilacji: skrypt, moduły lokalne, wersje, pakiety, flagi"""
+        digest = hashlib.sha256()
+        
+        def feed(label, data):
+            if isinstance(data, str):
+                data = data.encode("utf-8")
+            digest.update(label.encode("utf-8") + b"\0" + data + b"\0")
+        
+        with open(script_path, "rb") as f:
+            feed("script", f.read())
+        root = os.path.dirname(os.path.abspath(script_path))
+        for module_path in self.import_graph().build(script_path)["local"]:
+            with open(module_path, "rb") as f:
+                feed("module:" + os.path.relpath(module_path, root).replace(os.sep, "/"), f.read())
+        feed("python", self.python_version or "")
+        feed("pyinstaller", self.pyinstaller_version or "")
+        feed("packages", "\n".join(self.installed_packages_signature()))
+        feed("flags", "\n".join(flags))
+        feed("zip", f"{self.zip_compression}:{self.zip_level}:{self.source_date_epoch}")
+        if self.persistent_extract:
+            feed("launcher", PERSISTENT_LAUNCHER)
+        if self.optimize_level:
+            feed("optimize", str(self.optimize_level))
+        return digest.hexdigest()
+
+    def import_graph(self):
+        """Współdzielony analizator importów z cache na dysku"""
+        if self._import_graph is None:
+            self._import_graph = ImportGraph(self.cache_dir("imports"))
+        return self._import_graph
+
+    def analyze_imports(self, script_path, output_dir=None):
+        """Analiza grafu importów: flagi --hidden-import i --exclude-module dla PyInstaller"""
+        graph = self.import_graph().build(script_path)
+        distributions = self.package_inventory().distributions
+        reached = dependency_closure(distributions, graph["external"])
+        
+        installed = set()
+        for info in distributions.values():
+            installed.update(info["top_level"])
+        excludes = [name for name in HEAVY_PACKAGES
+                    if name in installed and name not in reached]
+        hidden = graph["dynamic"]
+        
+        print(f"🔎 Analiza importów: {len(graph['local'])} modułów lokalnych, "
+              f"{len(graph['external'])} zewnętrznych, {len(reached)} osiągalnych")
+        if hidden:
+            print(f"   --hidden-import: {', '.join(hidden)}")
+        if excludes:
+            print(f"   --exclude-module: {', '.join(excludes)}")
+        
+        args = []
+        for name in hidden:
+            args += ["--hidden-import", name]
+        for name in excludes:
+            args += ["--exclude-module", name]
+        
+        if output_dir:
+            exe_name = self.exe_name_for(script_path)
+            try:
+                os.makedirs(os.path.join(output_dir, "reports"), exist_ok=True)
+                with open(self.report_path(output_dir, exe_name, "imports.json"), "w", encoding="utf-8") as f:
+                    json.dump(dict(graph, reached=sorted(reached), hidden_imports=hidden,
+                                   excludes=excludes), f, indent=2)
+            except OSError as e:
+                print(f"⚠️  Nie udało się zapisać grafu importów: {e}")
+        return args
+
+    def trace_imports(self, script_path, workload_args=None, timeout=300.0):
+        """Uruchamia skrypt z reprezentatywnym obciążeniem i zwraca zbiór załadowanych modułów"""
+        trace_dir = self.cache_dir("trace")
+        os.makedirs(trace_dir, exist_ok=True)
+        # Zapis atomowy - równoległe zadania nie uruchomią niedopisanego pliku
+        tracer_path = self.helper_script("import_tracer.py", IMPORT_TRACER, "trace")
+        output_path = os.path.join(trace_dir, f"{self.exe_name_for(script_path)}.json")
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        
+        cmd = [self.python_exe, tracer_path, output_path, os.path.abspath(script_path)]
+        cmd += list(workload_args or [])
+        print(f"🧭 Śledzenie importów: {os.path.basename(script_path)} {' '.join(workload_args or [])}")
+        
+        # Limit czasu obciążenia - po jego upływie proces jest przerywany
+        deadline = threading.Event()
+        timer = threading.Timer(timeout, deadline.set)
+        timer.start()
+        try:
+            returncode = self.run_streaming(cmd, lambda line: line is not None and print(f"   │ {line}"),
+                                            cancel_event=deadline)
+        finally:
+            timer.cancel()
+        
+        if deadline.is_set():
+            print(f"⚠️  Obciążenie przerwane po {timeout:.0f}s - ślad może być niepełny")
+        elif returncode != 0:
+            print(f"⚠️  Skrypt zakończył się kodem {returncode} - ślad może być niepełny")
+        try:
+            with open(output_path, encoding="utf-8") as f:
+                return set(json.load(f))
+        except (OSError, ValueError):
+            print("❌ Brak śladu importów (proces zakończony przed zapisem)")
+            return None
+
+    def trace_prune(self, script_path, output_dir=None):
+        """Minimalna lista --hidden-import/--exclude-module na podstawie śladu wykonania"""
+        traced = self.trace_imports(script_path, self.trace_workload, self.trace_timeout)
+        if traced is None:
+            return []
+        keep = set(self.keep_modules)
+        loaded_top = {name.split(".")[0] for name in traced}
+        
+        distributions = self.package_inventory().distributions
+        installed = set()
+        for info in distributions.values():
+            installed.update(info["top_level"])
+        
+        # Pakiety dołączane przez zależności statyczne, ale nieużyte w trakcie działania
+        excludes = sorted(name for name in installed | set(PRUNABLE_STDLIB)
+                          if name not in loaded_top and name not in keep
+                          and not name.startswith("_") and name.isidentifier())
+        # Moduły ładowane dynamicznie (niewidoczne w analizie statycznej) i lista wymuszona
+        graph = self.import_graph().build(script_path)
+        static_top = {name.split(".")[0] for name in set(graph["external"]) - set(graph["dynamic"])}
+        hidden = sorted(name for name in loaded_top if name in installed and name not in static_top)
+        hidden += sorted(keep - set(hidden))
+        
+        print(f"🧭 Ślad: {len(traced)} modułów załadowanych, {len(loaded_top)} pakietów najwyższego poziomu")
+        print(f"   --exclude-module: {len(excludes)} nieużywanych pakietów")
+        if hidden:
+            print(f"   --hidden-import: {', '.join(hidden[:10])}"
+                  + (f" (+{len(hidden) - 10})" if len(hidden) > 10 else ""))
+        
+        if output_dir:
+            exe_name = self.exe_name_for(script_path)
+            try:
+                os.makedirs(os.path.join(output_dir, "reports"), exist_ok=True)
+                with open(self.report_path(output_dir, exe_name, "trace.json"), "w", encoding="utf-8") as f:
+                    json.dump({"script": os.path.abspath(script_path),
+                               "workload": list(self.trace_workload or []),
+                               "loaded": sorted(traced), "keep": sorted(keep),
+                               "hidden_imports": hidden, "excludes": excludes}, f, indent=2)
+            except OSError as e:
+                print(f"⚠️  Nie udało się zapisać śladu importów: {e}")
+        
+        args = []
+        for name in hidden:
+            args += ["--hidden-import", name]
+        for name in excludes:
+            args += ["--exclude-module", name]
+        return args
+
+    def build_script(self, script_path, output_dir, make_zip=True, cancel_event=None):
+        """Kompiluje skrypt we własnym katalogu roboczym i tworzy pakiet.
+        
+        Kompilacje tego samego celu (katalog wyjściowy + nazwa EXE - także różne skrypty
+        main.py) dzielą build/spec i pliki wynikowe, więc wykonują się po kolei.
+        """
+        exe_name = self.exe_name_for(script_path)
+        with target_lock("build", os.path.abspath(output_dir), exe_name,
+                         waiting_message=f"⏳ Trwa inna kompilacja {exe_name} w {output_dir} - czekam"):
+            return self._build_script(script_path, output_dir, make_zip, cancel_event)
+
+    def _build_script(self, script_path, output_dir, make_zip=True, cancel_event=None):
+        script_name = os.path.splitext(os.path.basename(script_path))[0]
+        start = time.perf_counter()
+        # Etap kompilacji zajmuje slot (tryb wsadowy); pakowanie i testy po nim już nie,
+        # więc następna kompilacja startuje, zanim poprzednia skończy przetwarzanie końcowe
+        with self._compile_slots or nullcontext():
+            extra_args = []
+            if self.backend == "pyinstaller":
+                if self.analyze_before_build:
+                    extra_args += self.analyze_imports(script_path, output_dir)
+                trace_at = len(extra_args)
+                if self.source_date_epoch is not None:
+                    # UPX bywa dostępny tylko na części maszyn - wynik zależałby od maszyny
+                    extra_args.append("--noupx")
+                if self.optimize_level and self.pyinstaller_supports_optimize():
+                    extra_args += ["--optimize", str(self.optimize_level)]
+                extra_args += self.extra_pyinstaller_args
+            # Klucz cache zawiera ustawienia śledzenia zamiast jego wyniku - przy trafieniu
+            # obciążenie nie jest uruchamiane ponownie
+            key_args = list(extra_args)
+            if self.backend == "pyinstaller" and self.trace_workload is not None:
+                key_args += ["--wpec-trace", json.dumps([list(self.trace_workload), sorted(self.keep_modules)])]
+            flags = self.build_flags(script_path, key_args)
             
-            if result.returncode == 0:
-                print("✅ PyInstaller można zaimportować")
-                
-                # Test komendy
-                cmd2 = [self.python_exe, "-m", "PyInstaller", "--version"]
-                result2 = subprocess.run(cmd2, 
-                                       capture_output=True, 
-                                       text=True, 
-                                       env=self.python_path_env,
-                                       check=False)
-                
-                if result2.returncode == 0:
-                    version = result2.stdout.strip()
-                    print(f"✅ PyInstaller {version} gotowy")
-                    return True
+            cache_key = None
+            cached = False
+            exe_path = zip_path = None
+            details = {}
+            if self.build_cache and self.bundle_mode == "onefile" and self.backend == "pyinstaller":
+                cache_key = self.build_cache_key(script_path, flags)
+                hit = self.build_cache.fetch(cache_key, output_dir, make_zip)
+                if hit:
+                    exe_path, zip_path = hit
+                    cached = True
+                    print(f"⚡ Cache: bez zmian od ostatniej kompilacji ({cache_key[:12]})")
+                    print(f"📁 EXE: {exe_path}")
+            
+            if not cached and self.backend == "pyinstaller" and self.trace_workload is not None:
+                extra_args[trace_at:trace_at] = self.trace_prune(script_path, output_dir)
+            
+            if not cached and self.optimize_level and self.backend == "pyinstaller":
+                details["bytecode"] = self.precompile_bytecode(script_path)
+            
+            if not cached:
+                if self.backend == "zipapp":
+                    exe_path = self.build_zipapp(script_path, output_dir, details)
+                elif self.work_dirs:
+                    # Tryb przyrostowy - trwały katalog roboczy, bez --clean
+                    with self.work_dirs.acquire(script_path) as (workpath, specpath):
+                        print(f"♻️  Kompilacja przyrostowa: {os.path.dirname(workpath)}")
+                        exe_path = self.compile_script(script_path, output_dir, workpath, specpath,
+                                                       extra_args=extra_args, clean=False,
+                                                       cancel_event=cancel_event, details=details)
                 else:
-                    print(f"⚠️  PyInstaller import OK, ale komenda nie działa: {result2.stderr}")
-                    return False
+                    workpath = os.path.join(output_dir, "build", script_name)
+                    if self.concurrent_builds:
+                        # --clean czyści wspólny dla użytkownika bincache PyInstaller, z którego
+                        # korzystają równoległe zadania - zamiast tego świeży katalog roboczy
+                        background_deleter().remove(workpath)
+                    exe_path = self.compile_script(
+                        script_path, output_dir,
+                        workpath=workpath,
+                        specpath=os.path.join(output_dir, "spec", script_name),
+                        extra_args=extra_args,
+                        clean=not self.concurrent_builds,
+                        cancel_event=cancel_event,
+                        details=details,
+                    )
+            
+            if exe_path and details.get("bytecode"):
+                details["bytecode"]["pyinstaller_cache"] = details.get("pyinstaller_cache")
+                details["bytecode"]["pyinstaller_cache_disabled"] = details.get("pyinstaller_cache_disabled")
+                self.write_bytecode_report(details["bytecode"], exe_path, output_dir)
+        
+        within_budget = True
+        errors = details.get("errors", [])
+        if exe_path and (self.size_report or self.size_budget_mb):
+            within_budget = self.check_size(exe_path, output_dir)
+            if not within_budget:
+                errors.append(build_error("size-budget", f"EXE większy niż {self.size_budget_mb:.1f} MB"))
+        
+        launcher = None
+        if exe_path and self.backend == "zipapp":
+            launcher = os.path.splitext(exe_path)[0] + ".cmd"
+        post = {}
+        if exe_path:
+            post = self.post_build(
+                exe_path, output_dir,
+                make_zip=make_zip and within_budget and self.bundle_mode == "onefile",
+                zip_path=zip_path, launcher=launcher,
+                cache_key=cache_key if not cached else None, script_path=script_path,
+                delta=bool(self.delta_base) and within_budget,
+            )
+            if post["smoke"] is False:
+                errors.append(build_error("smoke-test", "Test uruchomienia EXE nieudany"))
+        
+        return {
+            "script": script_path,
+            "success": exe_path is not None and within_budget and post.get("smoke") is not False,
+            "cached": cached,
+            "exe": exe_path,
+            "zip": post.get("zip", zip_path),
+            "delta": post.get("delta"),
+            "resources": details.get("resources"),
+            "timing": details.get("timing"),
+            "returncode": details.get("returncode"),
+            "build_log": details.get("build_log"),
+            "bytecode": details.get("bytecode"),
+            "errors": errors,
+            "time": time.perf_counter() - start,
+            "size": os.path.getsize(exe_path) if exe_path else 0,
+            "sha256": post.get("sha256"),
+            "smoke": post.get("smoke"),
+        }
+
+    def post_build(self, exe_path, output_dir, make_zip=True, zip_path=None, launcher=None,
+                   smoke_test=None, cache_key=None, script_path=None, delta=False):
+        """Etapy po kompilacji na gotowym EXE: pakiet, łatka, test i sumy SHA-256 równolegle.
+        
+        Każdy etap czyta tylko gotowy EXE, więc mogą działać jednocześnie; pakiet trafia
+        do cache zaraz po utworzeniu, a manifest sum powstaje na końcu ze wszystkich etapów.
+        Zwraca {"zip", "delta", "sha256", "smoke"} (smoke None, gdy testu nie było).
+        """
+        if smoke_test is None:
+            smoke_test = self.smoke_test
+        
+        def package():
+            path = zip_path
+            if path:
+                print(f"📦 Pakiet: {path}")
+            elif make_zip:
+                path = self.create_package(exe_path, output_dir, launcher)
+            if cache_key:
+                try:
+                    self.build_cache.store(cache_key, script_path, exe_path, path)
+                except OSError as e:
+                    print(f"⚠️  Nie udało się zapisać w cache: {e}")
+            return path, file_sha256(path) if path else None
+        
+        def delta_package():
+            path = self.create_delta_package(exe_path, output_dir)
+            return path, file_sha256(path) if path else None
+        
+        stages = {"exe": lambda: file_sha256(exe_path), "package": package}
+        if launcher:
+            stages["launcher"] = lambda: file_sha256(launcher)
+        if delta:
+            stages["delta"] = delta_package
+        if smoke_test:
+            stages["smoke"] = lambda: self.test_exe(launcher or exe_path)
+        results = run_stages(stages)
+        
+        zip_path, zip_sum = results["package"] or (None, None)
+        delta_path, delta_sum = results.get("delta") or (None, None)
+        if delta_path:
+            # Porównanie z tym, co faktycznie trafia do użytkownika - pakiet ZIP albo sam EXE
+            full_path = zip_path or exe_path
+            delta_size, full_size = os.path.getsize(delta_path), os.path.getsize(full_path)
+            print(f"🩹 Łatka: {delta_size / 1024:.0f} KB zamiast {full_size / 1024:.0f} KB "
+                  f"({os.path.basename(full_path)}, {delta_size / max(full_size, 1):.1%})")
+        sums = {os.path.basename(path): digest
+                for path, digest in ((exe_path, results["exe"]), (launcher, results.get("launcher")),
+                                     (zip_path, zip_sum), (delta_path, delta_sum)) if path and digest}
+        
+        checksums = None
+        manifest_path = os.path.join(output_dir, f"{os.path.splitext(os.path.basename(exe_path))[0]}.sha256")
+        if results["exe"]:
+            try:
+                checksums = write_sha256_sums(sums, manifest_path)
+                print(f"🔏 SHA-256: {checksums[os.path.basename(exe_path)][:16]}... ({manifest_path})")
+            except OSError as e:
+                print(f"⚠️  Nie udało się zapisać sum SHA-256: {e}")
+        
+        smoke = None
+        if smoke_test:
+            smoke = bool(results.get("smoke"))
+        return {"zip": zip_path, "delta": delta_path, "sha256": checksums, "smoke": smoke}
+
+    def delta_base_for(self, exe_path):
+        """EXE poprzedniego wydania: podany plik albo plik o tej samej nazwie w podanym katalogu"""
+        base = self.delta_base
+        if os.path.isdir(base):
+            base = os.path.join(base, os.path.basename(exe_path))
+        return base if os.path.isfile(base) else None
+
+    def create_delta_package(self, exe_path, output_dir):
+        """Łatka binarna od EXE poprzedniego wydania do nowego; zwraca ścieżkę łatki"""
+        base = self.delta_base_for(exe_path)
+        if base is None:
+            print(f"⚠️  Brak EXE poprzedniego wydania dla {os.path.basename(exe_path)} - bez łatki")
+            return None
+        if os.path.abspath(base) == os.path.abspath(exe_path):
+            print("⚠️  EXE poprzedniego wydania został nadpisany nową kompilacją - "
+                  "trzymaj poprzednie wydanie poza folderem wyjściowym")
+            return None
+        
+        exe_name = os.path.splitext(os.path.basename(exe_path))[0]
+        delta_path = os.path.join(output_dir, f"{exe_name}_from_{file_sha256(base)[:12]}.delta")
+        print(f"🩹 Łatka od: {base}")
+        start = time.perf_counter()
+        try:
+            stats = create_delta(base, exe_path, delta_path)
+        except DeltaLimitExceeded as e:
+            print(f"⚠️  Łatka pominięta ({e}) - użytkownicy pobiorą pełny pakiet")
+            return None
+        except (OSError, MemoryError) as e:
+            print(f"❌ Błąd tworzenia łatki: {e}")
+            return None
+        
+        print(f"✅ Łatka: {delta_path}")
+        print(f"   {stats['delta_size'] / 1024:.0f} KB, niezmienione: "
+              f"{stats['copied'] / max(stats['new_size'], 1):.0%}, {time.perf_counter() - start:.1f}s")
+        return delta_path
+
+    def configured_copy(self, options):
+        """Płytka kopia kompilatora z opcjami jednej kompilacji (wspólne środowisko i cache)"""
+        with self._shared_lock:
+            self.import_graph()
+            if options.cache and self.build_cache is None:
+                self.build_cache = BuildCache(self.cache_dir("builds"))
+            if options.incremental and self.work_dirs is None:
+                self.work_dirs = WorkDirStore(self.cache_dir("work"))
+        
+        worker = copy.copy(self)
+        worker.build_cache = self.build_cache if options.cache else None
+        worker.work_dirs = self.work_dirs if options.incremental else None
+        worker.extra_pyinstaller_args = list(options.extra_args or [])
+        worker.analyze_before_build = options.analyze_imports
+        worker.trace_workload = list(options.trace_args) if options.trace_args is not None else None
+        worker.trace_timeout = options.trace_timeout
+        worker.keep_modules = list(options.keep_modules or [])
+        worker.size_report = options.size_report
+        worker.size_budget_mb = options.size_budget_mb
+        worker.zip_compression = options.zip_compression
+        worker.zip_level = options.zip_level
+        worker.zip_threads = options.zip_threads
+        worker.source_date_epoch = source_date_epoch() if options.reproducible else None
+        worker.delta_base = options.delta_from
+        worker.build_memory_limit_mb = options.memory_limit_mb
+        worker.build_time_limit = options.time_limit
+        worker.verbose_build = options.verbose
+        worker.backend = options.backend
+        worker.persistent_extract = options.persistent_extract
+        worker.optimize_level = options.optimize
+        worker.smoke_test = options.smoke_test
+        worker.concurrent_builds = True  # jedna instancja obsługuje wiele wywołań build() naraz
+        worker._compile_slots = None
+        return worker
+
+    def build(self, script_path, options=None, cancel_event=None):
+        """API: kompiluje skrypt bez wyjścia na konsolę i zwraca BuildResult.
+        
+        Każde wywołanie działa na własnej kopii kompilatora (configured_copy),
+        więc jedna przygotowana instancja obsługuje wiele kompilacji naraz. Wywołania
+        o tym samym celu (katalog wyjściowy + nazwa EXE) lub wspólnym katalogu
+        roboczym (incremental) czekają na siebie nawzajem zamiast go współdzielić.
+        Komunikaty trafiają do BuildResult.log zamiast na konsolę.
+        """
+        if not self.python_exe:
+            raise BuildError("Środowisko WinPython nie jest skonfigurowane (open_environment)")
+        options = options or BuildOptions()
+        script_path = os.path.abspath(script_path)
+        output_dir = options.output_dir or os.path.join(self.winpython_root, "compiled_apps")
+        
+        log = []
+        with thread_output().redirect(_line_sink(log.append)):
+            if not os.path.isfile(script_path) or not script_path.lower().endswith(".py"):
+                data = {"script": script_path, "errors": [
+                    build_error("invalid-script", f"Nieprawidłowy skrypt: {script_path}")]}
             else:
-                print(f"❌ Nie można zaimportować PyInstaller: {result.stderr}")
-                return False
-                
-        except Exception as e:
-            print(f"❌ Błąd sprawdzania PyInstaller: {e}")
-            return False
+                try:
+                    os.makedirs(output_dir, exist_ok=True)
+                    data = self.configured_copy(options).build_script(
+                        script_path, output_dir, options.make_zip, cancel_event)
+                except Exception as e:
+                    data = {"script": script_path,
+                            "errors": [build_error("exception", f"{type(e).__name__}: {e}")]}
+        return BuildResult(data, log)
 
-    def list_packages(self):
-        """Pokazuje zainstalowane pakiety"""
-        try:
-            cmd = [self.python_exe, "-m", "pip", "list"]
-            result = subprocess.run(cmd, 
-                                  capture_output=True, 
-                                  text=True, 
-                                  env=self.python_path_env,
-                                  check=False)
-            
-            if result.returncode == 0:
-                lines = result.stdout.split('\n')[2:]  # Pomijamy nagłówki
-                valid_lines = [line for line in lines if line.strip()]
-                
-                print("📦 Dostępne pakiety:")
-                for line in valid_lines[:10]:
-                    print(f"   {line}")
-                if len(valid_lines) > 10:
-                    print(f"   ... i {len(valid_lines)-10} więcej")
-                print()
-        except Exception:
-            print("⚠️  Nie udało się pobrać listy pakietów")
-
-    def install_libraries(self, libraries):
-        """Instaluje dodatkowe biblioteki"""
-        if not libraries:
-            return True
-            
-        print(f"📦 Instaluję biblioteki: {', '.join(libraries)}")
+    def check_size(self, exe_path, output_dir):
+        """Raport rozmiaru EXE i kontrola budżetu; False gdy budżet przekroczony"""
+        size_mb = os.path.getsize(exe_path) / (1024*1024)
+        over_budget = bool(self.size_budget_mb) and size_mb > self.size_budget_mb
         
-        for lib in libraries:
-            try:
-                cmd = [self.python_exe, "-m", "pip", "install", lib]
-                result = subprocess.run(cmd, 
-                                      capture_output=True, 
-                                      text=True, 
-                                      env=self.python_path_env,
-                                      check=False)
-                
-                if result.returncode == 0:
-                    print(f"✅ {lib} - zainstalowana")
-                else:
-                    print(f"❌ {lib} - błąd: {result.stderr}")
-                    return False
-            except Exception as e:
-                print(f"❌ Błąd instalacji {lib}: {e}")
-                return False
+        if self.size_report or over_budget:
+            self.analyze_exe_size(exe_path, output_dir)
         
+        if over_budget:
+            print(f"❌ Przekroczono budżet rozmiaru: {size_mb:.1f} MB > {self.size_budget_mb:.1f} MB")
+            print("💡 Sprawdź największe pakiety powyżej i wyklucz zbędne (--exclude-module)")
+            return False
+        if self.size_budget_mb:
+            print(f"✅ Budżet rozmiaru: {size_mb:.1f} MB / {self.size_budget_mb:.1f} MB")
         return True
 
-    def compile_script(self, script_path, output_dir):
-        """Kompiluje skrypt do EXE"""
-        print("🔨 Kompilacja do EXE...")
+    def analyze_exe_size(self, exe_path, output_dir, top=15):
+        """Wypisuje i zapisuje rozkład rozmiaru EXE według archiwum PyInstaller"""
+        try:
+            breakdown = exe_size_breakdown(exe_path)
+        except (OSError, ValueError, EOFError, struct.error) as e:
+            print(f"⚠️  Nie udało się odczytać archiwum EXE: {e}")
+            return None
+        if breakdown is None:
+            print("⚠️  To nie jest EXE PyInstaller - brak rozkładu rozmiaru")
+            return None
         
-        script_name = os.path.splitext(os.path.basename(script_path))[0]
-        exe_name = f"{script_name}_compiled"
+        lines = [f"Rozkład rozmiaru: {os.path.basename(exe_path)} "
+                 f"({breakdown['exe_size'] / (1024*1024):.1f} MB)"]
+        for title, key in (("Pakiety", "packages"),
+                           ("Moduły rozszerzeń i DLL", "binaries"),
+                           ("Pliki danych", "data_files")):
+            items = breakdown[key]
+            if not items:
+                continue
+            lines += ["", f"{title} (największe pierwsze):"]
+            for item in items[:top]:
+                share = item["size"] / breakdown["exe_size"] * 100
+                lines.append(f"  {item['size'] / (1024*1024):>8.2f} MB  {share:>5.1f}%  {item['name']}")
+            if len(items) > top:
+                rest = sum(item["size"] for item in items[top:])
+                lines.append(f"  {rest / (1024*1024):>8.2f} MB         ... i {len(items) - top} więcej")
         
-        # Sprawdź czy to nie samo-kompilacja
+        print(f"📊 {lines[0]}")
+        for line in lines[1:]:
+            print(f"   {line}" if line else "")
+        
+        exe_name = os.path.splitext(os.path.basename(exe_path))[0]
         try:
-            if os.path.abspath(__file__) == os.path.abspath(script_path):
-                print("⚠️  Wykryto samo-kompilację - dodaję '_compiled' do nazwy")
-        except:
-            pass
+            os.makedirs(os.path.join(output_dir, "reports"), exist_ok=True)
+            with open(self.report_path(output_dir, exe_name, "size.json"), "w", encoding="utf-8") as f:
+                json.dump(breakdown, f, indent=2)
+            with open(self.report_path(output_dir, exe_name, "size.txt"), "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError as e:
+            print(f"⚠️  Nie udało się zapisać raportu rozmiaru: {e}")
+        return breakdown
+
+    def show_cache_info(self):
+        """Wypisuje zawartość cache kompilacji"""
+        entries = self.build_cache.entries()
+        total = sum(meta.get("size", 0) for meta in entries)
+        print(f"🗄️  Cache kompilacji: {self.build_cache.cache_dir}")
+        print(f"   Wpisów: {len(entries)}, rozmiar: {total / (1024*1024):.1f} MB "
+              f"/ limit {self.build_cache.max_size / (1024*1024):.0f} MB")
+        for meta in reversed(entries):
+            last_used = datetime.datetime.fromtimestamp(meta.get("last_used", 0))
+            print(f"   {meta['key'][:12]}  {meta.get('size', 0) / (1024*1024):>7.1f} MB  "
+                  f"{last_used:%Y-%m-%d %H:%M}  trafień: {meta.get('hits', 0):<3} "
+                  f"{os.path.basename(meta.get('script', '?'))}")
+
+    def prune_cache(self, max_size_mb=None):
+        """Przycina cache kompilacji do podanego rozmiaru (domyślnie do limitu)"""
+        max_size = None if max_size_mb is None else int(max_size_mb * 1024 * 1024)
+        removed = self.build_cache.prune(max_size)
+        freed = sum(meta.get("size", 0) for meta in removed)
+        print(f"🧹 Usunięto {len(removed)} wpisów cache ({freed / (1024*1024):.1f} MB)")
+
+    def run_batch(self, scripts, output_dir, jobs=None, make_zip=True):
+        """Kompiluje wiele skryptów równolegle w ograniczonej puli wątków"""
+        jobs = max(1, min(jobs or min(4, os.cpu_count() or 1), len(scripts)))
+        router = thread_output()
         
-        # Komenda PyInstaller
-        cmd = [
-            self.python_exe, "-m", "PyInstaller",
-            "--onefile",
-            "--distpath", output_dir,
-            "--workpath", os.path.join(output_dir, "build"),
-            "--specpath", os.path.join(output_dir, "spec"),
-            "--clean",
-            "--name", exe_name,
-            script_path
-        ]
+        print(f"🚀 Tryb wsadowy: {len(scripts)} skryptów, {jobs} równolegle")
         
+        def job(script_path):
+            name = os.path.splitext(os.path.basename(script_path))[0]
+            with router.redirect(_prefixed_sink(name, router)):
+                try:
+                    return self.build_script(script_path, output_dir, make_zip)
+                except Exception as e:
+                    print(f"❌ Wyjątek: {e}")
+                    return {"script": script_path, "success": False, "exe": None,
+                            "zip": None, "time": 0.0, "size": 0}
+        
+        # jobs kompilacji naraz; dodatkowe wątki zajmują się przetwarzaniem końcowym
+        # poprzednich skryptów, gdy kolejne już się kompilują
+        results = []
+        self._compile_slots = threading.Semaphore(jobs)
+        concurrent = self.concurrent_builds
+        self.concurrent_builds = True
         try:
-            print(f"Wykonuję: {' '.join(cmd)}")
-            print("⏳ Kompilacja w toku...")
-            
-            # Uruchom z odpowiednim środowiskiem
-            result = subprocess.run(cmd, 
-                                  capture_output=True, 
-                                  text=True, 
-                                  env=self.python_path_env,
-                                  check=False)
-            
-            if result.returncode == 0:
-                exe_path = os.path.join(output_dir, f"{exe_name}.exe")
-                if os.path.exists(exe_path):
-                    size_mb = os.path.getsize(exe_path) / (1024*1024)
-                    print(f"✅ Kompilacja zakończona!")
-                    print(f"📁 EXE: {exe_path}")
-                    print(f"📏 Rozmiar: {size_mb:.1f} MB")
-                    return exe_path
-                else:
-                    print("❌ Kompilacja OK, ale nie ma pliku EXE")
-                    return None
+            with ThreadPoolExecutor(max_workers=min(len(scripts), jobs * 2)) as pool:
+                futures = [pool.submit(job, script) for script in scripts]
+                for future in as_completed(futures):
+                    results.append(future.result())
+        finally:
+            self._compile_slots = None
+            self.concurrent_builds = concurrent
+        
+        # Kolejność raportu jak na liście wejściowej
+        order = {script: i for i, script in enumerate(scripts)}
+        results.sort(key=lambda r: order[r["script"]])
+        self.print_batch_summary(results)
+        return results
+
+    def watched_files(self, script_path):
+        """Pliki obserwowane w trybie --watch: skrypt i jego lokalne moduły"""
+        return [os.path.abspath(script_path)] + self.import_graph().build(script_path)["local"]
+
+    @staticmethod
+    def _snapshot(files):
+        snapshot = {}
+        for path in files:
+            try:
+                st = os.stat(path)
+                snapshot[path] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                snapshot[path] = None
+        return snapshot
+
+    def run_watch(self, script_path, output_dir, make_zip=True, debounce=1.0, interval=0.5):
+        """Obserwuje skrypt i jego moduły; przebudowuje po zmianach (z opóźnieniem)"""
+        build = {"thread": None, "cancel": None}
+        
+        def worker(cancel_event):
+            result = self.build_script(script_path, output_dir, make_zip, cancel_event)
+            if cancel_event.is_set():
+                return
+            if result["success"]:
+                print(f"✅ Gotowe w {result['time']:.1f}s - {result['exe']}")
             else:
-                print("❌ Błąd kompilacji:")
-                print("STDOUT:", result.stdout)
-                print("STDERR:", result.stderr)
-                
-                # Analiza błędów
-                error_text = (result.stdout + result.stderr).lower()
-                if "no module named" in error_text:
-                    print("💡 Brakuje modułów - sprawdź czy wszystkie biblioteki są zainstalowane")
-                elif "permission" in error_text:
-                    print("💡 Problem z uprawnieniami - uruchom jako administrator")
-                elif "recursion" in error_text:
-                    print("💡 Problem z rekursją - prawdopodobnie samo-kompilacja")
-                
-                return None
+                print("❌ Kompilacja nieudana - czekam na kolejne zmiany")
+            print("👀 Obserwuję zmiany... (Ctrl+C kończy)")
+        
+        def start_build():
+            build["cancel"] = threading.Event()
+            build["thread"] = threading.Thread(target=worker, args=(build["cancel"],), daemon=True)
+            build["thread"].start()
+        
+        def cancel_build():
+            if build["thread"] and build["thread"].is_alive():
+                print("⏹️  Nowa zmiana - przerywam trwającą kompilację")
+                build["cancel"].set()
+                build["thread"].join()
+        
+        files = self.watched_files(script_path)
+        snapshot = self._snapshot(files)
+        print(f"👀 Tryb obserwacji: {len(files)} plików, opóźnienie {debounce:.1f}s")
+        start_build()
+        
+        last_change = None
+        try:
+            while True:
+                time.sleep(interval)
+                current = self._snapshot(files)
+                if current != snapshot:
+                    changed = [os.path.basename(p) for p in files if current[p] != snapshot[p]]
+                    if last_change is None:
+                        print(f"✏️  Zmiana: {', '.join(changed)}")
+                    # Importy mogły się zmienić - odśwież listę plików
+                    files = self.watched_files(script_path)
+                    snapshot = self._snapshot(files)
+                    last_change = time.monotonic()
+                    cancel_build()
                 
-        except Exception as e:
-            print(f"❌ Wyjątek podczas kompilacji: {e}")
-            return None
+                if last_change is not None and time.monotonic() - last_change >= debounce:
+                    last_change = None
+                    print("\n🔁 Przebudowa...")
+                    start_build()
+        except KeyboardInterrupt:
+            if build["thread"] and build["thread"].is_alive():
+                build["cancel"].set()
+                build["thread"].join()
+            print("\n⏹️  Zakończono obserwację")
+        return True
 
-    def create_package(self, exe_path, output_dir):
-        """Tworzy pakiet ZIP"""
-        if not exe_path or not os.path.exists(exe_path):
-            return None
-            
-        exe_name = os.path.splitext(os.path.basename(exe_path))[0]
-        zip_path = os.path.join(output_dir, f"{exe_name}_package.zip")
+    def print_batch_summary(self, results):
+        """Wypisuje tabelę wyników trybu wsadowego"""
+        print("\n" + "=" * 70)
+        print("📊 PODSUMOWANIE KOMPILACJI WSADOWEJ")
+        print("=" * 70)
+        width = max([len(os.path.basename(r["script"])) for r in results] + [6])
+        print(f"   {'Skrypt':<{width}}  {'Status':<6}  {'Czas':>8}  {'Rozmiar':>10}  {'Szczyt RAM':>10}")
+        for r in results:
+            status = ("CACHE" if r.get("cached") else "OK") if r["success"] else "BŁĄD"
+            size = f"{r['size'] / (1024*1024):.1f} MB" if r["success"] else "-"
+            peak = f"{r['resources']['peak_rss_mb']:.0f} MB" if r.get("resources") else "-"
+            print(f"{'✅' if r['success'] else '❌'} {os.path.basename(r['script']):<{width}}  "
+                  f"{status:<6}  {r['time']:>7.1f}s  {size:>10}  {peak:>10}")
+        
+        ok = sum(1 for r in results if r["success"])
+        total_time = sum(r["time"] for r in results)
+        print("-" * 70)
+        print(f"   Udane: {ok}/{len(results)}, łączny czas kompilacji: {total_time:.1f}s")
+        print("=" * 70)
+
+    def run_shared_runtime(self, scripts, output_dir, jobs=None, make_zip=True):
+        """Kompiluje skrypty w trybie onedir do jednego drzewa ze wspólnym runtime.
+        
+        Identyczne pliki aplikacji (Python, DLL, moduły rozszerzeń) trafiają raz do
+        output_dir/runtime, a foldery aplikacji dostają do nich twarde dowiązania.
+        Aplikacje onedir nie rozpakowują się przy starcie.
+        """
+        print(f"🔗 Współdzielony runtime (onedir): {output_dir}")
+        previous_mode = self.bundle_mode
+        self.bundle_mode = "onedir"
+        try:
+            results = self.run_batch(scripts, output_dir, jobs, make_zip=False)
+        finally:
+            self.bundle_mode = previous_mode
+        if not any(r["success"] for r in results):
+            return results
         
+        # Drzewo obejmuje też aplikacje z wcześniejszych kompilacji
+        app_dirs = self.shared_runtime_apps(output_dir)
+        
+        print("🔍 Deduplikacja plików aplikacji...")
+        start = time.perf_counter()
         try:
-            print("📦 Tworzę pakiet ZIP...")
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                zipf.write(exe_path, os.path.basename(exe_path))
-                
-                readme = f"""
-{exe_name} - Aplikacja Python
+            stats = deduplicate_tree(output_dir, app_dirs, threads=self.zip_threads)
+        except OSError as e:
+            print(f"❌ Błąd deduplikacji: {e}")
+            for r in results:
+                r["success"] = False
+            return results
+        
+        total_mb = stats["total_size"] / (1024*1024)
+        saved_mb = stats["saved_size"] / (1024*1024)
+        print(f"✅ Wspólnych plików: {stats['shared_files']} ({stats['shared_size'] / (1024*1024):.1f} MB), "
+              f"dowiązań: {stats['linked']}, kopii: {stats['copied']}, {time.perf_counter() - start:.1f}s")
+        print(f"💾 Na dysku: {total_mb - saved_mb:.1f} MB zamiast {total_mb:.1f} MB "
+              f"(oszczędność {saved_mb / max(total_mb, 1e-9):.0%})")
+        if stats["copied"]:
+            print("⚠️  System plików nie obsługuje twardych dowiązań - część plików skopiowano")
+        
+        manifest = {
+            "runtime": SHARED_RUNTIME_DIR,
+            "apps": [os.path.basename(d) for d in app_dirs],
+            "files": stats["map"],
+        }
+        with open(os.path.join(output_dir, SHARED_RUNTIME_MANIFEST), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        
+        if make_zip:
+            zip_path = self.create_shared_package(output_dir, app_dirs, stats["map"])
+            if zip_path is None:
+                for r in results:
+                    r["success"] = False
+            for r in results:
+                r["zip"] = zip_path
+        return results
 
-Skompilowano: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-Kompilator: WinPython EXE Compiler v3.0
-Rozmiar: {os.path.getsize(exe_path) / (1024*1024):.1f} MB
+    @staticmethod
+    def shared_runtime_apps(output_dir):
+        """Foldery aplikacji onedir w drzewie współdzielonego runtime (z <nazwa>.exe w środku)"""
+        apps = []
+        for name in sorted(os.listdir(output_dir)):
+            if name != SHARED_RUNTIME_DIR and os.path.isfile(os.path.join(output_dir, name, f"{name}.exe")):
+                apps.append(os.path.join(output_dir, name))
+        return apps
 
-URUCHOMIENIE:
-Uruchom plik {os.path.basename(exe_path)}
+    def write_link_script(self, path, shared):
+        """Skrypt .cmd odtwarzający pliki aplikacji z katalogu runtime po rozpakowaniu"""
+        lines = [
+            "@echo off",
+            "rem Wspolny runtime: pliki aplikacji jako twarde dowiazania do runtime (albo kopie)",
+            'cd /d "%~dp0"',
+        ]
+        folders = sorted({rel.rsplit("/", 1)[0] for rel in shared})
+        for folder in folders:
+            folder = folder.replace("/", "\\")
+            lines.append(f'if not exist "{folder}" mkdir "{folder}"')
+        for rel, stored in sorted(shared.items()):
+            target = rel.replace("/", "\\")
+            source = f"{SHARED_RUNTIME_DIR}\\{stored}"
+            lines.append(f'mklink /H "{target}" "{source}" >nul 2>&1 || copy /Y "{source}" "{target}" >nul')
+        lines.append("echo Gotowe.")
+        with open(path, "w", encoding="ascii", errors="replace", newline="\r\n") as f:
+            f.write("\n".join(lines) + "\n")
 
-WYMAGANIA:
-Brak - aplikacja jest samodzielna
-"""
-                zipf.writestr("README.txt", readme)
-            
-            print(f"✅ Pakiet: {zip_path}")
-            return zip_path
-            
+    def create_shared_package(self, output_dir, app_dirs, shared):
+        """Pakiet ZIP drzewa aplikacji: wspólny runtime jeden raz, w aplikacjach tylko własne pliki"""
+        zip_path = os.path.join(output_dir, "shared_runtime_package.zip")
+        date_time = self.zip_date_time()
+        link_script = os.path.join(output_dir, "link_runtime.cmd")
+        start = time.perf_counter()
+        
+        entries = []
+        for stored in sorted(set(shared.values())):
+            entries.append((os.path.join(output_dir, SHARED_RUNTIME_DIR, stored),
+                            f"{SHARED_RUNTIME_DIR}/{stored}"))
+        for app_dir in app_dirs:
+            for path in _tree_files(app_dir):
+                arcname = os.path.relpath(path, output_dir).replace(os.sep, "/")
+                if arcname not in shared:
+                    entries.append((path, arcname))
+        
+        readme = (f"Aplikacje ze wspólnym runtime ({len(app_dirs)})\n\n"
+                  "INSTALACJA:\n"
+                  "1. Rozpakuj archiwum w wybranym folderze\n"
+                  "2. Uruchom raz link_runtime.cmd - uzupełnia foldery aplikacji plikami z runtime\n"
+                  "3. Uruchamiaj <aplikacja>\\<aplikacja>.exe\n\n"
+                  "Kompilator: WinPython EXE Compiler v3.0\n")
+        try:
+            print("📦 Tworzę pakiet ze wspólnym runtime...")
+            self.write_link_script(link_script, shared)
+            entries.append((link_script, "link_runtime.cmd"))
+            entries.append((os.path.join(output_dir, SHARED_RUNTIME_MANIFEST), SHARED_RUNTIME_MANIFEST))
+            with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
+                self.add_files_to_zip(zipf, entries)
+                readme_info = zipfile.ZipInfo("README.txt", date_time or time.localtime()[:6])
+                readme_info.compress_type = zipfile.ZIP_DEFLATED
+                readme_info.external_attr = 0o100644 << 16
+                zipf.writestr(readme_info, readme)
         except Exception as e:
             print(f"❌ Błąd tworzenia pakietu: {e}")
             return None
+        
+        print(f"✅ Pakiet: {zip_path}")
+        print(f"   {os.path.getsize(zip_path) / (1024*1024):.1f} MB, plików: {len(entries)}, "
+              f"wspólnych: {len(set(shared.values()))}, {time.perf_counter() - start:.1f}s")
+        return zip_path
 
     def cleanup(self, output_dir):
-        """Usuwa pliki tymczasowe"""
+        """Usuwa pliki tymczasowe (katalogi w tle - BackgroundDeleter)"""
         try:
+            deleter = background_deleter()
+            deleter.sweep(output_dir)
             for folder in ["build", "spec"]:
                 folder_path = os.path.join(output_dir, folder)
                 if os.path.exists(folder_path):
-                    shutil.rmtree(folder_path)
-                    print(f"🧹 Usunięto {folder}")
+                    deleter.remove(folder_path)
+                    print(f"🧹 Usuwam {folder} (w tle)")
             
             # Usuń pliki .spec
             for spec_file in glob.glob(os.path.join(output_dir, "*.spec")):
@@ -390,6 +4773,192 @@ Brak - aplikacja jest samodzielna
             print(f"❌ Błąd testowania: {e}")
             return False
 
+    def _launch_timed(self, exe_path, exe_args, until=None, timeout=30.0, env=None):
+        """Uruchamia EXE i mierzy czas do zakończenia lub do linii pasującej do wzorca.
+        
+        Bez wzorca czas liczy się tylko dla zakończenia z kodem 0 - proces, który
+        od razu się wywraca, nie może wyglądać na szybszy start.
+        """
+        pattern = re.compile(until) if until else None
+        start = time.perf_counter()
+        process = subprocess.Popen([exe_path] + list(exe_args),
+                                   stdin=subprocess.DEVNULL,
+                                   stdout=subprocess.PIPE if pattern else subprocess.DEVNULL,
+                                   stderr=subprocess.PIPE,
+                                   env=env)
+        
+        # stderr czytany w tle - inaczej pełny bufor mógłby zablokować proces
+        stderr_chunks = []
+        stderr_reader = threading.Thread(
+            target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+        stderr_reader.start()
+        
+        run = {"time": None, "returncode": None, "timed_out": False}
+        if pattern:
+            matched = threading.Event()
+            
+            def watch_stdout():
+                for raw_line in process.stdout:
+                    if pattern.search(raw_line.decode("utf-8", "replace")):
+                        run["time"] = time.perf_counter() - start
+                        matched.set()
+                        break
+                process.stdout.close()
+            
+            threading.Thread(target=watch_stdout, daemon=True).start()
+            deadline = start + timeout
+            while not matched.is_set() and process.poll() is None and time.perf_counter() < deadline:
+                matched.wait(0.01)
+            if matched.is_set():
+                self.terminate_process_tree(process)
+            elif process.poll() is None:
+                run["timed_out"] = True
+                self.terminate_process_tree(process)
+        else:
+            try:
+                if process.wait(timeout=timeout) == 0:
+                    run["time"] = time.perf_counter() - start
+            except subprocess.TimeoutExpired:
+                run["timed_out"] = True
+                self.terminate_process_tree(process)
+        
+        run["returncode"] = process.wait()
+        stderr_reader.join(timeout=5)
+        run["stderr"] = b"".join(chunk for chunk in stderr_chunks if chunk).decode("utf-8", "replace")
+        return run
+
+    @staticmethod
+    def parse_import_times(stderr, top=15):
+        """Najwolniejsze importy z wyjścia -X importtime (czas łączny, mikrosekundy)"""
+        imports = []
+        for line in stderr.splitlines():
+            match = IMPORT_TIME_RE.match(line)
+            if match:
+                self_us, cumulative_us, _, name = match.groups()
+                imports.append({"module": name.strip(), "self_us": int(self_us),
+                                "cumulative_us": int(cumulative_us)})
+        imports.sort(key=lambda item: -item["cumulative_us"])
+        return imports[:top]
+
+    def benchmark_exe(self, exe_path, runs=10, exe_args=None, until=None, timeout=30.0,
+                      import_time=False, output_dir=None, script_path=None):
+        """Mierzy czas startu EXE: pierwsze (zimne) uruchomienie i kolejne (ciepłe).
+        
+        Czasy importów (import_time) pochodzą z uruchomienia skryptu interpreterem
+        WinPython z -X importtime - bootloader PyInstaller ignoruje zmienne PYTHON*.
+        """
+        runs = max(2, runs)
+        exe_args = exe_args or []
+        condition = f"linia pasująca do '{until}'" if until else "zakończenie procesu"
+        print(f"⏱️  Benchmark startu: {os.path.basename(exe_path)}, {runs} uruchomień, do: {condition}")
+        
+        times = []
+        failures = 0
+        for i in range(runs):
+            run = self._launch_timed(exe_path, exe_args, until, timeout)
+            label = "zimny" if i == 0 else "ciepły"
+            if run["time"] is None:
+                failures += 1
+                reason = "przekroczono czas" if run["timed_out"] else f"kod {run['returncode']}"
+                print(f"   #{i + 1} ({label}): ❌ {reason}")
+                times.append(None)
+                continue
+            times.append(run["time"])
+            print(f"   #{i + 1} ({label}): {run['time'] * 1000:.0f} ms")
+        
+        cold = times[0]
+        warm = [t for t in times[1:] if t is not None]
+        report = {
+            "exe": os.path.abspath(exe_path),
+            "exe_size": os.path.getsize(exe_path),
+            "command": [exe_path] + list(exe_args),
+            "until": until,
+            "runs": runs,
+            "failures": failures,
+            "cold": cold,
+            "warm": {
+                "p50": _percentile(warm, 50),
+                "p95": _percentile(warm, 95),
+                "max": max(warm) if warm else None,
+                "min": min(warm) if warm else None,
+                "mean": sum(warm) / len(warm) if warm else None,
+            },
+            "times": times,
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+        
+        if import_time and not (script_path and self.python_exe):
+            print("⚠️  Czasy importów wymagają skryptu i środowiska WinPython (-w, -s) - pomijam")
+        elif import_time:
+            run = self._launch_timed(self.python_exe, ["-X", "importtime", os.path.abspath(script_path)] + exe_args,
+                                     until, timeout, env=self.python_path_env)
+            report["import_times"] = self.parse_import_times(run["stderr"])
+            if report["import_times"]:
+                print(f"🐢 Najwolniejsze importy (łącznie, {os.path.basename(script_path)} pod interpreterem WinPython):")
+                for item in report["import_times"]:
+                    print(f"   {item['cumulative_us'] / 1000:>8.1f} ms  {item['module']}")
+            else:
+                print("⚠️  Interpreter nie zgłosił czasów importu (-X importtime)")
+        
+        def ms(value):
+            return f"{value * 1000:.0f} ms" if value is not None else "-"
+        
+        warm_stats = report["warm"]
+        print(f"📊 Zimny start: {ms(cold)} | ciepły p50: {ms(warm_stats['p50'])}, "
+              f"p95: {ms(warm_stats['p95'])}, max: {ms(warm_stats['max'])}"
+              + (f" | nieudane: {failures}" if failures else ""))
+        if failures:
+            print(f"❌ Benchmark nieudany: {failures}/{runs} uruchomień bez poprawnego startu")
+        
+        if output_dir:
+            exe_name = os.path.splitext(os.path.basename(exe_path))[0]
+            try:
+                os.makedirs(os.path.join(output_dir, "reports"), exist_ok=True)
+                path = self.report_path(output_dir, exe_name, "bench.json")
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(report, f, indent=2)
+                print(f"📄 Wyniki benchmarku: {path}")
+            except OSError as e:
+                print(f"⚠️  Nie udało się zapisać wyników benchmarku: {e}")
+        return report
+
+    def compare_benchmark(self, report, baseline_path, threshold=10.0):
+        """Porównuje wyniki z bazowymi; False gdy start wydłużył się ponad próg (%)"""
+        try:
+            with open(baseline_path, encoding="utf-8") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"❌ Nie udało się wczytać wyników bazowych: {e}")
+            return False
+        
+        regressed = False
+        print(f"📐 Porównanie z {baseline_path} (próg {threshold:.0f}%):")
+        for label, current, previous in (
+                ("zimny start", report["cold"], baseline.get("cold")),
+                ("ciepły p50", report["warm"]["p50"], baseline.get("warm", {}).get("p50")),
+                ("ciepły p95", report["warm"]["p95"], baseline.get("warm", {}).get("p95"))):
+            if current is None or not previous:
+                continue
+            change = (current - previous) / previous * 100
+            worse = change > threshold
+            regressed = regressed or worse
+            print(f"   {'❌' if worse else '✅'} {label}: {previous * 1000:.0f} ms → "
+                  f"{current * 1000:.0f} ms ({change:+.1f}%)")
+        if regressed:
+            print("❌ Regresja czasu startu względem wyników bazowych")
+        return not regressed
+
+    def run_benchmark_cli(self, args, exe_path, output_dir):
+        """Benchmark z opcji CLI; False przy błędach uruchomienia lub regresji"""
+        report = self.benchmark_exe(exe_path, args.bench, shlex.split(args.bench_args or ""),
+                                    args.bench_until, args.bench_timeout,
+                                    args.bench_importtime, output_dir,
+                                    None if args.bench_exe else args.script)
+        ok = report["cold"] is not None and report["failures"] == 0
+        if args.bench_baseline:
+            ok = self.compare_benchmark(report, args.bench_baseline, args.bench_threshold) and ok
+        return ok
+
     def run_interactive(self):
         """Tryb interaktywny"""
         self.show_menu()
@@ -463,22 +5032,22 @@ Brak - aplikacja jest samodzielna
         exe_path = self.compile_script(script_path, output_dir)
         
         if exe_path:
-            # Pakiet ZIP
-            zip_path = self.create_package(exe_path, output_dir)
-            
-            # Test
+            # Pytania od razu - pakiet, test i sumy SHA-256 powstają potem równolegle
             test_choice = input("\nTestować EXE? (t/n): ").lower()
-            if test_choice in ['t', 'tak', 'y', 'yes']:
-                self.test_exe(exe_path)
-            
-            # Sprzątanie
             cleanup_choice = input("Usunąć pliki tymczasowe? (t/n): ").lower()
+            
             if cleanup_choice in ['t', 'tak', 'y', 'yes']:
                 self.cleanup(output_dir)
+            post = self.post_build(exe_path, output_dir,
+                                   smoke_test=test_choice in ['t', 'tak', 'y', 'yes'])
+            zip_path = post["zip"]
             
-            # Wyniki
+            # Wyniki (EXE powstał - jak dotąd wynik True, także gdy test się nie powiódł)
             print("\n" + "="*70)
-            print("🎉 KOMPILACJA ZAKOŃCZONA POMYŚLNIE! 🎉")
+            if post["smoke"] is False:
+                print("⚠️  EXE SKOMPILOWANY, ALE TEST URUCHOMIENIA NIEUDANY - sprawdź błędy powyżej")
+            else:
+                print("🎉 KOMPILACJA ZAKOŃCZONA POMYŚLNIE! 🎉")
             print("="*70)
             print(f"📁 EXE: {exe_path}")
             if zip_path:
@@ -500,20 +5069,93 @@ Brak - aplikacja jest samodzielna
             print("💡 Sprawdź błędy powyżej")
             return False
 
+    def apply_build_options(self, args):
+        """Ustawienia kompilacji z opcji CLI (po konfiguracji środowiska)"""
+        if args.incremental:
+            self.work_dirs = WorkDirStore(self.cache_dir("work"), args.work_budget)
+        
+        self.verbose_build = args.verbose
+        self.analyze_before_build = args.analyze_imports
+        if args.trace_imports:
+            self.trace_workload = shlex.split(args.trace_args or "")
+            self.trace_timeout = args.trace_timeout
+            self.keep_modules = args.keep_module or []
+        self.size_report = args.size_report
+        self.size_budget_mb = args.size_budget
+        self.zip_compression = args.zip_compression
+        self.zip_level = args.zip_level
+        self.zip_threads = args.zip_threads
+        if args.reproducible:
+            self.source_date_epoch = source_date_epoch()
+        self.delta_base = args.delta_from
+        self.build_memory_limit_mb = args.memory_limit
+        self.build_time_limit = args.time_limit
+        if args.zipapp:
+            self.backend = "zipapp"
+        self.persistent_extract = args.persistent_extract
+        self.optimize_level = args.optimize
+        self.smoke_test = args.smoke_test
+
     def run_cli(self, args):
         """Tryb CLI"""
+        if args.matrix is not None:
+            return self.run_matrix(args)
+        packaging = [name for name, enabled in (("--zipapp", args.zipapp),
+                                                ("--shared-runtime", args.shared_runtime),
+                                                ("--persistent-extract", args.persistent_extract)) if enabled]
+        if len(packaging) > 1:
+            print(f"❌ Opcje {' i '.join(packaging)} wykluczają się - wybierz jeden sposób pakowania")
+            return False
+        
+        # Wybór interpretera, gdy katalog zawiera kilka dystrybucji
+        winpython_path, python_exe = args.winpython, None
+        if args.interpreters or len(find_python_executables(args.winpython)) > 1:
+            choice = self.select_interpreter(args.winpython, args.script, args.refresh_env,
+                                             show=args.interpreters)
+            if choice is None:
+                return False
+            if args.interpreters and not args.script and not args.batch and not args.manifest \
+                    and args.packages is None:
+                return True
+            winpython_path, python_exe = choice
+        
         # Setup WinPython
-        success, message = self.setup_winpython_environment(args.winpython)
+        success, message = self.setup_winpython_environment(winpython_path, args.refresh_env, python_exe)
         if not success:
             print(f"❌ {message}")
             return False
         print(f"✅ {message}")
         
-        # PyInstaller
-        if not self.verify_pyinstaller():
+        if args.packages is not None:
+            self.list_packages(args.packages or None, limit=None)
+            return True
+        
+        # Cache kompilacji
+        if not args.no_cache or args.cache_info or args.cache_prune is not None:
+            self.build_cache = BuildCache(self.cache_dir("builds"), args.cache_size)
+        
+        if args.cache_info or args.cache_prune is not None:
+            if args.cache_prune is not None:
+                self.prune_cache(None if args.cache_prune < 0 else args.cache_prune)
+            if args.cache_info:
+                self.show_cache_info()
+            return True
+        if args.no_cache:
+            self.build_cache = None
+        
+        self.apply_build_options(args)
+        
+        # PyInstaller (backend zipapp go nie potrzebuje)
+        if not args.zipapp and not self.verify_pyinstaller():
             if not self.install_pyinstaller_properly():
                 return False
         
+        if args.serve:
+            return self.run_server(args)
+        
+        if args.batch or args.manifest or args.shared_runtime:
+            return self.run_cli_batch(args)
+        
         # Walidacja skryptu
         if not os.path.exists(args.script):
             print(f"❌ Skrypt nie istnieje: {args.script}")
@@ -525,28 +5167,278 @@ Brak - aplikacja jest samodzielna
         
         # Biblioteki
         if args.libraries:
-            if not self.install_libraries(args.libraries):
+            if not self.install_libraries(args.libraries, args.wheelhouse, args.offline):
                 print("⚠️  Błędy instalacji bibliotek")
         
         # Kompilacja
         output_dir = os.path.join(self.winpython_root, "compiled_apps")
         os.makedirs(output_dir, exist_ok=True)
         
-        exe_path = self.compile_script(args.script, output_dir)
+        if args.watch:
+            # Ciepły stan między przebudowami: trwały katalog roboczy PyInstaller
+            if not self.work_dirs:
+                self.work_dirs = WorkDirStore(self.cache_dir("work"), args.work_budget)
+            return self.run_watch(args.script, output_dir, not args.no_zip, args.debounce)
         
-        if exe_path:
-            if not args.no_zip:
-                self.create_package(exe_path, output_dir)
-            
-            if not args.keep_build:
-                self.cleanup(output_dir)
-            
+        result = self.build_script(args.script, output_dir, make_zip=not args.no_zip)
+        exe_path = result["exe"]
+        
+        if not args.keep_build:
+            self.cleanup(output_dir)
+        
+        if result["success"]:
             print(f"\n✅ Sukces! EXE: {exe_path}")
+            if args.bench:
+                return self.run_benchmark_cli(args, exe_path, output_dir)
             return True
         else:
             print("❌ Kompilacja nieudana!")
             return False
 
+    def run_server(self, args):
+        """Tryb serwera - jedno rozgrzane środowisko, zadania z lokalnego gniazda"""
+        if args.libraries:
+            if not self.install_libraries(args.libraries, args.wheelhouse, args.offline):
+                print("⚠️  Błędy instalacji bibliotek")
+        
+        output_dir = os.path.join(self.winpython_root, "compiled_apps")
+        os.makedirs(output_dir, exist_ok=True)
+        
+        host, port = parse_address(args.serve)
+        server = CompileServer(self, output_dir, args.jobs or 2, not args.no_zip)
+        try:
+            asyncio.run(server.serve(host, port))
+        except KeyboardInterrupt:
+            print("\n⏹️  Serwer zatrzymany")
+        return True
+
+    def run_cli_batch(self, args):
+        """Tryb CLI - kompilacja wsadowa"""
+        scripts = self.collect_scripts(args.batch or ([args.script] if args.script else []), args.manifest)
+        if scripts is None:
+            return False
+        if not scripts:
+            print("❌ Brak skryptów do kompilacji")
+            return False
+        
+        # Biblioteki - raz dla całej partii
+        if args.libraries:
+            if not self.install_libraries(args.libraries, args.wheelhouse, args.offline):
+                print("⚠️  Błędy instalacji bibliotek")
+        
+        output_dir = os.path.join(self.winpython_root, "compiled_apps")
+        os.makedirs(output_dir, exist_ok=True)
+        
+        if args.shared_runtime:
+            output_dir = os.path.join(output_dir, "shared_runtime")
+            os.makedirs(output_dir, exist_ok=True)
+            results = self.run_shared_runtime(scripts, output_dir, args.jobs, not args.no_zip)
+        else:
+            results = self.run_batch(scripts, output_dir, args.jobs, not args.no_zip)
+        
+        if not args.keep_build:
+            self.cleanup(output_dir)
+        
+        return all(r["success"] for r in results)
+
+    def estimate_build_memory(self, script_path):
+        """Szacunkowa pamięć (MB) analizy PyInstaller według ciężkich pakietów skryptu"""
+        external = self.import_graph().build(script_path)["external"]
+        heavy = [name for name in external if name in HEAVY_PACKAGES]
+        return BUILD_BASE_MEMORY_MB + HEAVY_PACKAGE_MEMORY_MB * len(heavy)
+
+    @staticmethod
+    def matrix_label(entry, used):
+        """Unikalna nazwa katalogu wyjściowego interpretera, np. py3.12.4-64bit"""
+        label = f"py{entry['version']}-{entry.get('bits')}bit"
+        if label in used:
+            label += "-" + os.path.basename(entry["distribution"])
+        used.add(label)
+        return label
+
+    def prepare_matrix_target(self, entry, label, args, output_root):
+        """Osobny kompilator dla interpretera macierzy; None gdy środowisko nie działa"""
+        compiler = WinPythonCompiler()
+        success, message = compiler.setup_winpython_environment(
+            entry["distribution"], args.refresh_env, entry["python_exe"])
+        if not success:
+            print(f"❌ {message}")
+            return None
+        if not args.no_cache:
+            compiler.build_cache = BuildCache(compiler.cache_dir("builds"), args.cache_size)
+        compiler.apply_build_options(args)
+        compiler.concurrent_builds = True  # zadania macierzy działają równolegle
+        
+        if not compiler.verify_pyinstaller():
+            if not compiler.install_pyinstaller_properly():
+                return None
+        if args.libraries:
+            if not compiler.install_libraries(args.libraries, args.wheelhouse, args.offline):
+                print("⚠️  Błędy instalacji bibliotek")
+        
+        output_dir = os.path.join(output_root, label)
+        os.makedirs(output_dir, exist_ok=True)
+        return {"label": label, "entry": entry, "compiler": compiler, "output_dir": output_dir}
+
+    def run_matrix(self, args):
+        """Kompiluje skrypty każdym wybranym interpreterem spod -w (harmonogram wg CPU i RAM)"""
+        scripts = self.collect_scripts(([args.script] if args.script else []) + (args.batch or []),
+                                       args.manifest)
+        if not scripts:
+            if scripts is not None:
+                print("❌ Brak skryptów do kompilacji")
+            return False
+        
+        entries = [entry for entry in InterpreterIndex(args.winpython).refresh(force=args.refresh_env)
+                   if entry.get("ok")]
+        if args.matrix:
+            entries = [entry for entry in entries
+                       if any(entry["version"] == wanted or entry["version"].startswith(wanted + ".")
+                              for wanted in args.matrix)]
+        if not entries:
+            print(f"❌ Brak interpreterów do macierzy w: {args.winpython}")
+            return False
+        
+        output_root = os.path.join(args.winpython, "compiled_apps", "matrix")
+        router = thread_output()
+        used = set()
+        labels = [(entry, self.matrix_label(entry, used)) for entry in entries]
+        print(f"🧮 Macierz: {len(scripts)} skryptów × {len(labels)} interpreterów")
+        
+        targets = []
+        for entry, label in labels:
+            with router.redirect(_prefixed_sink(label, router)):
+                target = self.prepare_matrix_target(entry, label, args, output_root)
+            if target:
+                targets.append(target)
+            else:
+                print(f"⚠️  Pomijam interpreter {label}")
+        if not targets:
+            return False
+        
+        # Zadania z największym zapotrzebowaniem na pamięć startują pierwsze
+        jobs = []
+        for script in scripts:
+            memory = args.job_memory or targets[0]["compiler"].estimate_build_memory(script)
+            jobs += [(target, script, memory) for target in targets]
+        jobs.sort(key=lambda job: -job[2])
+        
+        scheduler = ResourceScheduler(args.jobs)
+        budget = f"{scheduler.memory_budget} MB" if scheduler.memory_budget else "nieznany"
+        print(f"🚦 Harmonogram: do {scheduler.max_jobs} zadań naraz, budżet pamięci: {budget}")
+        
+        def job(target, script_path, memory):
+            name = os.path.splitext(os.path.basename(script_path))[0]
+            with router.redirect(_prefixed_sink(f"{target['label']} {name}", router)):
+                print(f"▶ Start (rezerwacja {memory} MB)")
+                try:
+                    result = target["compiler"].build_script(script_path, target["output_dir"],
+                                                             not args.no_zip)
+                except Exception as e:
+                    print(f"❌ Wyjątek: {e}")
+                    result = {"script": script_path, "success": False, "cached": False,
+                              "exe": None, "zip": None, "time": 0.0, "size": 0}
+                finally:
+                    scheduler.release(memory)
+            return dict(result, interpreter=target["label"], memory_mb=memory)
+        
+        # Zadania dopuszczane po kolei - następne czeka na wolny rdzeń i pamięć
+        start = time.perf_counter()
+        futures = []
+        with ThreadPoolExecutor(max_workers=scheduler.max_jobs) as pool:
+            for target, script_path, memory in jobs:
+                scheduler.acquire(memory)
+                futures.append(pool.submit(job, target, script_path, memory))
+            results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start
+        
+        if not args.keep_build:
+            for target in targets:
+                self.cleanup(target["output_dir"])
+        
+        skipped = [label for _, label in labels if label not in {t["label"] for t in targets}]
+        self.write_matrix_report(results, scripts, [t["label"] for t in targets], skipped,
+                                 output_root, elapsed, scheduler)
+        return not skipped and all(r["success"] for r in results)
+
+    def write_matrix_report(self, results, scripts, labels, skipped, output_root, elapsed, scheduler):
+        """Tabela skrypt × interpreter oraz raport matrix_report.json/txt w output_root"""
+        cells = {(r["script"], r["interpreter"]): r for r in results}
+        width = max([len(os.path.basename(s)) for s in scripts] + [6])
+        column = max([len(label) for label in labels] + [12])
+        
+        lines = [f"{'Skrypt':<{width}}  " + "  ".join(f"{label:<{column}}" for label in labels)]
+        for script in scripts:
+            row = []
+            for label in labels:
+                r = cells[(script, label)]
+                status = ("CACHE" if r.get("cached") else "OK") if r["success"] else "BŁĄD"
+                row.append(f"{status} {r['time']:.0f}s {r['size'] / (1024*1024):.1f}MB"
+                           if r["success"] else status)
+            lines.append((f"{os.path.basename(script):<{width}}  "
+                          + "  ".join(f"{cell:<{column}}" for cell in row)).rstrip())
+        ok = sum(1 for r in results if r["success"])
+        lines += ["", f"Udane: {ok}/{len(results)}, czas całkowity: {elapsed:.1f}s, "
+                      f"najwięcej równolegle: {scheduler.peak_running}"]
+        if skipped:
+            lines.append(f"Pominięte interpretery: {', '.join(skipped)}")
+        
+        print("\n" + "=" * 70)
+        print("🧮 PODSUMOWANIE MACIERZY KOMPILACJI")
+        print("=" * 70)
+        for line in lines:
+            print(f"   {line}" if line else "")
+        print("=" * 70)
+        
+        report = {
+            "finished": datetime.datetime.now().isoformat(timespec="seconds"),
+            "elapsed": round(elapsed, 3),
+            "interpreters": labels,
+            "skipped": skipped,
+            "max_jobs": scheduler.max_jobs,
+            "memory_budget_mb": scheduler.memory_budget,
+            "peak_running": scheduler.peak_running,
+            "results": [{key: r.get(key) for key in ("script", "interpreter", "success", "cached",
+                                                     "exe", "zip", "delta", "time", "size",
+                                                     "memory_mb", "resources", "sha256")}
+                        for r in results],
+        }
+        try:
+            os.makedirs(output_root, exist_ok=True)
+            with open(os.path.join(output_root, "matrix_report.json"), "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            with open(os.path.join(output_root, "matrix_report.txt"), "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            print(f"📄 Raport macierzy: {os.path.join(output_root, 'matrix_report.txt')}")
+        except OSError as e:
+            print(f"⚠️  Nie udało się zapisać raportu macierzy: {e}")
+
+
+def open_environment(winpython_path, python_exe=None, refresh=False, install_pyinstaller=True):
+    """API: przygotowuje WinPythonCompiler do kompilacji z kodu, bez wyjścia na konsolę.
+    
+    Gdy pod winpython_path jest kilka dystrybucji, a python_exe nie podano,
+    wybierany jest najlepszy interpreter z indeksu. Błąd to BuildError.
+    """
+    compiler = WinPythonCompiler()
+    log = []
+    with thread_output().redirect(_line_sink(log.append)):
+        if python_exe is None and len(find_python_executables(winpython_path)) > 1:
+            index = InterpreterIndex(winpython_path)
+            best, _ = index.best_for({}, index.refresh(force=refresh))
+            if best is None:
+                raise BuildError(f"Żaden interpreter pod {winpython_path} nie odpowiada", log)
+            winpython_path, python_exe = best["distribution"], best["python_exe"]
+        
+        success, message = compiler.setup_winpython_environment(winpython_path, refresh, python_exe)
+        if success and not compiler.verify_pyinstaller():
+            success = install_pyinstaller and compiler.install_pyinstaller_properly()
+            message = "PyInstaller niedostępny"
+    if not success:
+        raise BuildError(message, log)
+    compiler.import_graph()
+    return compiler
+
 
 def create_parser():
     """Parser argumentów"""
@@ -565,6 +5457,10 @@ Przykłady:
   Z bibliotekami:
     python winpythonec.py -w "C:\\WinPython\\WPy64-310111" -s "app.py" -l requests numpy
 
+  Tryb wsadowy (lista, glob lub manifest):
+    python winpythonec.py -w "C:\\WinPython\\WPy64-310111" -b "tools\\*.py" -j 4
+    python winpythonec.py -w "C:\\WinPython\\WPy64-310111" -m narzedzia.txt
+
 Funkcje v3.0:
   • Prawidłowa konfiguracja środowiska WinPython
   • Automatyczne ustawienie zmiennych środowiskowych
@@ -575,9 +5471,104 @@ Funkcje v3.0:
     
     parser.add_argument("-w", "--winpython", help="Ścieżka do WinPython")
     parser.add_argument("-s", "--script", help="Skrypt do kompilacji (.py)")
+    parser.add_argument("-b", "--batch", nargs="+", help="Tryb wsadowy: skrypty lub wzorce glob")
+    parser.add_argument("-m", "--manifest", help="Plik manifestu z listą skryptów (jeden na linię)")
+    parser.add_argument("-j", "--jobs", type=int, help="Liczba równoległych kompilacji (domyślnie do 4)")
     parser.add_argument("-l", "--libraries", nargs="*", help="Dodatkowe biblioteki")
+    parser.add_argument("--wheelhouse", metavar="DIR",
+                        help="Lokalny wheelhouse z plikiem lock dla bibliotek (-l)")
+    parser.add_argument("--offline", action="store_true",
+                        help="Instaluj biblioteki tylko z wheelhouse, bez pobierania")
+    parser.add_argument("--packages", nargs="?", const="", metavar="FILTR",
+                        help="Pokaż zainstalowane pakiety WinPython (fragment nazwy lub wzorzec, np. 'py*')")
     parser.add_argument("--no-zip", action="store_true", help="Bez pakietu ZIP")
+    parser.add_argument("--zip-compression", default="auto",
+                        choices=["auto"] + sorted(ZIP_COMPRESSION_METHODS),
+                        help="Kompresja pakietu ZIP (auto = bez kompresji, gdy się nie opłaca)")
+    parser.add_argument("--zip-level", type=int, metavar="N",
+                        help="Poziom kompresji (deflate 0-9, bzip2 1-9)")
+    parser.add_argument("--zip-threads", type=int, metavar="N",
+                        help="Liczba wątków kompresji deflate (domyślnie liczba rdzeni)")
+    parser.add_argument("--reproducible", action="store_true",
+                        help="Kompilacja powtarzalna: stałe daty ZIP (SOURCE_DATE_EPOCH), PYTHONHASHSEED=0, --noupx")
+    parser.add_argument("--delta-from", metavar="EXE|DIR",
+                        help="EXE poprzedniego wydania (lub folder z nimi) - obok pakietu powstaje łatka binarna")
+    parser.add_argument("--apply-delta", nargs=3, metavar=("STARY_EXE", "ŁATKA", "NOWY_EXE"),
+                        help="Nałóż łatkę na poprzednie wydanie i sprawdź sumę SHA-256 wyniku")
+    parser.add_argument("--memory-limit", type=float, metavar="MB",
+                        help="Przerwij kompilację, gdy PyInstaller (z procesami potomnymi) zajmie więcej pamięci")
+    parser.add_argument("--time-limit", type=float, metavar="SEK",
+                        help="Przerwij kompilację trwającą dłużej niż podany czas")
+    parser.add_argument("--zipapp", action="store_true",
+                        help="Szybki backend bez PyInstaller: .pyz z launcherem .cmd (tylko czysty Python)")
+    parser.add_argument("--optimize", type=int, choices=[1, 2], default=0, metavar="{1,2}",
+                        help="Optymalizacja bajtkodu (1 = bez assert, 2 = także bez docstringów) "
+                             "z równoległą prekompilacją modułów do cache")
+    parser.add_argument("--smoke-test", action="store_true",
+                        help="Po kompilacji uruchom EXE na próbę (równolegle z pakowaniem i sumami SHA-256)")
+    parser.add_argument("--persistent-extract", action="store_true",
+                        help="EXE rozpakowuje się raz do cache wersji (%%LOCALAPPDATA%%\\WinPythonEC), kolejne starty bez "
+                             "rozpakowania aplikacji; zostaje narzut małego launchera (jego runtime w %%TEMP%% "
+                             "i drugi proces, zwykle ułamek sekundy)")
+    parser.add_argument("--shared-runtime", action="store_true",
+                        help="Tryb onedir: aplikacje (-s/-b/-m) w jednym drzewie ze wspólnym runtime (twarde dowiązania)")
     parser.add_argument("--keep-build", action="store_true", help="Zachowaj pliki build")
+    parser.add_argument("--interpreters", action="store_true",
+                        help="Pokaż indeks interpreterów pod katalogiem -w i wybrany dla skryptu")
+    parser.add_argument("--matrix", nargs="*", metavar="WERSJA",
+                        help="Kompiluj skrypty każdym interpreterem spod -w (opcjonalnie tylko podane wersje, np. 3.11 3.12)")
+    parser.add_argument("--job-memory", type=int, metavar="MB",
+                        help="Pamięć rezerwowana na jedną kompilację w macierzy (domyślnie szacowana z importów)")
+    parser.add_argument("--refresh-env", action="store_true",
+                        help="Ponownie zbadaj środowisko WinPython (ignoruj odcisk)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Kompilacja przyrostowa w trwałym katalogu roboczym (bez --clean)")
+    parser.add_argument("--work-budget", type=float, default=4096, metavar="MB",
+                        help="Limit miejsca na katalogi przyrostowe (domyślnie 4096 MB)")
+    parser.add_argument("--analyze-imports", action="store_true",
+                        help="Analiza importów przed kompilacją: --hidden-import i --exclude-module")
+    parser.add_argument("--trace-imports", action="store_true",
+                        help="Uruchom skrypt z obciążeniem i wyklucz pakiety, których nie załadował")
+    parser.add_argument("--trace-args", metavar="ARGS",
+                        help="Argumenty reprezentatywnego obciążenia dla --trace-imports")
+    parser.add_argument("--trace-timeout", type=float, default=300.0, metavar="SEK",
+                        help="Limit czasu obciążenia (domyślnie 300 s)")
+    parser.add_argument("--keep-module", nargs="+", metavar="MODUŁ",
+                        help="Moduły, które zawsze zostają w EXE (lista dozwolonych dla --trace-imports)")
+    parser.add_argument("--size-report", action="store_true",
+                        help="Rozkład rozmiaru EXE: pakiety, moduły rozszerzeń/DLL, pliki danych")
+    parser.add_argument("--size-budget", type=float, metavar="MB",
+                        help="Maksymalny rozmiar każdego EXE - przekroczenie to błąd kompilacji")
+    parser.add_argument("--watch", action="store_true",
+                        help="Obserwuj skrypt i jego moduły, przebudowuj po każdej zmianie")
+    parser.add_argument("--debounce", type=float, default=1.0, metavar="SEK",
+                        help="Opóźnienie przebudowy po ostatniej zmianie (domyślnie 1 s)")
+    parser.add_argument("--serve", nargs="?", const=DEFAULT_SERVER_ADDRESS, metavar="HOST:PORT",
+                        help="Uruchom serwer kompilacji (domyślnie 127.0.0.1:8765, -j = równoległość)")
+    parser.add_argument("--server", nargs="?", const=DEFAULT_SERVER_ADDRESS, metavar="HOST:PORT",
+                        help="Wyślij skrypty (-s/-b/-m) do serwera kompilacji zamiast kompilować lokalnie")
+    parser.add_argument("--cancel", type=int, metavar="ID", help="Anuluj zadanie na serwerze (z --server)")
+    parser.add_argument("--bench", type=int, metavar="N",
+                        help="Benchmark startu EXE po kompilacji: N uruchomień (pierwsze = zimne)")
+    parser.add_argument("--bench-exe", metavar="EXE", help="Benchmark istniejącego EXE (bez kompilacji)")
+    parser.add_argument("--bench-args", metavar="ARGS", help="Argumenty EXE podczas benchmarku")
+    parser.add_argument("--bench-until", metavar="REGEX",
+                        help="Koniec pomiaru przy linii wyjścia pasującej do wzorca (domyślnie: zakończenie)")
+    parser.add_argument("--bench-timeout", type=float, default=30.0, metavar="SEK",
+                        help="Limit czasu jednego uruchomienia (domyślnie 30 s)")
+    parser.add_argument("--bench-importtime", action="store_true",
+                        help="Najwolniejsze importy: skrypt uruchomiony interpreterem WinPython z -X importtime")
+    parser.add_argument("--bench-baseline", metavar="JSON", help="Porównaj z wcześniejszymi wynikami")
+    parser.add_argument("--bench-threshold", type=float, default=10.0, metavar="PROC",
+                        help="Próg regresji względem wyników bazowych (domyślnie 10%%)")
+    parser.add_argument("--no-cache", action="store_true", help="Nie używaj cache kompilacji")
+    parser.add_argument("--cache-size", type=float, default=2048, metavar="MB",
+                        help="Limit rozmiaru cache kompilacji (domyślnie 2048 MB)")
+    parser.add_argument("--cache-info", action="store_true", help="Pokaż zawartość cache kompilacji")
+    parser.add_argument("--cache-prune", type=float, nargs="?", const=-1, metavar="MB",
+                        help="Przytnij cache do limitu lub podanego rozmiaru (0 = wyczyść)")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="Pokazuj na bieżąco pełne wyjście PyInstaller")
     parser.add_argument("--version", action="version", version="WinPython EXE Compiler v3.0")
     
     return parser
@@ -592,8 +5583,43 @@ def main():
     
     compiler = WinPythonCompiler()
     
+    batch_mode = bool(args.batch or args.manifest)
+    cache_command = args.cache_info or args.cache_prune is not None
+    
+    # Benchmark istniejącego EXE - bez środowiska WinPython
+    if args.bench_exe:
+        if not os.path.exists(args.bench_exe):
+            print(f"❌ EXE nie istnieje: {args.bench_exe}")
+            sys.exit(1)
+        args.bench = args.bench or 10
+        output_dir = os.path.dirname(os.path.abspath(args.bench_exe))
+        sys.exit(0 if compiler.run_benchmark_cli(args, args.bench_exe, output_dir) else 1)
+    
+    # Nałożenie łatki - bez środowiska WinPython
+    if args.apply_delta:
+        old_exe, delta_path, new_exe = args.apply_delta
+        try:
+            sha = apply_delta(old_exe, delta_path, new_exe)
+        except (OSError, ValueError, zlib.error, struct.error) as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print(f"✅ {new_exe} (SHA-256 {sha})")
+        sys.exit(0)
+    
+    # Klient serwera kompilacji - bez lokalnego środowiska WinPython
+    if args.server:
+        if args.cancel:
+            sys.exit(0 if cancel_remote_job(args.server, args.cancel) else 1)
+        scripts = compiler.collect_scripts(([args.script] if args.script else []) + (args.batch or []),
+                                           args.manifest)
+        if not scripts:
+            print("❌ Wymagany skrypt (-s) lub lista skryptów (-b/-m)")
+            sys.exit(1)
+        sys.exit(0 if submit_remote_builds(args.server, scripts, not args.no_zip) else 1)
+    
     # Tryb interaktywny
-    if not args.winpython and not args.script:
+    if not args.winpython and not args.script and not batch_mode and not cache_command \
+            and not args.serve and not args.interpreters and args.packages is None:
         try:
             success = compiler.run_interactive()
             if success:
@@ -615,8 +5641,9 @@ def main():
         print("❌ Wymagana ścieżka WinPython (-w)")
         sys.exit(1)
         
-    if not args.script:
-        print("❌ Wymagany skrypt (-s)")
+    if not args.script and not batch_mode and not cache_command and not args.serve \
+            and not args.interpreters and args.packages is None:
+        print("❌ Wymagany skrypt (-s) lub lista skryptów (-b/-m)")
         sys.exit(1)
     
     # Tryb CLI